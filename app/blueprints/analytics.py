@@ -1,137 +1,476 @@
-from collections import Counter
-from typing import List
+from datetime import date
+from typing import Dict, List, Tuple
 
-from flask import Blueprint, render_template, request
-from sqlalchemy import text
+from flask import Blueprint, Response, abort, jsonify, render_template, request
+from sqlalchemy import desc, func, text
 
+import config
 from app.models.feed_db_filters import FeedDBFilters
-from app.models.feeds import Feeds
-from config import SOURCES
 from libs.database import get_session
+from libs.date_buckets import (
+    BUCKET_LABEL_FORMATS,
+    BUCKET_STEPS,
+    bucket_axis,
+    choose_bucket,
+    parse_filter_date,
+)
+from libs.feed_archive import archive_boundary, filtered_feeds
+from libs.feed_snapshot import SENTIMENT_NAMES, SERIES_NAMES, get_feed_snapshot
+from libs.source_stats import compare_sources, get_window_stats
+from libs.sources_registry import sources_registry
+from libs.term_stats import cooccurring_terms, trending_terms
+from libs.vocabulary import vocabulary
 
 analytics_bp = Blueprint("charts", __name__, url_prefix="/analytics")
 
-SOURCES_NAME_LIST = list(SOURCES.values())
 IGNORED_WORDS = ["magyar", "egy", "két", "miatt", "ezért"]
 
+TRENDING_METHODS = ("llr", "z")
 
-def get_sentiment_grouped(
-    filters: FeedDBFilters, group_by: str = "source_id", order_by: str = "source_id ASC"
-):
-    words_in = f" AND (words @> ARRAY{filters.words})" if filters.words else ""
-    text_like = (
-        f" AND lower(title) LIKE lower('%{filters.free_text}%')"
-        if filters.free_text
-        else ""
-    )
+# Dominant sentiment of a feed: ties go to negative, then to positive
+DOMINANT_SENTIMENT = """
+    CASE
+        WHEN GREATEST(negative, positive, neutral) = negative THEN 'negative'
+        WHEN GREATEST(negative, positive, neutral) = positive THEN 'positive'
+        ELSE 'neutral'
+    END
+"""
+# The columns of the feeds the charts read
+FEED_COLUMNS = (
+    "id, source_id, published, feed_date, title, word_ids, negative, positive, neutral"
+)
+# The feeds of both the feeds and the archive tables, for the filters starting
+# before the archive boundary. Postgres pushes the conditions into both branches.
+ALL_FEEDS = f"""(
+        SELECT {FEED_COLUMNS} FROM feeds
+        UNION ALL
+        SELECT {FEED_COLUMNS} FROM feeds_archive
+    )"""
+# The feeds with the scores of a model other than the one of the feeds columns.
+# The join reads only the (model_id, feed_id) index, which includes the scores.
+MODEL_SCORED_FEEDS = """(
+        SELECT
+            feeds.id, feeds.source_id, feeds.published, feeds.feed_date, feeds.title,
+            feeds.word_ids, scores.negative, scores.positive, scores.neutral
+        FROM {feeds} AS feeds
+        JOIN feed_sentiments AS scores
+            ON scores.model_id = :model_id AND scores.feed_id = feeds.id
+    ) AS feeds"""
+# One count column per sentiment, in the order of the chart series
+SENTIMENT_COUNTS = ", ".join(
+    f"count(*) FILTER (WHERE sentiment = '{name}') AS {name}"
+    for name in SENTIMENT_NAMES
+)
+# The columns of libs.source_stats.STATS_COLUMNS, computed from the feeds
+SOURCE_STATS = ", ".join(
+    ["count(*) AS feeds"]
+    + [
+        f"count(*) FILTER (WHERE sentiment = '{name}') AS {name}_feeds"
+        for name in SENTIMENT_NAMES
+    ]
+    + [
+        f"sum({name}) AS {name}_sum, sum({name} * {name}) AS {name}_sum_sq"
+        for name in SENTIMENT_NAMES
+    ]
+)
+
+
+def scored_feeds(filters: FeedDBFilters) -> str:
+    """
+    Args:
+        filters (FeedDBFilters): The request filters.
+
+    Returns:
+        str: The FROM item of the sentiment counts, the feeds scored by the selected model.
+    """
+    feeds = ALL_FEEDS if archive_boundary.spans(filters.start_date) else "feeds"
+    if filters.model_id in (None, config.SENTIMENT_MODEL_ID):
+        return "feeds" if feeds == "feeds" else f"{feeds} AS feeds"
+    return MODEL_SCORED_FEEDS.format(feeds=feeds)
+
+
+def sentiment_conditions(filters: FeedDBFilters) -> Tuple[str, dict]:
+    """
+    The WHERE clause of the sentiment counts and its parameters.
+
+    Args:
+        filters (FeedDBFilters): The request filters.
+
+    Returns:
+        Tuple[str, dict]: The conditions and the bind parameters.
+    """
+    conditions = "published >= :start_date AND published <= :end_date"
+    params = {
+        "start_date": filters.start_date,
+        "end_date": filters.end_date,
+        "model_id": filters.model_id,
+    }
+
+    if filters.free_text:
+        conditions += " AND lower(title) LIKE lower(:free_text)"
+        params["free_text"] = f"%{filters.free_text}%"
+    if filters.words:
+        conditions += " AND word_ids @> :word_ids"
+        params["word_ids"] = filters.word_ids
+
+    return conditions, params
+
+
+def get_sentiment_grouped(filters: FeedDBFilters) -> list:
+    """
+    Counts the feeds of each source by dominant sentiment.
+
+    Args:
+        filters (FeedDBFilters): The request filters.
+
+    Returns:
+        list: (source_id, negative, neutral, positive) rows ordered by source id.
+    """
+    if filters.word_ids is None:
+        return []
+
+    conditions, params = sentiment_conditions(filters)
+    stmt = f"""
+        SELECT source_id, {SENTIMENT_COUNTS}
+        FROM (
+            SELECT source_id, {DOMINANT_SENTIMENT} AS sentiment
+            FROM {scored_feeds(filters)}
+            WHERE {conditions}
+        ) AS feeds
+        GROUP BY source_id
+        ORDER BY source_id
+    """
+
+    with get_session() as session:
+        return session.execute(text(stmt), params).all()
+
+
+def get_sentiment_over_time(
+    filters: FeedDBFilters, axis: List[date], bucket: str
+) -> Dict[str, List[int]]:
+    """
+    Counts the feeds of each time bucket by dominant sentiment. The buckets come
+    from generate_series(), so the ones without feeds are counted as zeros too.
+
+    Args:
+        filters (FeedDBFilters): The request filters.
+        axis (List[date]): The first days of the buckets, see bucket_axis().
+        bucket (str): "day", "week" or "month".
+
+    Returns:
+        Dict[str, List[int]]: The count lists of the series, aligned with the axis.
+    """
+    if filters.word_ids is None or not axis:
+        return to_series([(day, 0, 0, 0) for day in axis])
+
+    conditions, params = sentiment_conditions(filters)
     stmt = f"""
-            SELECT {group_by}, count(id) as count,
-            CASE
-                WHEN GREATEST(negative, positive, neutral) = negative THEN 'negative'
-                WHEN GREATEST(negative, positive, neutral) = positive THEN 'positive'
-                ELSE 'neutral'
-            END AS max_sentiment_column
-            -- GREATEST(negative, positive, neutral) AS max_sentiment_value
-        FROM feeds
-        WHERE published >= :start_date and published <= :end_date {text_like}{words_in}
-        GROUP BY {group_by}, max_sentiment_column
-        ORDER BY {order_by};
-    """
-
-    session = get_session()
-
-    return session.execute(
-        text(stmt),
-        {"start_date": filters.start_date, "end_date": filters.end_date},
-    ).all()
-
-
-def generate_sentiment_by_source_series(input_data):
-    negative_data = {}
-    neutral_data = {}
-    positive_data = {}
-
-    for item in input_data:
-        key = item[0]  # position
-        value = item[1]  # data
-        sentiment = item[2]
-
-        if sentiment == "negative":
-            if key not in negative_data:
-                negative_data[key] = []
-            negative_data[key].append(value)
-        elif sentiment == "neutral":
-            if key not in neutral_data:
-                neutral_data[key] = []
-            neutral_data[key].append(value)
-        elif sentiment == "positive":
-            if key not in positive_data:
-                positive_data[key] = []
-            positive_data[key].append(value)
-
-    series_data = {"Negative": [], "Neutral": [], "Positive": []}
-    for key in sorted(
-        set(negative_data.keys()) | set(neutral_data.keys()) | set(positive_data.keys())
+        SELECT buckets.bucket, {SENTIMENT_COUNTS}
+        FROM generate_series(
+            CAST(:first_bucket AS timestamp),
+            CAST(:last_bucket AS timestamp),
+            CAST(:step AS interval)
+        ) AS buckets (bucket)
+        LEFT JOIN (
+            SELECT
+                date_trunc(:bucket, CAST(feed_date AS timestamp)) AS bucket,
+                {DOMINANT_SENTIMENT} AS sentiment
+            FROM {scored_feeds(filters)}
+            WHERE {conditions}
+        ) AS feeds ON feeds.bucket = buckets.bucket
+        GROUP BY buckets.bucket
+        ORDER BY buckets.bucket
+    """
+    params.update(
+        first_bucket=axis[0],
+        last_bucket=axis[-1],
+        step=BUCKET_STEPS[bucket],
+        bucket=bucket,
+    )
+
+    with get_session() as session:
+        return to_series(session.execute(text(stmt), params).all())
+
+
+def get_source_stats(filters: FeedDBFilters, start: date, end: date) -> list:
+    """
+    The sentiment statistics of each source. Without word, text or model
+    filters they are merged from the daily statistics, else computed from the
+    matching feeds.
+
+    Args:
+        filters (FeedDBFilters): The request filters.
+        start (date): The first day.
+        end (date): The last day.
+
+    Returns:
+        list: (source_id, *STATS_COLUMNS) rows ordered by source id.
+    """
+    source_ids = [int(source) for source in filters.sources]
+
+    if (
+        not filters.words
+        and not filters.free_text
+        and filters.model_id in (None, config.SENTIMENT_MODEL_ID)
     ):
-        series_data["Negative"].extend(negative_data.get(key, [0]))
-        series_data["Neutral"].extend(neutral_data.get(key, [0]))
-        series_data["Positive"].extend(positive_data.get(key, [0]))
+        with get_session() as session:
+            return get_window_stats(session, start, end, source_ids)
+
+    if filters.word_ids is None:
+        return []
+
+    conditions, params = sentiment_conditions(filters)
+    if source_ids:
+        conditions += " AND source_id = ANY(:source_ids)"
+        params["source_ids"] = source_ids
+    stmt = f"""
+        SELECT source_id, {SOURCE_STATS}
+        FROM (
+            SELECT source_id, negative, neutral, positive, {DOMINANT_SENTIMENT} AS sentiment
+            FROM {scored_feeds(filters)}
+            WHERE {conditions}
+        ) AS feeds
+        GROUP BY source_id
+        ORDER BY source_id
+    """
+
+    with get_session() as session:
+        return session.execute(text(stmt), params).all()
 
-    return series_data
+
+def to_series(rows: list) -> Dict[str, List[int]]:
+    """
+    Args:
+        rows (list): (key, negative, neutral, positive) rows.
+
+    Returns:
+        Dict[str, List[int]]: The {"Negative", "Neutral", "Positive"} count lists of the chart.
+    """
+    return {name: [row[i + 1] for row in rows] for i, name in enumerate(SERIES_NAMES)}
 
 
 def get_most_common_words(filters, most_common: int = 20):
-    session = get_session()
+    feeds, conditions = filtered_feeds(filters)
+
+    with get_session() as session:
+        ignored_ids = get_ignored_ids(session)
+
+        feed_word_ids = (
+            session.query(func.unnest(feeds.word_ids).label("word_id"))
+            .filter(conditions)
+            .subquery()
+        )
+        word_counts = (
+            session.query(feed_word_ids.c.word_id, func.count().label("count"))
+            .filter(feed_word_ids.c.word_id.notin_(ignored_ids))
+            .group_by(feed_word_ids.c.word_id)
+            .order_by(desc("count"))
+            .limit(most_common)
+            .all()
+        )
+
+        words = vocabulary.get_words(session, [row.word_id for row in word_counts])
+
+    return [(word, row.count) for word, row in zip(words, word_counts)]
+
+
+def get_ignored_ids(session) -> List[int]:
+    return [
+        word_id
+        for word_id in vocabulary.get_ids(session, IGNORED_WORDS)
+        if word_id is not None
+    ]
 
-    cursor_result = session.query(
-        Feeds.words,
-    ).filter(filters.conditions)
 
+def with_words(session, rows: List[dict]) -> List[dict]:
     """
-    words = []
-    for row_words in list(cursor_result):
-        [words.append(word) for word in row_words[0] if word not in IGNORED_WORDS] # numpy complains about this
+    Args:
+        session (Session): The SQLAlchemy session.
+        rows (List[dict]): Rows with a "word_id".
+
+    Returns:
+        List[dict]: The rows with the word as "name" instead of its id.
     """
+    words = vocabulary.get_words(session, [row["word_id"] for row in rows])
+    return [
+        {"name": word, **{key: value for key, value in row.items() if key != "word_id"}}
+        for word, row in zip(words, rows)
+    ]
+
+
+def get_filters() -> FeedDBFilters:
+    filters = FeedDBFilters()
+    filters.process_args(args=request.args)
+    return filters
 
-    words: List[str] = []
-    for row_words in list(cursor_result):
-        words.extend(word for word in row_words[0] if word not in IGNORED_WORDS)
 
-    return Counter(words).most_common(most_common)
+def chart_response(payload: dict) -> Response:
+    """
+    Serves the data of a chart as JSON, cacheable by the browser.
+
+    The ETag is the hash of the data, so a revalidation with If-None-Match
+    gets an empty 304 response while the data of the chart is unchanged.
+
+    Args:
+        payload (dict): The data of the chart.
+
+    Returns:
+        Response: The JSON response, or 304 Not Modified.
+    """
+    response = jsonify(payload)
+    response.add_etag()
+    response.cache_control.public = True
+    response.cache_control.max_age = config.ANALYTICS_CHART_MAX_AGE
+    return response.make_conditional(request)
 
 
 @analytics_bp.route("/")
 def index():
-    page_title = "Analytics"
-    filters = FeedDBFilters()
+    # Only the shell of the page, the charts fetch their data in parallel
+    return render_template(
+        "pages/analytics.html", page_title="Analytics", filters=get_filters()
+    )
 
-    filters.process_args(args=request.args)
 
-    sentiment_by_source = get_sentiment_grouped(filters)
-    sentiment_by_source_series = generate_sentiment_by_source_series(
-        sentiment_by_source
+@analytics_bp.route("/data/sentiment_by_source")
+def sentiment_by_source():
+    filters = get_filters()
+
+    snapshot = get_feed_snapshot()
+    if snapshot is not None and snapshot.covers(filters):
+        source_ids, series = snapshot.sentiment_series(filters)
+    else:
+        rows = get_sentiment_grouped(filters)
+        source_ids = [row[0] for row in rows]
+        series = to_series(rows)
+
+    return chart_response(
+        {"categories": sources_registry.categories(source_ids), "series": series}
     )
 
-    sentiment_by_time = get_sentiment_grouped(
-        filters=filters, group_by="feed_date", order_by="feed_date"
+
+@analytics_bp.route("/data/sentiment_over_time")
+def sentiment_over_time():
+    filters = get_filters()
+
+    start = parse_filter_date(filters.start_date)
+    end = parse_filter_date(filters.end_date)
+    if start is None or end is None:
+        abort(400)
+
+    # Bounded number of points, whatever the length of the range
+    bucket = choose_bucket(start.date(), end.date())
+    axis = bucket_axis(start.date(), end.date(), bucket)
+
+    snapshot = get_feed_snapshot()
+    if snapshot is not None and snapshot.covers(filters):
+        series = snapshot.sentiment_over_time(filters, axis, bucket)
+    else:
+        series = get_sentiment_over_time(filters, axis, bucket)
+
+    return chart_response(
+        {
+            "bucket": bucket,
+            "categories": [day.strftime(BUCKET_LABEL_FORMATS[bucket]) for day in axis],
+            "series": series,
+        }
     )
-    sentiment_by_time_series = generate_sentiment_by_source_series(sentiment_by_time)
 
-    sentiment_by_time_series_dates = {
-        row[0].strftime("%Y-%m-%d") for row in sentiment_by_time
-    }
 
-    most_common_words_raw = get_most_common_words(filters=filters, most_common=40)
-    most_common_words: List[dict] = [
-        {"name": word[0], "weight": word[1]} for word in most_common_words_raw
-    ]  # pragme: no cover
-    return render_template(
-        "pages/analytics.html",
-        page_title=page_title,
-        categories=SOURCES_NAME_LIST,
-        filters=filters,
-        most_common_words=most_common_words,
-        sentiment_by_source_series=sentiment_by_source_series,
-        sentiment_by_time_series=sentiment_by_time_series,
-        sentiment_by_time_series_dates=sorted(list(sentiment_by_time_series_dates)),
+@analytics_bp.route("/data/word_cloud")
+def word_cloud():
+    filters = get_filters()
+
+    snapshot = get_feed_snapshot()
+    if snapshot is not None and snapshot.covers(filters):
+        most_common_words = snapshot.most_common_words(
+            filters, most_common=40, ignored_words=IGNORED_WORDS
+        )
+    else:
+        most_common_words = get_most_common_words(filters=filters, most_common=40)
+
+    words: List[dict] = [
+        {"name": word, "weight": count} for word, count in most_common_words
+    ]
+    return chart_response({"words": words})
+
+
+@analytics_bp.route("/data/sentiment_comparison")
+def sentiment_comparison():
+    filters = get_filters()
+
+    start = parse_filter_date(filters.start_date)
+    end = parse_filter_date(filters.end_date)
+    if start is None or end is None:
+        abort(400)
+
+    sources = compare_sources(get_source_stats(filters, start.date(), end.date()))
+
+    return chart_response(
+        {
+            "categories": sources_registry.categories(
+                source["source_id"] for source in sources
+            ),
+            "sources": sources,
+            # The shares of the dominant sentiments in percent, for the chart
+            "series": {
+                series_name: [
+                    round(source["shares"][name]["value"] * 100, 1)
+                    for source in sources
+                ]
+                for name, series_name in zip(SENTIMENT_NAMES, SERIES_NAMES)
+            },
+        }
     )
+
+
+@analytics_bp.route("/data/trending_terms")
+def trending():
+    filters = get_filters()
+
+    end = parse_filter_date(filters.end_date)
+    method = request.args.get("method", "llr")
+    if end is None or method not in TRENDING_METHODS:
+        abort(400)
+
+    with get_session() as session:
+        terms = trending_terms(
+            session, end.date(), method=method, ignored_ids=get_ignored_ids(session)
+        )
+        terms = with_words(session, terms)
+
+    return chart_response(
+        {
+            "days": config.TRENDING_DAYS,
+            "baseline_periods": config.TRENDING_BASELINE_PERIODS,
+            "method": method,
+            "terms": terms,
+        }
+    )
+
+
+@analytics_bp.route("/data/cooccurring_terms")
+def cooccurring():
+    filters = get_filters()
+
+    start = parse_filter_date(filters.start_date)
+    end = parse_filter_date(filters.end_date)
+    if start is None or end is None:
+        abort(400)
+
+    # The word of the request, else the first word of the filters
+    word = request.args.get("word") or next(iter(filters.words), "")
+    word = word.lower().strip()
+    if not word:
+        return chart_response({"word": None, "terms": []})
+
+    with get_session() as session:
+        word_id = vocabulary.get_ids(session, [word])[0]
+        terms = (
+            []
+            if word_id is None
+            else cooccurring_terms(session, word_id, start.date(), end.date())
+        )
+        terms = with_words(session, terms)
+
+    return chart_response({"word": word, "terms": terms})
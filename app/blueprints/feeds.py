@@ -1,10 +1,11 @@
 from flask import Blueprint, render_template, request
 from flask_sqlalchemy.pagination import Pagination
+from sqlalchemy import select
 
 from app.models.feed_db_filters import FeedDBFilters
-from app.models.feeds import Feeds
-from config import SOURCES
-from libs.database import db, get_session
+from libs.database import db
+from libs.feed_archive import filtered_feeds
+from libs.sources_registry import sources_registry
 
 feeds_bp = Blueprint("feeds", __name__, url_prefix="/feeds")
 
@@ -12,12 +13,13 @@ feeds_bp = Blueprint("feeds", __name__, url_prefix="/feeds")
 def get_data(
     filters: FeedDBFilters = None, page: int = 1, max_per_page: int = 20
 ) -> Pagination:
-    session = get_session()
-
-    query = (
-        session.query(Feeds).filter(filters.conditions).order_by(Feeds.published.desc())
-    )
+    # Feeds alone, or with the archive when the filters start before its boundary
+    feeds, conditions = filtered_feeds(filters)
+    query = select(feeds).order_by(feeds.published.desc())
+    if conditions is not None:
+        query = query.where(conditions)
 
+    # Runs on db.session, which Flask-SQLAlchemy closes at the end of the request
     return db.paginate(query, page=page, max_per_page=max_per_page)
 
 
@@ -42,7 +44,7 @@ def index():
         page_title=page_title,
         feeds=feeds,
         filters=filters.conditions_dict,
-        sources=SOURCES,
+        sources=sources_registry.names(),
         selected_words=filters.selected_words,
         page=page,
         per_page=per_page,
@@ -0,0 +1,36 @@
+from flask import Blueprint, jsonify, render_template, request
+
+from libs.inference_service import score_texts
+
+score_bp = Blueprint("score", __name__, url_prefix="/score")
+
+# Longest accepted headline, in characters
+MAX_TEXT_LENGTH = 500
+
+
+@score_bp.route("/")
+def index():
+    return render_template("pages/score.html", page_title="Score a headline")
+
+
+@score_bp.route("/", methods=["POST"])
+def score():
+    # The models run in the inference service, not in the web workers
+    data = request.get_json(silent=True)
+    if data is None:
+        data = request.form
+    # Anything but an object with a string "text" is rejected like an empty text
+    text = data.get("text", "") if isinstance(data, dict) else None
+    text = text.strip() if isinstance(text, str) else ""
+    if not text or len(text) > MAX_TEXT_LENGTH:
+        return (
+            jsonify(error=f"Enter a text of 1 to {MAX_TEXT_LENGTH} characters."),
+            400,
+        )
+
+    try:
+        (result,) = score_texts([text])
+    except OSError:
+        return jsonify(error="The scoring service is not available."), 503
+
+    return jsonify(text=text, **result)
@@ -1,15 +1,61 @@
 import re
+from functools import lru_cache
+from typing import Optional, Tuple
 
 from jinja2.filters import FILTERS
+from markupsafe import Markup, escape
+
+HIGHLIGHT_TEMPLATE = '<mark class="highlight">{}</mark>'
+
+
+@lru_cache(maxsize=256)
+def compile_highlight_pattern(words: Tuple[str, ...]) -> Optional[re.Pattern]:
+    """
+    Compiles one case-insensitive alternation of the words.
+
+    Longer words come first, so a word is never cut short by one of its prefixes.
+
+    Args:
+        words (Tuple[str, ...]): The words to highlight.
+
+    Returns:
+        re.Pattern or None: The compiled pattern, or None if there are no words.
+    """
+    terms = sorted({word for word in words if word}, key=len, reverse=True)
+    if not terms:
+        return None
+    return re.compile("|".join(map(re.escape, terms)), re.IGNORECASE)
 
 
 def highlight_words(text, word_list):
-    for word in word_list:
-        regex = re.compile(f"{re.escape(word)}", re.IGNORECASE)
-        text = regex.sub(
-            lambda match: f'<mark class="highlight">{match.group()}</mark>', text
-        )
-    return text
+    """
+    Wraps every occurrence of the words in a <mark> tag, in a single pass over the text.
+
+    The text is HTML-escaped, so the result is safe to render.
+
+    Args:
+        text (str): The text to highlight, e.g. a feed title.
+        word_list (List[str]): The selected words.
+
+    Returns:
+        Markup: The escaped text with the highlighted words.
+    """
+    text = text or ""
+    pattern = compile_highlight_pattern(
+        tuple(sorted({word.lower() for word in word_list or []}))
+    )
+    if pattern is None:
+        return escape(text)
+
+    parts = []
+    position = 0
+    for match in pattern.finditer(text):
+        parts.append(escape(text[position : match.start()]))
+        parts.append(HIGHLIGHT_TEMPLATE.format(escape(match.group())))
+        position = match.end()
+    parts.append(escape(text[position:]))
+
+    return Markup("".join(parts))
 
 
 def initialize_filters():
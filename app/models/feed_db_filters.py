@@ -1,11 +1,29 @@
 from dataclasses import dataclass, field, fields
 from datetime import datetime, timedelta
-from typing import List
+from typing import List, Optional
 
 from flask import request
-from sqlalchemy import and_
+from sqlalchemy import and_, false
 
 from app.models.feeds import Feeds
+from libs.database import session_scope
+from libs.vocabulary import vocabulary
+
+
+def parse_filter_id(value: str) -> Optional[int]:
+    """
+    Parses an id filter value, like parse_filter_date() the dates.
+
+    Args:
+        value (str): The filter value.
+
+    Returns:
+        int or None: The parsed id, or None if it is empty or invalid.
+    """
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
 
 
 @dataclass
@@ -18,23 +36,39 @@ class FeedDBFilters:
     end_date: str = field(default=(datetime.now().strftime("%Y-%m-%d 23:59:59")))
     free_text: str = field(default="")
     selected_words: List[str] = field(default_factory=list)
+    story_id: Optional[int] = field(default=None)
+    model_id: Optional[int] = field(default=None)
+
+    def generate_conditions(self, model=Feeds):
+        """
+        Args:
+            model: Feeds, or FeedsArchive for the same conditions on the archive.
 
-    def generate_conditions(self):
+        Returns:
+            The and_ clause of the conditions, None if there are none.
+        """
         conditions = []
 
         if self.start_date:
-            conditions.append(Feeds.feed_date >= self.start_date)
+            conditions.append(model.feed_date >= self.start_date)
 
         if self.end_date:
-            conditions.append(Feeds.feed_date <= self.end_date)
+            conditions.append(model.feed_date <= self.end_date)
 
         if self.words:
-            words_cond = [word.lower().strip() for word in self.words]
-            conditions.append(Feeds.words.contains(words_cond))
+            word_ids = self.word_ids
+            if word_ids is None:
+                # A word that was never ingested can't match any feed
+                conditions.append(false())
+            else:
+                conditions.append(model.word_ids.contains(word_ids))
 
         if self.sources:
             sources_cond = [int(source) for source in self.sources]
-            conditions.append(Feeds.source_id.in_(sources_cond))
+            conditions.append(model.source_id.in_(sources_cond))
+
+        if self.story_id:
+            conditions.append(model.story_id == self.story_id)
 
         if self.free_text:
             """
@@ -44,7 +78,7 @@ class FeedDBFilters:
             conditions.append(Feeds.search_vector.op('@@')(to_tsquery(self.free_text)))
             """
             search = f"%{self.free_text}%"
-            conditions.append(Feeds.title.ilike(search))
+            conditions.append(model.title.ilike(search))
 
         # Create and_ clause if there are conditions
         return and_(*conditions) if conditions else None
@@ -60,8 +94,7 @@ class FeedDBFilters:
             conditions.append(f'feed_date <= {self.end_date}')
 
         if self.words:
-            words_cond = [word.lower().strip() for word in self.words]
-            conditions.append(Feeds.words.contains(words_cond))
+            conditions.append(Feeds.word_ids.contains(self.word_ids))
 
         if self.sources:
             sources_cond = [int(source) for source in self.sources]
@@ -80,6 +113,30 @@ class FeedDBFilters:
     def conditions(self):
         return self.generate_conditions()
 
+    @property
+    def word_ids(self) -> Optional[List[int]]:
+        """
+        Vocabulary ids of the selected words, looked up once per set of words.
+
+        Returns:
+            List[int] or None: The ids, or None if any of the words is not in the vocabulary.
+        """
+        words = tuple(word.lower().strip() for word in self.words)
+        if not words:
+            return []
+
+        # Keyed on the words, process_args() may set them after a first lookup
+        cached = getattr(self, "_word_ids", None)
+        if cached is not None and cached[0] == words:
+            return cached[1]
+
+        with session_scope() as session:
+            word_ids = vocabulary.get_ids(session, list(words))
+
+        word_ids = None if None in word_ids else word_ids
+        self._word_ids = (words, word_ids)
+        return word_ids
+
     @property
     def conditions_dict(self):
         params_dict = {}
@@ -104,6 +161,13 @@ class FeedDBFilters:
             self.words = args.get("words").split(",")
             self.selected_words.extend(self.words)
 
+        # An invalid id is ignored, like an invalid date
+        if args.get("story_id"):
+            self.story_id = parse_filter_id(args.get("story_id"))
+
+        if args.get("model_id"):
+            self.model_id = parse_filter_id(args.get("model_id"))
+
         if request.args.get("free_text"):
             self.free_text = args.get("free_text")
             self.selected_words.append(self.free_text)
@@ -0,0 +1,13 @@
+from libs.database import db
+
+
+class FeedLshBuckets(db.Model):
+    """LSH buckets of the MinHash signatures of the feed titles."""
+
+    __tablename__ = "feed_lsh_buckets"
+
+    band = db.Column(db.SmallInteger, primary_key=True)
+    bucket = db.Column(db.BigInteger, primary_key=True)
+    feed_id = db.Column(
+        db.Integer, db.ForeignKey("feeds.id", ondelete="CASCADE"), primary_key=True
+    )
@@ -10,9 +10,9 @@ class FeedSentiments(db.Model):
     __tablename__ = "feed_sentiments"
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    feed_id = db.Column(db.Integer, db.ForeignKey("feeds.id"), nullable=False)
-    model_id = db.Column(db.Integer)
-    prediction = db.Column(db.Text)
+    # Not a foreign key, the feed may be in feeds or in feeds_archive
+    feed_id = db.Column(db.Integer, nullable=False)
+    model_id = db.Column(db.Integer, nullable=False)
     negative = db.Column(db.Float, nullable=False)
     positive = db.Column(db.Float, nullable=False)
     neutral = db.Column(db.Float, nullable=False)
@@ -3,28 +3,27 @@ from datetime import datetime
 from sqlalchemy import case, func
 from sqlalchemy.dialects import postgresql
 from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import declared_attr
 
 from libs.database import db
 
 
-class Feeds(db.Model):
-    """Represents a feed entry in the database."""
+class FeedColumns(db.Model):
+    """The columns of a feed, shared by the feeds and the feeds_archive tables."""
 
-    __tablename__ = "feeds"
+    __abstract__ = True
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String)
     link = db.Column(db.String)
     hash = db.Column(db.String)
-    source_id = db.Column(db.Integer, db.ForeignKey("sources.id"))
-    words = db.Column(postgresql.ARRAY(db.Text), default=[])
+    story_id = db.Column(db.Integer)
+    word_ids = db.Column(postgresql.ARRAY(db.Integer), default=[])
     published = db.Column(db.DateTime)
     feed_date = db.Column(db.Date)
-    sentiment_prediction = db.Column(db.Text)
     negative = db.Column(db.Float)
     positive = db.Column(db.Float)
     neutral = db.Column(db.Float)
-    emotion_prediction = db.Column(db.Text)
     anger = db.Column(db.Float)
     fear = db.Column(db.Float)
     joy = db.Column(db.Float)
@@ -35,6 +34,10 @@ class Feeds(db.Model):
     created = db.Column(db.DateTime, default=datetime.now)
     search_vector = db.Column()
 
+    @declared_attr
+    def source_id(cls):
+        return db.Column(db.Integer, db.ForeignKey("sources.id"))
+
     @hybrid_property
     def max_sentiment_value(self) -> float:
         """
@@ -89,3 +92,9 @@ class Feeds(db.Model):
             ),
             else_="neutral",
         )
+
+
+class Feeds(FeedColumns):
+    """Represents a feed entry in the database."""
+
+    __tablename__ = "feeds"
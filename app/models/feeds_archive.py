@@ -0,0 +1,7 @@
+from app.models.feeds import FeedColumns
+
+
+class FeedsArchive(FeedColumns):
+    """The feeds older than the retention window, moved by jobs.archive_feeds."""
+
+    __tablename__ = "feeds_archive"
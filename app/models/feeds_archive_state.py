@@ -0,0 +1,10 @@
+from libs.database import db
+
+
+class FeedsArchiveState(db.Model):
+    """The single row of the archive: the feeds before archived_before are archived."""
+
+    __tablename__ = "feeds_archive_state"
+
+    id = db.Column(db.Boolean, primary_key=True, default=True)
+    archived_before = db.Column(db.Date)
@@ -1,6 +1,8 @@
 from flask_wtf import FlaskForm
 from wtforms import SelectMultipleField, StringField
 
+from libs.sources_registry import sources_registry
+
 
 class SearchFeedForm(FlaskForm):
     start_date = StringField("Start Date")
@@ -8,14 +10,7 @@ class SearchFeedForm(FlaskForm):
     words = StringField("Words")
     sources = SelectMultipleField(
         "Sources",
-        choices=[
-            ("1", "444.hu"),
-            ("2", "telex.hu"),
-            ("3", "24.hu"),
-            ("4", "origo.hu"),
-            ("5", "hirado.hu"),
-            ("6", "magyarnemzet.hu"),
-            ("7", "index.hu"),
-        ],
+        # Called when the form is built, so a new source needs no code change
+        choices=sources_registry.choices,
     )
     free_text = StringField("Free Text Search")
@@ -0,0 +1,20 @@
+from datetime import datetime
+
+from sqlalchemy.dialects import postgresql
+
+from libs.database import db
+
+
+class SentimentModels(db.Model):
+    """Registry of the sentiment models the feeds are scored with."""
+
+    __tablename__ = "sentiment_models"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    name = db.Column(db.Text, nullable=False, unique=True)
+    model = db.Column(db.Text, nullable=False)
+    tokenizer = db.Column(db.Text)
+    labels = db.Column(postgresql.JSONB, nullable=False)
+    max_length = db.Column(db.Integer, nullable=False, default=128)
+    active = db.Column(db.Boolean, nullable=False, default=True)
+    created = db.Column(db.DateTime, default=datetime.now)
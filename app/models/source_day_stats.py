@@ -0,0 +1,20 @@
+from libs.database import db
+
+
+class SourceDayStats(db.Model):
+    """Sufficient statistics of the sentiment scores of a source on a day."""
+
+    __tablename__ = "source_day_stats"
+
+    day = db.Column(db.Date, primary_key=True)
+    source_id = db.Column(db.Integer, primary_key=True)
+    feeds = db.Column(db.Integer, nullable=False)
+    negative_feeds = db.Column(db.Integer, nullable=False)
+    neutral_feeds = db.Column(db.Integer, nullable=False)
+    positive_feeds = db.Column(db.Integer, nullable=False)
+    negative_sum = db.Column(db.Float, nullable=False)
+    negative_sum_sq = db.Column(db.Float, nullable=False)
+    neutral_sum = db.Column(db.Float, nullable=False)
+    neutral_sum_sq = db.Column(db.Float, nullable=False)
+    positive_sum = db.Column(db.Float, nullable=False)
+    positive_sum_sq = db.Column(db.Float, nullable=False)
@@ -0,0 +1,27 @@
+from sqlalchemy.dialects import postgresql
+
+from libs.database import db
+
+
+class SourceSchedule(db.Model):
+    """Polling schedule and lease of a source, see libs.source_schedule."""
+
+    __tablename__ = "source_schedule"
+
+    source_id = db.Column(
+        db.Integer, db.ForeignKey("sources.id", ondelete="CASCADE"), primary_key=True
+    )
+    next_poll_at = db.Column(db.DateTime, nullable=False)
+    # Seconds between two polls
+    poll_interval = db.Column(db.Integer, nullable=False, default=900)
+    leased_by = db.Column(db.Text)
+    leased_until = db.Column(db.DateTime)
+    last_polled_at = db.Column(db.DateTime)
+    last_new_items = db.Column(db.Integer, nullable=False, default=0)
+    failures = db.Column(db.Integer, nullable=False, default=0)
+    # High-water mark of the feed, see libs.source_schedule.FeedState
+    content_hash = db.Column(db.Text)
+    etag = db.Column(db.Text)
+    last_modified = db.Column(db.Text)
+    latest_published = db.Column(db.DateTime)
+    link_hashes = db.Column(postgresql.ARRAY(db.Text), nullable=False, default=[])
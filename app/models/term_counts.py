@@ -0,0 +1,11 @@
+from libs.database import db
+
+
+class TermCounts(db.Model):
+    """Number of feeds of a day containing a word of the vocabulary."""
+
+    __tablename__ = "term_counts"
+
+    day = db.Column(db.Date, primary_key=True)
+    word_id = db.Column(db.Integer, primary_key=True)
+    count = db.Column(db.Integer, nullable=False)
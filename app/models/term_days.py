@@ -0,0 +1,10 @@
+from libs.database import db
+
+
+class TermDays(db.Model):
+    """Number of feeds of a day, the totals of term_counts and term_pairs."""
+
+    __tablename__ = "term_days"
+
+    day = db.Column(db.Date, primary_key=True)
+    feeds = db.Column(db.Integer, nullable=False)
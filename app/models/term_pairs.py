@@ -0,0 +1,12 @@
+from libs.database import db
+
+
+class TermPairs(db.Model):
+    """Number of feeds of a day containing two words (word_id < other_id)."""
+
+    __tablename__ = "term_pairs"
+
+    day = db.Column(db.Date, primary_key=True)
+    word_id = db.Column(db.Integer, primary_key=True)
+    other_id = db.Column(db.Integer, primary_key=True)
+    count = db.Column(db.Integer, nullable=False)
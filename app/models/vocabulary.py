@@ -0,0 +1,10 @@
+from libs.database import db
+
+
+class Vocabulary(db.Model):
+    """Interned words of the feeds, referenced by feeds.word_ids."""
+
+    __tablename__ = "vocabulary"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    word = db.Column(db.Text, nullable=False, unique=True)
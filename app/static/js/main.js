@@ -100,6 +100,18 @@ function displaySentimentChart(divID, data) {
   });
 }
 
+function loadChart(divID, url, chartOptions) {
+    // The charts of a page are requested at the same time, each one is drawn
+    // as soon as its own data arrives
+    $.getJSON(url)
+        .done(function(data) {
+            Highcharts.chart(divID, chartOptions(data));
+        })
+        .fail(function() {
+            $('#' + divID).html('<div class="ui negative message">The chart could not be loaded.</div>');
+        });
+}
+
 $(document).ready(function() {
 
     var url = new URL(document.URL);
@@ -0,0 +1,60 @@
+"""
+Benchmark of the highlight_words template filter on a page of feed titles.
+
+Compares the original one-regex-per-word filter with the single-pass,
+cached alternation of app.filters.custom_filters.
+
+Usage:
+    python -m benchmarks.bench_highlight [--rows 100] [--terms 10] [--repeat 50]
+"""
+
+import argparse
+import itertools
+import re
+import timeit
+
+from app.filters.custom_filters import highlight_words
+from benchmarks.bench_text_normalizer import load_titles
+
+
+def legacy_highlight_words(text, word_list):
+    """The filter before the single-pass version."""
+    for word in word_list:
+        regex = re.compile(f"{re.escape(word)}", re.IGNORECASE)
+        text = regex.sub(
+            lambda match: f'<mark class="highlight">{match.group()}</mark>', text
+        )
+    return text
+
+
+def run(rows: int, terms: int, repeat: int) -> None:
+    titles = list(itertools.islice(itertools.cycle(load_titles()), rows))
+    words = sorted(
+        {word.lower() for title in titles for word in re.findall(r"\w{4,}", title)}
+    )[:terms]
+
+    def render_page(highlight):
+        return [highlight(title, words) for title in titles]
+
+    print(f"{rows} rows x {len(words)} terms x {repeat} pages")
+    legacy = min(
+        timeit.repeat(
+            lambda: render_page(legacy_highlight_words), number=repeat, repeat=3
+        )
+    )
+    current = min(
+        timeit.repeat(lambda: render_page(highlight_words), number=repeat, repeat=3)
+    )
+    print(f"{'legacy (regex per word)':28} {legacy / repeat * 1e3:8.2f} ms/page")
+    print(
+        f"{'single pass (cached)':28} {current / repeat * 1e3:8.2f} ms/page  x{legacy / current:.1f}"
+    )
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    arg_parser.add_argument("--rows", type=int, default=100)
+    arg_parser.add_argument("--terms", type=int, default=10)
+    arg_parser.add_argument("--repeat", type=int, default=50)
+    arguments = arg_parser.parse_args()
+    run(arguments.rows, arguments.terms, arguments.repeat)
@@ -0,0 +1,145 @@
+"""
+Batched inference throughput (titles/sec) for several batch sizes.
+
+The stub model (the default) has a fixed per-call latency plus a per-title cost,
+which is enough to compare batching policies without the models. The real
+models run in three ways:
+
+    pipeline       the transformers pipelines (the previous scoring path)
+    direct         tokenizer + model of libs.sentiment_analyzer, padded batches
+    direct-cached  the same, with every title already in the token cache, as in
+                   a rescoring run
+
+Usage:
+    python -m benchmarks.bench_inference [--model stub|pipeline|direct|direct-cached] \
+        [--titles 512] \
+        [--batch-sizes 1,8,32,64] [--latency-ms 20] [--per-item-ms 1]
+"""
+
+import argparse
+import random
+import time
+from functools import partial
+from typing import Callable, List
+
+from benchmarks.common import latency_summary, save_results
+from benchmarks.synthetic import SyntheticCorpus
+from libs.stub_classifier import StubClassifier
+
+
+def get_predictors(model: str, latency_ms: float, per_item_ms: float) -> tuple:
+    """
+    Returns the batch predict functions of the sentiment and emotion models.
+
+    Args:
+        model (str): "stub", "pipeline", "direct" or "direct-cached".
+        latency_ms (float): The per-call latency of the stub.
+        per_item_ms (float): The per-title cost of the stub.
+
+    Returns:
+        tuple: The sentiment and the emotion predict functions.
+    """
+    if model == "pipeline":
+        from transformers import pipeline
+
+        from libs.sentiment_analyzer import EMOTION_MODEL, SENTIMENT_MODEL
+
+        sentiment_classifier = pipeline(
+            "sentiment-analysis", model=SENTIMENT_MODEL, top_k=None
+        )
+        emotion_classifier = pipeline(
+            "text-classification", model=EMOTION_MODEL, top_k=None
+        )
+        return (
+            lambda batch: sentiment_classifier(batch, batch_size=len(batch)),
+            lambda batch: emotion_classifier(batch, batch_size=len(batch)),
+        )
+
+    if model in ("direct", "direct-cached"):
+        from libs import sentiment_analyzer
+        from libs.scoring import token_cache
+
+        sentiment_analyzer.load_models()
+        cache = token_cache if model == "direct-cached" else None
+        return (
+            partial(sentiment_analyzer.predict_sentiments, cache=cache),
+            partial(sentiment_analyzer.predict_emotions, cache=cache),
+        )
+
+    classifier = StubClassifier(latency_ms, per_item_ms)
+    return classifier.predict_sentiments, classifier.predict_emotions
+
+
+def measure(
+    titles: List[str], batch_size: int, predictors: List[Callable[[List[str]], list]]
+) -> dict:
+    batch_seconds = []
+    start_time = time.perf_counter()
+    for batch_start in range(0, len(titles), batch_size):
+        batch = titles[batch_start : batch_start + batch_size]
+        batch_start_time = time.perf_counter()
+        for predict in predictors:
+            predict(batch)
+        batch_seconds.append(time.perf_counter() - batch_start_time)
+    elapsed = time.perf_counter() - start_time
+
+    return {
+        "titles_per_second": round(len(titles) / elapsed, 1),
+        "batch_latency": latency_summary(batch_seconds),
+    }
+
+
+def run(
+    model: str,
+    titles: int,
+    batch_sizes: List[int],
+    latency_ms: float,
+    per_item_ms: float,
+    seed: int,
+) -> dict:
+    corpus = SyntheticCorpus(seed=seed)
+    rng = random.Random(seed)
+    sample = [corpus.title(rng) for _ in range(titles)]
+    predictors = get_predictors(model, latency_ms, per_item_ms)
+
+    # The first call of the real models is much slower (lazy initialization),
+    # the cached run starts with every title tokenized
+    warmup = sample if model == "direct-cached" else sample[:1]
+    for predict in predictors:
+        predict(warmup)
+
+    results = {}
+    for batch_size in batch_sizes:
+        results[f"batch_{batch_size}"] = measure(sample, batch_size, predictors)
+        print(
+            f"batch size {batch_size:4}: "
+            f"{results[f'batch_{batch_size}']['titles_per_second']:10.1f} titles/s"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    arg_parser.add_argument(
+        "--model",
+        choices=["stub", "pipeline", "direct", "direct-cached"],
+        default="stub",
+    )
+    arg_parser.add_argument("--titles", type=int, default=512)
+    arg_parser.add_argument("--batch-sizes", default="1,8,32,64")
+    arg_parser.add_argument("--latency-ms", type=float, default=20.0)
+    arg_parser.add_argument("--per-item-ms", type=float, default=1.0)
+    arg_parser.add_argument("--seed", type=int, default=1)
+    arg_parser.add_argument("--output", help="path of the JSON results")
+    arguments = arg_parser.parse_args()
+
+    params = {
+        "model": arguments.model,
+        "titles": arguments.titles,
+        "batch_sizes": [int(size) for size in arguments.batch_sizes.split(",")],
+        "latency_ms": arguments.latency_ms,
+        "per_item_ms": arguments.per_item_ms,
+        "seed": arguments.seed,
+    }
+    results = run(**params)
+    save_results("inference", params, results, arguments.output)
@@ -0,0 +1,135 @@
+"""
+Ingest throughput of jobs/daily/rss_reader.py on synthetic RSS items.
+
+Runs process_feed_item() over generated entries of every source twice: the
+first pass inserts them (new items), the second one only dedupes them (already
+seen items, the steady state of a poll). The classifier is a stub with a fixed
+latency, so the numbers measure the ingest path, not the models. The inserted
+feeds are deleted afterwards.
+
+Usage:
+    PSQL_DBNAME=power_of_words_bench TOKENIZER=regex python -m benchmarks.bench_ingest \
+        [--items 200] [--latency-ms 0] [--per-item-ms 0]
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from email.utils import format_datetime
+
+from sqlalchemy import text
+
+from benchmarks.common import require_benchmark_database, save_results
+from benchmarks.synthetic import SyntheticCorpus
+from libs.database import session_scope
+from libs.metrics import RunMetrics
+from libs.stub_classifier import StubClassifier
+from run import create_app
+
+
+def generate_items(
+    corpus: SyntheticCorpus, rng: random.Random, source_name: str, count: int
+) -> list:
+    """
+    Generates the entries of an RSS feed the way feedparser returns them.
+
+    Args:
+        corpus (SyntheticCorpus): The corpus of the titles.
+        rng (random.Random): The random generator.
+        source_name (str): The name of the source, used in the links.
+        count (int): The number of entries.
+
+    Returns:
+        list: The entries, with raw titles, /rss links and RFC 822 dates.
+    """
+    now = datetime.now().astimezone()
+    items = []
+    for index in range(count):
+        published = now - timedelta(minutes=rng.randrange(24 * 60))
+        items.append(
+            {
+                "title": corpus.title(rng, raw=True),
+                "link": f"https://{source_name}/rss/{rng.getrandbits(64):x}-{index}",
+                "published": format_datetime(published),
+            }
+        )
+    return items
+
+
+def run(items: int, latency_ms: float, per_item_ms: float, seed: int) -> dict:
+    require_benchmark_database()
+    StubClassifier(latency_ms, per_item_ms).install()
+
+    # Imported once the stub replaced the models of libs.sentiment_analyzer
+    from jobs.daily import rss_reader
+
+    app = create_app()
+    corpus = SyntheticCorpus(seed=seed)
+    rng = random.Random(seed)
+    results = {}
+
+    with app.app_context():
+        with session_scope() as session:
+            sources = session.execute(text("SELECT id, name FROM sources")).all()
+            last_feed_id = session.execute(
+                text("SELECT coalesce(max(id), 0) FROM feeds")
+            ).scalar()
+
+        feeds = {
+            source_id: generate_items(corpus, rng, name, items)
+            for source_id, name in sources
+        }
+        total_items = sum(len(source_items) for source_items in feeds.values())
+
+        try:
+            for phase in ("new", "seen"):
+                metrics = RunMetrics("ingest")
+                start_time = time.perf_counter()
+                for source_id, source_items in feeds.items():
+                    for item in source_items:
+                        rss_reader.process_feed_item(item, source_id, metrics)
+                elapsed = time.perf_counter() - start_time
+
+                metrics.finish()
+                summary = metrics.to_dict()
+                results[phase] = {
+                    "items": total_items,
+                    "seconds": round(elapsed, 3),
+                    "items_per_second": round(total_items / elapsed, 1),
+                    "stages": summary["stages"],
+                    "counters": summary["counters"],
+                }
+                print(
+                    f"{phase:5} items: {total_items} in {elapsed:.2f}s, "
+                    f"{total_items / elapsed:.1f} items/s"
+                )
+        finally:
+            with session_scope() as session:
+                session.execute(
+                    text("DELETE FROM feeds WHERE id > :last_feed_id"),
+                    {"last_feed_id": last_feed_id},
+                )
+
+    return results
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    arg_parser.add_argument("--items", type=int, default=200, help="items per source")
+    arg_parser.add_argument("--latency-ms", type=float, default=0.0)
+    arg_parser.add_argument("--per-item-ms", type=float, default=0.0)
+    arg_parser.add_argument("--seed", type=int, default=1)
+    arg_parser.add_argument("--output", help="path of the JSON results")
+    arguments = arg_parser.parse_args()
+
+    params = {
+        "items": arguments.items,
+        "latency_ms": arguments.latency_ms,
+        "per_item_ms": arguments.per_item_ms,
+        "seed": arguments.seed,
+    }
+    results = run(
+        arguments.items, arguments.latency_ms, arguments.per_item_ms, arguments.seed
+    )
+    save_results("ingest", params, results, arguments.output)
@@ -0,0 +1,328 @@
+"""
+Load test of the web tier: throughput, latency percentiles and connection pool
+saturation under an increasing number of concurrent users.
+
+Every user is an asyncio task requesting the URLs of a scenario back to back
+over HTTP (one connection per request). By default the app is served in this
+process by a threaded werkzeug server, so the pool of its engine is sampled
+during the run: the share of the samples with every pooled connection checked
+out is the saturation. With --url the users target a running server instead
+(e.g. gunicorn) and the pool is not sampled. The client shares the process
+with the server, so use --url for numbers close to production.
+
+Load the benchmark database with benchmarks.synthetic first, or pass
+--load-rows to load it in the same command.
+
+Usage:
+    PSQL_DBNAME=power_of_words_bench python -m benchmarks.bench_load \
+        [--scenario mixed] [--users 1,4,16,32] [--duration 20] [--load-rows 100000] \
+        [--url http://127.0.0.1:5000]
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import threading
+import time
+from datetime import date
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+
+from benchmarks.bench_web import filter_mixes
+from benchmarks.common import latency_summary, require_benchmark_database, save_results
+from benchmarks.synthetic import SyntheticCorpus
+
+# Seconds between two samples of the pool
+POOL_SAMPLE_INTERVAL = 0.05
+
+
+def scenarios(words: List[str], end_date: date) -> Dict[str, Callable]:
+    """
+    The load scenarios by name: each one draws the URL of the next request.
+
+    Args:
+        words (List[str]): Frequent words of the dataset, for the word filters.
+        end_date (date): The last day of the dataset.
+
+    Returns:
+        Dict[str, Callable]: name -> function of a random.Random returning a URL.
+    """
+    mixes = filter_mixes(words, end_date)
+    feed_filters = [url for name, url in mixes.items() if name.startswith("feeds_")]
+    analytics = [url for name, url in mixes.items() if name.split("_")[0] != "feeds"]
+
+    def feeds_paging(rng: random.Random) -> str:
+        return f"/feeds/?{urlencode({'page': rng.randint(1, 50)})}"
+
+    def feeds_filters(rng: random.Random) -> str:
+        return rng.choice(feed_filters)
+
+    def analytics_ranges(rng: random.Random) -> str:
+        # The analytics page or the data of one of its charts, over 1 to 365 days
+        return rng.choice(analytics)
+
+    def mixed(rng: random.Random) -> str:
+        return rng.choices(
+            [feeds_paging, feeds_filters, analytics_ranges], weights=[3, 3, 4]
+        )[0](rng)
+
+    return {
+        "feeds_paging": feeds_paging,
+        "feeds_filters": feeds_filters,
+        "analytics": analytics_ranges,
+        "mixed": mixed,
+    }
+
+
+async def fetch(host: str, port: int, path: str) -> int:
+    """
+    Requests a URL on a new connection and reads the whole response.
+
+    Returns:
+        int: The HTTP status code.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(
+            f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\n"
+            f"Connection: close\r\n\r\n".encode("ascii")
+        )
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+
+    status_line = response.split(b"\r\n", 1)[0]
+    return int(status_line.split()[1]) if status_line else 0
+
+
+async def user(
+    host: str,
+    port: int,
+    draw: Callable,
+    rng: random.Random,
+    deadline: float,
+    samples: List[Tuple[float, int]],
+) -> None:
+    while time.perf_counter() < deadline:
+        path = draw(rng)
+        start_time = time.perf_counter()
+        try:
+            status = await fetch(host, port, path)
+        except OSError:
+            status = 0
+        samples.append((time.perf_counter() - start_time, status))
+
+
+async def load(
+    host: str, port: int, draw: Callable, users: int, duration: float, seed: int
+) -> Tuple[List[Tuple[float, int]], float]:
+    samples: List[Tuple[float, int]] = []
+    start_time = time.perf_counter()
+    deadline = start_time + duration
+    await asyncio.gather(
+        *(
+            user(host, port, draw, random.Random(seed + index), deadline, samples)
+            for index in range(users)
+        )
+    )
+    return samples, time.perf_counter() - start_time
+
+
+class PoolSampler:
+    """Samples the checked out connections of a QueuePool in a thread."""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.checked_out: List[int] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(POOL_SAMPLE_INTERVAL):
+            self.checked_out.append(self.pool.checkedout())
+
+    def __enter__(self) -> "PoolSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def summary(self) -> dict:
+        checked_out = np.asarray(self.checked_out or [0])
+        return {
+            "size": self.pool.size(),
+            "mean_checked_out": round(float(checked_out.mean()), 2),
+            "max_checked_out": int(checked_out.max()),
+            # Every pooled connection busy: the next request opens an overflow
+            # connection, or waits for one once the overflow is used up too
+            "saturated_share": round(
+                float((checked_out >= self.pool.size()).mean()), 3
+            ),
+            "status": self.pool.status(),
+        }
+
+
+def serve_in_process():
+    """
+    Serves the app on a free local port in a thread.
+
+    Returns:
+        tuple: The server, its port and the connection pool of the app.
+    """
+    from werkzeug.serving import make_server
+
+    from libs.database import db
+    from run import create_app
+
+    app = create_app()
+    # One access log line per request would slow the server and flood the report
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    with app.app_context():
+        pool = db.engine.pool
+    return server, server.port, pool
+
+
+def run(
+    scenario: str,
+    users: List[int],
+    duration: float,
+    warmup: float,
+    end_date: date,
+    seed: int,
+    url: Optional[str] = None,
+) -> dict:
+    require_benchmark_database()
+
+    draw = scenarios(SyntheticCorpus(seed=seed).vocabulary[:2], end_date)[scenario]
+
+    server, pool = None, None
+    if url:
+        target = urlsplit(url)
+        host, port = target.hostname, target.port or 80
+    else:
+        server, port, pool = serve_in_process()
+        host = "127.0.0.1"
+
+    results = {}
+    try:
+        # Fills the caches and the pool before the first measured level
+        asyncio.run(load(host, port, draw, max(users), warmup, seed))
+
+        for user_count in users:
+            if pool is not None:
+                with PoolSampler(pool) as sampler:
+                    samples, elapsed = asyncio.run(
+                        load(host, port, draw, user_count, duration, seed)
+                    )
+                pool_summary = sampler.summary()
+            else:
+                samples, elapsed = asyncio.run(
+                    load(host, port, draw, user_count, duration, seed)
+                )
+                pool_summary = None
+
+            durations = np.array([duration for duration, _ in samples])
+            errors = sum(1 for _, status in samples if status != 200)
+            result = {
+                "requests": len(samples),
+                "errors": errors,
+                "requests_per_second": round(len(samples) / elapsed, 1),
+                "latency": {
+                    **latency_summary(durations),
+                    "p99_ms": round(float(np.percentile(durations, 99) * 1000), 3),
+                },
+                "pool": pool_summary,
+            }
+            results[f"users_{user_count}"] = result
+            print(
+                f"{user_count:4} users: {result['requests_per_second']:8.1f} req/s  "
+                f"p50 {result['latency']['p50_ms']:8.1f} ms  "
+                f"p95 {result['latency']['p95_ms']:8.1f} ms  "
+                f"p99 {result['latency']['p99_ms']:8.1f} ms  "
+                f"errors {errors}"
+                + (
+                    f"  pool {pool_summary['max_checked_out']}/{pool_summary['size']}"
+                    f" saturated {pool_summary['saturated_share']:.0%}"
+                    if pool_summary
+                    else ""
+                )
+            )
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    return results
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    arg_parser.add_argument(
+        "--scenario",
+        default="mixed",
+        choices=("feeds_paging", "feeds_filters", "analytics", "mixed"),
+    )
+    arg_parser.add_argument(
+        "--users", default="1,4,16,32", help="concurrent users of each level"
+    )
+    arg_parser.add_argument(
+        "--duration", type=float, default=20.0, help="seconds of each level"
+    )
+    arg_parser.add_argument("--warmup", type=float, default=5.0)
+    arg_parser.add_argument(
+        "--end-date",
+        type=date.fromisoformat,
+        default=date.today(),
+        help="last day of the dataset (default: today)",
+    )
+    arg_parser.add_argument(
+        "--load-rows",
+        type=int,
+        help="load a synthetic dataset of this many feeds first",
+    )
+    arg_parser.add_argument("--url", help="base URL of a running server")
+    arg_parser.add_argument("--seed", type=int, default=1)
+    arg_parser.add_argument("--output", help="path of the JSON results")
+    arguments = arg_parser.parse_args()
+
+    if arguments.load_rows:
+        from sqlalchemy import create_engine
+
+        from benchmarks.synthetic import load_database
+
+        load_database(
+            create_engine(require_benchmark_database()),
+            SyntheticCorpus(seed=arguments.seed),
+            rows=arguments.load_rows,
+            sources=8,
+            days=365,
+            end_date=arguments.end_date,
+            seed=arguments.seed,
+        )
+
+    params = {
+        "scenario": arguments.scenario,
+        "users": [int(users) for users in arguments.users.split(",")],
+        "duration": arguments.duration,
+        "warmup": arguments.warmup,
+        "end_date": arguments.end_date.isoformat(),
+        "seed": arguments.seed,
+        "url": arguments.url,
+    }
+    results = run(
+        params["scenario"],
+        params["users"],
+        arguments.duration,
+        arguments.warmup,
+        arguments.end_date,
+        arguments.seed,
+        arguments.url,
+    )
+    save_results("load", params, results, arguments.output)
@@ -0,0 +1,115 @@
+"""
+Latency and throughput of the micro-batching inference service under concurrent
+single-headline requests, for several max-wait policies.
+
+The requests go straight to a MicroBatcher (no HTTP) scoring with the stub
+model, so the numbers show the effect of the batching policy alone: a longer
+wait makes larger batches (fewer model calls) but adds latency at low load.
+
+Usage:
+    python -m benchmarks.bench_microbatch [--clients 16] [--requests 50] \
+        [--max-batch 32] [--max-waits-ms 0,5,10,20] [--latency-ms 20] [--per-item-ms 1]
+"""
+
+import argparse
+import random
+import threading
+import time
+from typing import List
+
+from benchmarks.common import latency_summary, save_results
+from benchmarks.synthetic import SyntheticCorpus
+from libs.inference_service import MicroBatcher
+from libs.stub_classifier import StubClassifier
+
+
+def measure(
+    batcher: MicroBatcher, titles: List[str], clients: int, requests: int
+) -> dict:
+    durations = []
+    lock = threading.Lock()
+
+    def client(client_index: int) -> None:
+        rng = random.Random(client_index)
+        for _ in range(requests):
+            title = rng.choice(titles)
+            start_time = time.perf_counter()
+            batcher.score([title])
+            elapsed = time.perf_counter() - start_time
+            with lock:
+                durations.append(elapsed)
+
+    threads = [
+        threading.Thread(target=client, args=(index,)) for index in range(clients)
+    ]
+    start_time = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start_time
+
+    return {
+        "requests_per_second": round(len(durations) / elapsed, 1),
+        "batches": batcher.batches,
+        "mean_batch_size": round(batcher.batch_sizes.sum / batcher.batches, 2),
+        "mean_queue_depth": round(batcher.queue_depths.sum / batcher.batches, 2),
+        "latency": latency_summary(durations),
+    }
+
+
+def run(
+    clients: int,
+    requests: int,
+    max_batch: int,
+    max_waits_ms: List[float],
+    latency_ms: float,
+    per_item_ms: float,
+    seed: int,
+) -> dict:
+    corpus = SyntheticCorpus(seed=seed)
+    rng = random.Random(seed)
+    titles = [corpus.title(rng) for _ in range(1000)]
+    classifier = StubClassifier(latency_ms, per_item_ms)
+
+    results = {}
+    for max_wait_ms in max_waits_ms:
+        batcher = MicroBatcher(
+            classifier.predict_sentiments, max_batch=max_batch, max_wait_ms=max_wait_ms
+        )
+        result = measure(batcher, titles, clients, requests)
+        batcher.stop()
+
+        results[f"max_wait_{max_wait_ms:g}ms"] = result
+        print(
+            f"max wait {max_wait_ms:5g} ms: {result['requests_per_second']:8.1f} req/s  "
+            f"batch {result['mean_batch_size']:6.2f}  "
+            f"p50 {result['latency']['p50_ms']:8.2f} ms  "
+            f"p95 {result['latency']['p95_ms']:8.2f} ms"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    arg_parser.add_argument("--clients", type=int, default=16)
+    arg_parser.add_argument("--requests", type=int, default=50)
+    arg_parser.add_argument("--max-batch", type=int, default=32)
+    arg_parser.add_argument("--max-waits-ms", default="0,5,10,20")
+    arg_parser.add_argument("--latency-ms", type=float, default=20.0)
+    arg_parser.add_argument("--per-item-ms", type=float, default=1.0)
+    arg_parser.add_argument("--seed", type=int, default=1)
+    arg_parser.add_argument("--output", help="path of the JSON results")
+    arguments = arg_parser.parse_args()
+
+    params = {
+        "clients": arguments.clients,
+        "requests": arguments.requests,
+        "max_batch": arguments.max_batch,
+        "max_waits_ms": [float(wait) for wait in arguments.max_waits_ms.split(",")],
+        "latency_ms": arguments.latency_ms,
+        "per_item_ms": arguments.per_item_ms,
+        "seed": arguments.seed,
+    }
+    results = run(**params)
+    save_results("microbatch", params, results, arguments.output)
@@ -0,0 +1,138 @@
+"""
+Table size and scan time of feeds and feed_sentiments with and without the
+prediction text blobs (migrations/006_drop_prediction_blobs.sql).
+
+Load the benchmark database with benchmarks.synthetic first. The benchmark
+copies each table twice, as it is now ("after") and with the JSON blobs of the
+float columns added back ("before"), so both copies are freshly written and
+compare fairly. It reports the heap and TOAST sizes, the mean row size, the
+time of a full scan in the database and of fetching every row into Python.
+The copies are dropped at the end.
+
+Usage:
+    PSQL_DBNAME=power_of_words_bench python -m benchmarks.bench_storage [--repeat 5]
+"""
+
+import argparse
+import time
+
+from sqlalchemy import create_engine
+
+from benchmarks.common import latency_summary, require_benchmark_database, save_results
+from libs.stub_classifier import EMOTION_LABELS, SENTIMENT_LABELS
+
+
+def json_blob(labels) -> str:
+    """The SQL of the JSON text of the float columns of the labels."""
+    pairs = ", ".join(f"'{label}', {label}" for label in labels)
+    return f"json_build_object({pairs})::text"
+
+
+# table -> (the copy as it is now, the copy with the blobs of migration 006)
+COPIES = {
+    "feeds": (
+        "SELECT * FROM feeds",
+        f"SELECT *, {json_blob(SENTIMENT_LABELS)} AS sentiment_prediction, "
+        f"{json_blob(EMOTION_LABELS)} AS emotion_prediction FROM feeds",
+    ),
+    "feed_sentiments": (
+        "SELECT * FROM feed_sentiments",
+        f"SELECT *, {json_blob(SENTIMENT_LABELS)} AS prediction FROM feed_sentiments",
+    ),
+}
+
+SIZE_QUERY = """
+    SELECT pg_relation_size(%(table)s::regclass) AS heap_bytes,
+           pg_total_relation_size(%(table)s::regclass)
+               - pg_relation_size(%(table)s::regclass) AS toast_bytes,
+           (SELECT avg(pg_column_size(t.*)) FROM {table} AS t) AS mean_row_bytes,
+           (SELECT count(*) FROM {table}) AS row_count
+"""
+
+
+def measure(cursor, table: str, repeat: int) -> dict:
+    """
+    Args:
+        cursor: A psycopg2 cursor of the benchmark database.
+        table (str): The name of the copy.
+        repeat (int): The number of timed scans.
+
+    Returns:
+        dict: The sizes of the table and the durations of its scans.
+    """
+    cursor.execute(SIZE_QUERY.format(table=table), {"table": table})
+    heap_bytes, toast_bytes, mean_row_bytes, row_count = cursor.fetchone()
+
+    scans, fetches = [], []
+    for _ in range(repeat):
+        # Reads every column of every row in the database, detoasting included
+        start_time = time.perf_counter()
+        cursor.execute(f"SELECT sum(length(t::text)) FROM {table} AS t")
+        cursor.fetchone()
+        scans.append(time.perf_counter() - start_time)
+
+        # SELECT * into Python, as the ORM queries of the app do
+        start_time = time.perf_counter()
+        cursor.execute(f"SELECT * FROM {table}")
+        cursor.fetchall()
+        fetches.append(time.perf_counter() - start_time)
+
+    return {
+        "rows": row_count,
+        "heap_bytes": heap_bytes,
+        "toast_bytes": toast_bytes,
+        "mean_row_bytes": round(float(mean_row_bytes or 0), 1),
+        "scan": latency_summary(scans),
+        "fetch": latency_summary(fetches),
+    }
+
+
+def run(repeat: int) -> dict:
+    engine = create_engine(require_benchmark_database())
+    connection = engine.raw_connection()
+    results = {}
+    try:
+        cursor = connection.cursor()
+        for table, (after_query, before_query) in COPIES.items():
+            for variant, query in (("before", before_query), ("after", after_query)):
+                copy = f"bench_{table}_{variant}"
+                cursor.execute(f"DROP TABLE IF EXISTS {copy}")
+                cursor.execute(f"CREATE TABLE {copy} AS {query}")
+                connection.commit()
+                # VACUUM can't run in a transaction
+                connection.autocommit = True
+                cursor.execute(f"VACUUM ANALYZE {copy}")
+                connection.autocommit = False
+
+                result = measure(cursor, copy, repeat)
+                results[f"{table}_{variant}"] = result
+                print(
+                    f"{table:16} {variant:6}: "
+                    f"heap {result['heap_bytes'] / 2**20:8.1f} MiB  "
+                    f"toast {result['toast_bytes'] / 2**20:6.1f} MiB  "
+                    f"row {result['mean_row_bytes']:6.1f} B  "
+                    f"scan p50 {result['scan']['p50_ms']:8.1f} ms  "
+                    f"fetch p50 {result['fetch']['p50_ms']:8.1f} ms"
+                )
+    finally:
+        connection.rollback()
+        connection.autocommit = False
+        cursor = connection.cursor()
+        for table in COPIES:
+            cursor.execute(
+                f"DROP TABLE IF EXISTS bench_{table}_before, bench_{table}_after"
+            )
+        connection.commit()
+        connection.close()
+    return results
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--output", help="path of the JSON results")
+    arguments = arg_parser.parse_args()
+
+    params = {"repeat": arguments.repeat}
+    results = run(**params)
+    save_results("storage", params, results, arguments.output)
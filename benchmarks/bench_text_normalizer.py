@@ -0,0 +1,99 @@
+"""
+Micro-benchmark of the ingest text normalization.
+
+Compares the original per-item code of jobs/daily/rss_reader.py (list stopwords,
+double lowercasing, NLTK word_tokenize) with libs.text_normalizer, and shows the
+fixture titles the regex mode splits differently. That the NLTK mode produces
+exactly the same words is checked by tests/test_text_normalizer.py.
+
+Usage:
+    python -m benchmarks.bench_text_normalizer [--repeat 200]
+"""
+
+import argparse
+import os
+import re
+import timeit
+
+from libs.text_normalizer import (
+    TOKENIZER_NLTK,
+    TOKENIZER_REGEX,
+    extract_words_batch,
+    get_stopwords,
+    normalize_feed_item,
+)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def load_titles() -> list:
+    with open(
+        os.path.join(FIXTURES_DIR, "titles.txt"), encoding="utf-8"
+    ) as titles_file:
+        return [line.strip() for line in titles_file if line.strip()]
+
+
+def legacy_normalize_feed_item(title: str, link: str, stopwords_list: list) -> tuple:
+    """The normalization of process_feed_item() before libs.text_normalizer."""
+    from nltk import word_tokenize
+
+    pattern = re.compile(
+        r"\s*[-+]\s*(fotó(?:kkal)?|videó(?:kkal)?|fotók|videók)?[!.,;]?\s*$|\s+fotó\s*$",
+        re.IGNORECASE,
+    )
+    title = re.sub(pattern, "", title).strip()
+    link = re.sub(r"/rss|/feed", "", link).strip()
+    words = [
+        word.lower()
+        for word in word_tokenize(title)
+        if word.lower() not in stopwords_list and len(word) > 2
+    ]
+    return title, link, words
+
+
+def show_regex_differences(titles: list, stopwords_list: list) -> None:
+    link = "https://telex.hu/rss/belfold/2024/05/03/cikk"
+
+    legacy = [
+        legacy_normalize_feed_item(title, link, stopwords_list) for title in titles
+    ]
+    regex_words = extract_words_batch([item[0] for item in legacy], TOKENIZER_REGEX)
+    same = sum(item[2] == words for item, words in zip(legacy, regex_words))
+    print(f"regex mode: identical words on {same}/{len(titles)} fixture titles")
+    for item, words in zip(legacy, regex_words):
+        if item[2] != words:
+            print(f"  nltk:  {item[2]}\n  regex: {words}")
+
+
+def run(repeat: int) -> None:
+    titles = load_titles()
+    link = "https://telex.hu/rss/belfold/2024/05/03/cikk"
+    stopwords_list = sorted(get_stopwords())
+
+    show_regex_differences(titles, stopwords_list)
+
+    cases = {
+        "legacy (nltk, list stopwords)": lambda: [
+            legacy_normalize_feed_item(title, link, stopwords_list) for title in titles
+        ],
+        "text_normalizer (nltk)": lambda: [
+            normalize_feed_item(title, link, TOKENIZER_NLTK) for title in titles
+        ],
+        "text_normalizer (regex)": lambda: [
+            normalize_feed_item(title, link, TOKENIZER_REGEX) for title in titles
+        ],
+    }
+
+    print(f"\n{len(titles)} titles x {repeat} rounds")
+    baseline = None
+    for name, case in cases.items():
+        seconds = min(timeit.repeat(case, number=repeat, repeat=3))
+        per_title_us = seconds / (repeat * len(titles)) * 1e6
+        baseline = baseline or seconds
+        print(f"{name:32} {per_title_us:8.1f} µs/title  x{baseline / seconds:.1f}")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    arg_parser.add_argument("--repeat", type=int, default=200)
+    run(arg_parser.parse_args().repeat)
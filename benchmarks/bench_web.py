@@ -0,0 +1,131 @@
+"""
+Latency percentiles of the /feeds and /analytics pages and of the analytics
+chart data endpoints for a mix of filters.
+
+The requests go through the Flask test client (no network, no server), so the
+numbers are the time spent in the app: queries, Python and rendering. Load the
+benchmark database with benchmarks.synthetic first; the word filters use the
+most frequent words of the same corpus.
+
+Usage:
+    PSQL_DBNAME=power_of_words_bench python -m benchmarks.bench_web \
+        [--requests 30] [--warmup 3] [--mix feeds_default --mix word_cloud_90_days]
+"""
+
+import argparse
+import time
+from datetime import date, timedelta
+from typing import Dict, List
+from urllib.parse import urlencode
+
+from benchmarks.common import latency_summary, require_benchmark_database, save_results
+from benchmarks.synthetic import SyntheticCorpus
+from run import create_app
+
+
+def filter_mixes(words: List[str], end_date: date) -> Dict[str, str]:
+    """
+    The benchmarked URLs by name.
+
+    Args:
+        words (List[str]): Frequent words of the dataset, for the word filters.
+        end_date (date): The last day of the dataset.
+
+    Returns:
+        Dict[str, str]: name -> URL.
+    """
+
+    def date_range(days: int) -> dict:
+        return {
+            "start_date": f"{end_date - timedelta(days=days - 1)} 00:00:00",
+            "end_date": f"{end_date} 23:59:59",
+        }
+
+    mixes = {
+        "feeds_default": ("/feeds/", {}),
+        "feeds_page_10": ("/feeds/", {"page": 10}),
+        "feeds_30_days": ("/feeds/", date_range(30)),
+        "feeds_sources": ("/feeds/", {**date_range(30), "sources": "1,2"}),
+        "feeds_word": ("/feeds/", {**date_range(30), "words": words[0]}),
+        "feeds_two_words": ("/feeds/", {**date_range(90), "words": ",".join(words)}),
+        "feeds_free_text": ("/feeds/", {**date_range(30), "free_text": words[1]}),
+        "analytics_default": ("/analytics/", {}),
+    }
+    # Each chart of the analytics page fetches its own data
+    charts = ("sentiment_by_source", "sentiment_over_time", "word_cloud")
+    charts += ("sentiment_comparison", "trending_terms", "cooccurring_terms")
+    for chart in charts:
+        path = f"/analytics/data/{chart}"
+        mixes[f"{chart}_default"] = (path, {})
+        mixes[f"{chart}_90_days"] = (path, date_range(90))
+        mixes[f"{chart}_365_days"] = (path, date_range(365))
+        mixes[f"{chart}_word"] = (path, {**date_range(90), "words": words[0]})
+    return {
+        name: f"{path}?{urlencode(params)}" if params else path
+        for name, (path, params) in mixes.items()
+    }
+
+
+def run(requests: int, warmup: int, mixes: List[str], end_date: date, seed: int):
+    require_benchmark_database()
+
+    client = create_app().test_client()
+    urls = filter_mixes(SyntheticCorpus(seed=seed).vocabulary[:2], end_date)
+
+    results = {}
+    for name, url in urls.items():
+        if mixes and name not in mixes:
+            continue
+
+        for _ in range(warmup):
+            client.get(url)
+
+        durations = []
+        for _ in range(requests):
+            start_time = time.perf_counter()
+            response = client.get(url)
+            durations.append(time.perf_counter() - start_time)
+            if response.status_code != 200:
+                raise SystemExit(f"{url}: HTTP {response.status_code}")
+
+        results[name] = {"url": url, **latency_summary(durations)}
+        print(
+            f"{name:32} p50 {results[name]['p50_ms']:9.2f} ms   "
+            f"p95 {results[name]['p95_ms']:9.2f} ms"
+        )
+
+    return results
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    arg_parser.add_argument("--requests", type=int, default=30)
+    arg_parser.add_argument("--warmup", type=int, default=3)
+    arg_parser.add_argument(
+        "--mix", action="append", help="mix to run, can be repeated (default: all)"
+    )
+    arg_parser.add_argument(
+        "--end-date",
+        type=date.fromisoformat,
+        default=date.today(),
+        help="last day of the dataset (default: today)",
+    )
+    arg_parser.add_argument("--seed", type=int, default=1)
+    arg_parser.add_argument("--output", help="path of the JSON results")
+    arguments = arg_parser.parse_args()
+
+    params = {
+        "requests": arguments.requests,
+        "warmup": arguments.warmup,
+        "mixes": arguments.mix or [],
+        "end_date": arguments.end_date.isoformat(),
+        "seed": arguments.seed,
+    }
+    results = run(
+        arguments.requests,
+        arguments.warmup,
+        arguments.mix or [],
+        arguments.end_date,
+        arguments.seed,
+    )
+    save_results("web", params, results, arguments.output)
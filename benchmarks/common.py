@@ -0,0 +1,108 @@
+"""Helpers shared by the benchmarks: latency percentiles and JSON results."""
+
+import json
+import os
+import subprocess
+from datetime import datetime
+from typing import Optional, Sequence
+
+import numpy as np
+
+import config
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCHMARKS_DIR, "results")
+
+# The benchmarks write to the database, they refuse any other name
+BENCHMARK_DBNAME_SUFFIX = "_bench"
+
+
+def require_benchmark_database() -> str:
+    """
+    Checks that the configured database is a benchmark database.
+
+    Returns:
+        str: The database URL.
+    """
+    if not config.pow_db_config.dbname.endswith(BENCHMARK_DBNAME_SUFFIX):
+        raise SystemExit(
+            f"PSQL_DBNAME must end with '{BENCHMARK_DBNAME_SUFFIX}', "
+            f"got '{config.pow_db_config.dbname}'"
+        )
+    return config.pow_db_config_str
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BENCHMARKS_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def latency_summary(seconds: Sequence[float]) -> dict:
+    """
+    Summarizes request or call durations.
+
+    Args:
+        seconds (Sequence[float]): The durations.
+
+    Returns:
+        dict: count, mean, p50, p95 and max in milliseconds.
+    """
+    milliseconds = np.asarray(seconds, dtype=float) * 1000
+    return {
+        "count": int(milliseconds.size),
+        "mean_ms": round(float(milliseconds.mean()), 3),
+        "p50_ms": round(float(np.percentile(milliseconds, 50)), 3),
+        "p95_ms": round(float(np.percentile(milliseconds, 95)), 3),
+        "max_ms": round(float(milliseconds.max()), 3),
+    }
+
+
+def save_results(
+    benchmark: str, params: dict, results: dict, output: Optional[str] = None
+) -> str:
+    """
+    Writes the results of a run as JSON, tagged with the current commit.
+
+    Args:
+        benchmark (str): The name of the benchmark.
+        params (dict): The parameters of the run.
+        results (dict): The measurements.
+        output (str, optional): The path of the file (default is
+            benchmarks/results/<benchmark>-<commit>-<timestamp>.json).
+
+    Returns:
+        str: The path of the written file.
+    """
+    commit = git_commit()
+    started_at = datetime.now()
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(
+            RESULTS_DIR,
+            f"{benchmark}-{commit}-{started_at.strftime('%Y%m%d-%H%M%S')}.json",
+        )
+
+    with open(output, "w", encoding="utf-8") as results_file:
+        json.dump(
+            {
+                "benchmark": benchmark,
+                "commit": commit,
+                "timestamp": started_at.isoformat(timespec="seconds"),
+                "params": params,
+                "results": results,
+            },
+            results_file,
+            ensure_ascii=False,
+            indent=2,
+        )
+
+    print(f"Results written to {output}")
+    return output
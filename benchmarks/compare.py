@@ -0,0 +1,62 @@
+"""
+Compares two JSON results of the same benchmark, e.g. of two commits.
+
+Prints every numeric measurement of both runs with the new/old ratio.
+
+Usage:
+    python -m benchmarks.compare benchmarks/results/web-abc123-....json \
+        benchmarks/results/web-def456-....json
+"""
+
+import argparse
+import json
+from typing import Dict
+
+
+def flatten(results: dict, prefix: str = "") -> Dict[str, float]:
+    """
+    Flattens the numeric leaves of nested results into dotted keys.
+
+    Args:
+        results (dict): The results.
+        prefix (str): The key prefix of the current level.
+
+    Returns:
+        Dict[str, float]: e.g. {"feeds_default.p95_ms": 12.3}.
+    """
+    values = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            values.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            values[f"{prefix}{key}"] = value
+    return values
+
+
+def compare(old_path: str, new_path: str) -> None:
+    with open(old_path, encoding="utf-8") as old_file:
+        old = json.load(old_file)
+    with open(new_path, encoding="utf-8") as new_file:
+        new = json.load(new_file)
+
+    if old["benchmark"] != new["benchmark"]:
+        raise SystemExit(
+            f"Different benchmarks: {old['benchmark']}, {new['benchmark']}"
+        )
+    if old["params"] != new["params"]:
+        print(f"Warning: different params\n  {old['params']}\n  {new['params']}")
+
+    old_values = flatten(old["results"])
+    new_values = flatten(new["results"])
+    print(f"{'':50} {old['commit']:>12} {new['commit']:>12}  ratio")
+    for key in sorted(old_values.keys() & new_values.keys()):
+        ratio = new_values[key] / old_values[key] if old_values[key] else float("nan")
+        print(f"{key:50} {old_values[key]:12.3f} {new_values[key]:12.3f}  x{ratio:.2f}")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    arg_parser.add_argument("old", help="JSON results of the baseline run")
+    arg_parser.add_argument("new", help="JSON results of the new run")
+    arguments = arg_parser.parse_args()
+    compare(arguments.old, arguments.new)
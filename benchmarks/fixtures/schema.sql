@@ -0,0 +1,54 @@
+-- Base schema of the benchmark database: the tables as they were before
+-- migrations/. benchmarks.synthetic applies migrations/*.sql on top of it.
+
+CREATE TABLE sources (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR,
+    web VARCHAR,
+    rss VARCHAR,
+    tags TEXT,
+    name_alias VARCHAR
+);
+
+CREATE TABLE feeds (
+    id SERIAL PRIMARY KEY,
+    title VARCHAR,
+    link VARCHAR,
+    hash VARCHAR,
+    source_id INTEGER REFERENCES sources (id),
+    words TEXT[] DEFAULT '{}',
+    published TIMESTAMP,
+    feed_date DATE,
+    sentiment_prediction TEXT,
+    negative DOUBLE PRECISION,
+    positive DOUBLE PRECISION,
+    neutral DOUBLE PRECISION,
+    emotion_prediction TEXT,
+    anger DOUBLE PRECISION,
+    fear DOUBLE PRECISION,
+    joy DOUBLE PRECISION,
+    sadness DOUBLE PRECISION,
+    love DOUBLE PRECISION,
+    surprise DOUBLE PRECISION,
+    updated TIMESTAMP DEFAULT now(),
+    created TIMESTAMP DEFAULT now(),
+    search_vector TSVECTOR GENERATED ALWAYS AS (to_tsvector('simple', coalesce(title, ''))) STORED
+);
+
+CREATE INDEX feeds_published_idx ON feeds (published);
+CREATE INDEX feeds_feed_date_idx ON feeds (feed_date);
+CREATE INDEX feeds_source_id_idx ON feeds (source_id);
+CREATE INDEX feeds_hash_idx ON feeds (hash, source_id);
+CREATE INDEX feeds_words_idx ON feeds USING GIN (words);
+
+CREATE TABLE feed_sentiments (
+    id SERIAL PRIMARY KEY,
+    feed_id INTEGER NOT NULL REFERENCES feeds (id),
+    model_id INTEGER,
+    prediction TEXT,
+    negative DOUBLE PRECISION NOT NULL,
+    positive DOUBLE PRECISION NOT NULL,
+    neutral DOUBLE PRECISION NOT NULL,
+    updated TIMESTAMP DEFAULT now(),
+    created TIMESTAMP DEFAULT now()
+);
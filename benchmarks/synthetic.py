@@ -0,0 +1,284 @@
+"""
+Generates a reproducible synthetic dataset and loads it into a benchmark database.
+
+The titles are Hungarian-like: the words of the fixture titles plus generated
+words with Hungarian syllables and suffixes, drawn with a Zipf distribution so
+the word frequencies look like real headlines. The loader recreates the base
+schema (fixtures/schema.sql), applies migrations/*.sql and analyzes the tables.
+
+Usage:
+    PSQL_DBNAME=power_of_words_bench python -m benchmarks.synthetic \
+        [--rows 100000] [--sources 8] [--days 365] [--seed 1]
+"""
+
+import argparse
+import glob
+import hashlib
+import itertools
+import json
+import os
+import random
+import re
+import time
+from datetime import date, datetime
+from datetime import time as datetime_time
+from datetime import timedelta
+from typing import Iterator, List
+
+from psycopg2.extras import execute_values
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+
+import config
+from benchmarks.bench_text_normalizer import load_titles
+from benchmarks.common import BENCHMARKS_DIR, require_benchmark_database
+from libs.stub_classifier import EMOTION_LABELS, SENTIMENT_LABELS, stub_scores
+from libs.text_normalizer import TOKENIZER_REGEX, extract_words
+
+MIGRATIONS_DIR = os.path.join(config.ROOT_DIR, "migrations")
+SCHEMA_PATH = os.path.join(BENCHMARKS_DIR, "fixtures", "schema.sql")
+
+# Every table of the schema and of the migrations, dropped before reseeding so the
+# migrations recreate (and backfill) them from the new rows
+TABLES = ("sources", "feeds", "feed_sentiments", "vocabulary", "feed_lsh_buckets")
+TABLES += ("sentiment_models", "source_schedule", "term_days", "term_counts")
+TABLES += ("term_pairs", "feeds_archive", "feeds_archive_state", "source_day_stats")
+
+ONSETS = ["b", "cs", "d", "f", "g", "gy", "h", "j", "k", "l", "m", "n", "ny", "p"]
+ONSETS += ["r", "s", "sz", "t", "ty", "v", "z", "zs", ""]
+VOWELS = ["a", "á", "e", "é", "i", "í", "o", "ó", "ö", "ő", "u", "ú", "ü", "ű"]
+CODAS = ["", "", "l", "n", "r", "s", "sz", "t", "k", "g", "m", "z", "ny"]
+SUFFIXES = ["", "", "", "ban", "ben", "nak", "nek", "ról", "ről", "val", "vel"]
+SUFFIXES += ["ok", "ek", "ot", "et", "hoz", "ság", "ség", "i", "os", "t"]
+
+# Sprinkled between the content words, and used as the stopwords of the dataset
+FUNCTION_WORDS = ("a", "az", "egy", "és", "hogy", "nem", "is", "meg", "már", "még")
+FUNCTION_WORDS += ("után", "ellen", "szerint", "miatt", "ezért", "mint", "de")
+
+SOURCE_NAMES = ("444.hu", "telex.hu", "24.hu", "origo.hu", "hirado.hu")
+SOURCE_NAMES += ("magyarnemzet.hu", "index.hu")
+
+RAW_TITLE_SUFFIXES = (" - videó", " - fotók", " + videó", " - fotókkal")
+
+INSERT_BATCH_SIZE = 5000
+
+FEED_COLUMNS = (
+    "title, link, hash, source_id, words, published, feed_date, "
+    "sentiment_prediction, negative, positive, neutral, "
+    "emotion_prediction, anger, fear, joy, sadness, love, surprise"
+)
+
+
+class SyntheticCorpus:
+    """A fixed vocabulary with Zipf word frequencies and a title generator."""
+
+    def __init__(self, vocabulary_size: int = 20000, seed: int = 1):
+        """
+        Args:
+            vocabulary_size (int): The number of distinct content words.
+            seed (int): The seed of the generated words.
+        """
+        rng = random.Random(seed)
+
+        words = []
+        for title in load_titles():
+            for word in re.findall(r"[^\W\d_]{3,}", title.lower()):
+                if word not in FUNCTION_WORDS and word not in words:
+                    words.append(word)
+
+        known = set(words)
+        while len(words) < vocabulary_size:
+            word = "".join(
+                rng.choice(ONSETS) + rng.choice(VOWELS) + rng.choice(CODAS)
+                for _ in range(rng.randint(2, 3))
+            ) + rng.choice(SUFFIXES)
+            if len(word) >= 3 and word not in known:
+                known.add(word)
+                words.append(word)
+
+        self.vocabulary: List[str] = words[:vocabulary_size]
+        self.cum_weights = list(
+            itertools.accumulate(
+                1 / (rank + 1) ** 1.1 for rank in range(len(self.vocabulary))
+            )
+        )
+
+    def title(self, rng: random.Random, raw: bool = False) -> str:
+        """
+        Generates a title.
+
+        Args:
+            rng (random.Random): The random generator of the caller.
+            raw (bool): Sometimes add the photo/video suffixes of the RSS titles.
+
+        Returns:
+            str: The title.
+        """
+        words = rng.choices(
+            self.vocabulary, cum_weights=self.cum_weights, k=rng.randint(5, 11)
+        )
+        tokens = []
+        # A frequent word is drawn several times, but used once per title
+        for word in dict.fromkeys(words):
+            if rng.random() < 0.3:
+                tokens.append(rng.choice(FUNCTION_WORDS))
+            tokens.append(word)
+
+        title = " ".join(tokens)
+        title = title[0].upper() + title[1:]
+        if raw and rng.random() < 0.05:
+            title += rng.choice(RAW_TITLE_SUFFIXES)
+        return title
+
+
+def source_names(sources: int) -> List[str]:
+    """Names of real sources, then generated ones."""
+    names = list(SOURCE_NAMES)[:sources]
+    return names + [f"forras{index}.hu" for index in range(len(names) + 1, sources + 1)]
+
+
+def generate_feeds(
+    corpus: SyntheticCorpus,
+    rows: int,
+    sources: int,
+    days: int,
+    end_date: date,
+    seed: int = 1,
+) -> Iterator[tuple]:
+    """
+    Generates feed rows, uniformly spread over the sources and the date span.
+
+    Args:
+        corpus (SyntheticCorpus): The corpus of the titles.
+        rows (int): The number of feeds.
+        sources (int): The number of sources, the source ids are 1..sources.
+        days (int): The number of days before end_date the feeds span.
+        end_date (date): The last day of the span.
+        seed (int): The seed of the generated rows.
+
+    Yields:
+        tuple: The columns of fixtures/schema.sql feeds, in FEED_COLUMNS order.
+    """
+    rng = random.Random(seed)
+    names = source_names(sources)
+    span_seconds = days * 24 * 3600
+    end = datetime.combine(end_date, datetime_time.max).replace(microsecond=0)
+
+    for index in range(rows):
+        source_id = rng.randint(1, sources)
+        title = corpus.title(rng)
+        published = end - timedelta(seconds=rng.randrange(span_seconds))
+        link = f"https://{names[source_id - 1]}/{published:%Y/%m/%d}/cikk-{index}"
+        sentiment = stub_scores(title, SENTIMENT_LABELS)
+        emotion = stub_scores(title, EMOTION_LABELS)
+
+        yield (
+            title,
+            link,
+            hashlib.md5(link.encode("utf-8")).hexdigest(),
+            source_id,
+            extract_words(title, TOKENIZER_REGEX, frozenset(FUNCTION_WORDS)),
+            published,
+            published.date(),
+            json.dumps(sentiment),
+            sentiment["negative"],
+            sentiment["positive"],
+            sentiment["neutral"],
+            json.dumps(emotion),
+            *(emotion[label] for label in EMOTION_LABELS),
+        )
+
+
+def load_database(
+    engine: Engine,
+    corpus: SyntheticCorpus,
+    rows: int,
+    sources: int,
+    days: int,
+    end_date: date,
+    seed: int = 1,
+) -> None:
+    """
+    Recreates the tables of the benchmark database and fills them.
+
+    Args:
+        engine (Engine): The engine of the benchmark database.
+        corpus (SyntheticCorpus): The corpus of the titles.
+        rows (int): The number of feeds.
+        sources (int): The number of sources.
+        days (int): The number of days the feeds span.
+        end_date (date): The last day of the span.
+        seed (int): The seed of the generated rows.
+    """
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(f"DROP TABLE IF EXISTS {', '.join(TABLES)} CASCADE")
+        with open(SCHEMA_PATH, encoding="utf-8") as schema_file:
+            cursor.execute(schema_file.read())
+
+        execute_values(
+            cursor,
+            "INSERT INTO sources (id, name, web, rss) VALUES %s",
+            [
+                (source_id, name, f"https://{name}", f"https://{name}/rss")
+                for source_id, name in enumerate(source_names(sources), start=1)
+            ],
+        )
+        cursor.execute("SELECT setval('sources_id_seq', %s)", (sources,))
+
+        start_time = time.time()
+        feeds = generate_feeds(corpus, rows, sources, days, end_date, seed)
+        inserted = 0
+        while batch := list(itertools.islice(feeds, INSERT_BATCH_SIZE)):
+            execute_values(
+                cursor,
+                f"INSERT INTO feeds ({FEED_COLUMNS}) VALUES %s",
+                batch,
+                page_size=len(batch),
+            )
+            inserted += len(batch)
+            print(f"\rfeeds: {inserted}/{rows}", end="", flush=True)
+        print(f", {time.time() - start_time:.1f}s")
+
+        for migration in sorted(glob.glob(os.path.join(MIGRATIONS_DIR, "*.sql"))):
+            print(f"applying {os.path.basename(migration)}")
+            with open(migration, encoding="utf-8") as migration_file:
+                cursor.execute(migration_file.read())
+
+        connection.commit()
+        cursor.execute("ANALYZE")
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def main(argv=None) -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    arg_parser.add_argument("--rows", type=int, default=100000)
+    arg_parser.add_argument("--sources", type=int, default=8)
+    arg_parser.add_argument("--days", type=int, default=365)
+    arg_parser.add_argument(
+        "--end-date",
+        type=date.fromisoformat,
+        default=date.today(),
+        help="last day of the feeds (default: today)",
+    )
+    arg_parser.add_argument("--vocabulary-size", type=int, default=20000)
+    arg_parser.add_argument("--seed", type=int, default=1)
+    arguments = arg_parser.parse_args(argv)
+
+    engine = create_engine(require_benchmark_database())
+    load_database(
+        engine,
+        SyntheticCorpus(arguments.vocabulary_size, arguments.seed),
+        rows=arguments.rows,
+        sources=arguments.sources,
+        days=arguments.days,
+        end_date=arguments.end_date,
+        seed=arguments.seed,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -19,15 +19,36 @@ with contextlib.suppress(FileNotFoundError):
     dotenv_path = os.path.join(ROOT_DIR, ".env")
     load_dotenv(dotenv_path)
 
-DEBUG = True
+DEBUG = os.getenv("DEBUG", default="0") == "1"
 HOST = "0.0.0.0"
 PORT = 5000
 
+# Production serving (gunicorn.conf.py): worker processes and threads per worker
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", default=2 * (os.cpu_count() or 1) + 1))
+WEB_THREADS = int(os.getenv("WEB_THREADS", default=4))
+# Postgres connections all the web workers may hold together: WEB_WORKERS *
+# (DB_POOL_SIZE + DB_MAX_OVERFLOW). Keep it below max_connections (100 by
+# default) minus the connections of the jobs and of psql sessions.
+DB_CONNECTION_BUDGET = int(os.getenv("DB_CONNECTION_BUDGET", default=80))
+# Connection pool of each worker, the warmup opens DB_POOL_SIZE connections. By
+# default one connection per request thread, within the worker's share of the
+# budget; an explicit DB_POOL_SIZE or DB_MAX_OVERFLOW is used as is.
+DB_WORKER_CONNECTIONS = max(DB_CONNECTION_BUDGET // WEB_WORKERS, 1)
+DB_POOL_SIZE = int(
+    os.getenv("DB_POOL_SIZE", default=min(WEB_THREADS, DB_WORKER_CONNECTIONS))
+)
+DB_MAX_OVERFLOW = int(
+    os.getenv(
+        "DB_MAX_OVERFLOW",
+        default=min(WEB_THREADS, max(DB_WORKER_CONNECTIONS - DB_POOL_SIZE, 0)),
+    )
+)
+
 pow_db_config = DBConfig(
     dialect="postgresql",
     username=os.getenv("PSQL_USER", default="root"),
     password=os.getenv("PSQL_PASSWORD", default="my_secret_password"),
-    dbname="power_of_words",
+    dbname=os.getenv("PSQL_DBNAME", default="power_of_words"),
     host=os.getenv("PSQL_HOST", default="localhost"),
     port=int(os.getenv("PSQL_PORT", default=5432)),
 )
@@ -35,7 +56,7 @@ pow_db_config = DBConfig(
 POW_DB_CONFIG = {
     "user": os.getenv("PSQL_USER", default="root"),
     "password": os.getenv("PSQL_PASSWORD", default="my_secret_password"),
-    "dbname": "power_of_words",
+    "dbname": os.getenv("PSQL_DBNAME", default="power_of_words"),
     "host": os.getenv("PSQL_HOST", default="localhost"),
     "port": int(os.getenv("PSQL_PORT", default=5432)),
     "minconn": 1,
@@ -43,21 +64,97 @@ POW_DB_CONFIG = {
 }
 
 pow_db_config_str = (
-    "postgresql+psycopg2://{db_username}:{db_password}@{db_host}/{db_name}".format(
-        db_username=pow_db_config.username,
-        db_password=pow_db_config.password,
-        db_host=pow_db_config.host,
-        db_name=pow_db_config.dbname,
-    )
+    "postgresql+psycopg2://{db_username}:{db_password}@{db_host}:{db_port}/{db_name}"
+).format(
+    db_username=pow_db_config.username,
+    db_password=pow_db_config.password,
+    db_host=pow_db_config.host,
+    db_port=pow_db_config.port,
+    db_name=pow_db_config.dbname,
 )
 
-# TODO: should fetch from DB
-SOURCES = {
-    1: "444.hu",
-    2: "telex.hu",
-    3: "24.hu",
-    4: "origo.hu",
-    5: "hirado.hu",
-    6: "magyarnemzet.hu",
-    7: "index.hu",
-}
+# Per-run metrics of the ingest job: JSON lines history and Prometheus text file
+INGEST_METRICS_JSONL = os.getenv("INGEST_METRICS_JSONL", default="ingest_metrics.jsonl")
+INGEST_METRICS_PROM = os.getenv("INGEST_METRICS_PROM", default="ingest_metrics.prom")
+
+# Tokenizer of the ingest job: "nltk" (word_tokenize, needs punkt) or "regex"
+TOKENIZER = os.getenv("TOKENIZER", default="nltk")
+
+# Scheduled ingest (jobs.daily.rss_reader): bounds of the adaptive poll interval
+# of a source in seconds, the new items a poll should find, the sources a worker
+# leases at once and for how long
+SCHEDULE_MIN_INTERVAL = int(os.getenv("SCHEDULE_MIN_INTERVAL", default=300))
+SCHEDULE_MAX_INTERVAL = int(os.getenv("SCHEDULE_MAX_INTERVAL", default=6 * 3600))
+SCHEDULE_TARGET_NEW_ITEMS = int(os.getenv("SCHEDULE_TARGET_NEW_ITEMS", default=3))
+SCHEDULE_CLAIM_BATCH = int(os.getenv("SCHEDULE_CLAIM_BATCH", default=5))
+SCHEDULE_LEASE_SECONDS = int(os.getenv("SCHEDULE_LEASE_SECONDS", default=600))
+
+# Seconds to wait for a feed, and the hours an entry may be published before the
+# newest entry of the previous poll and still be processed
+FEED_FETCH_TIMEOUT = int(os.getenv("FEED_FETCH_TIMEOUT", default=30))
+FEED_LATE_ENTRY_HOURS = int(os.getenv("FEED_LATE_ENTRY_HOURS", default=24))
+
+# Sentiment model (sentiment_models.id) of the ingest job, its scores are the
+# ones of the feeds columns
+SENTIMENT_MODEL_ID = int(os.getenv("SENTIMENT_MODEL_ID", default=1))
+# Titles per batch of the scoring runner (jobs.score_feeds)
+SCORING_BATCH_SIZE = int(os.getenv("SCORING_BATCH_SIZE", default=32))
+# Tokenized titles kept in memory for rescoring runs
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", default=200_000))
+
+# Inference service (python -m libs.inference_service) of the headline scoring
+# page: its URL, micro-batch policy and the seconds a request waits for results
+INFERENCE_SERVICE_URL = os.getenv(
+    "INFERENCE_SERVICE_URL", default="http://127.0.0.1:5001"
+)
+INFERENCE_MAX_BATCH = int(os.getenv("INFERENCE_MAX_BATCH", default=32))
+INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", default=10))
+INFERENCE_TIMEOUT = float(os.getenv("INFERENCE_TIMEOUT", default=10))
+
+# In-memory columnar snapshot of the last N days for the analytics page (0 disables it)
+ANALYTICS_SNAPSHOT_DAYS = int(os.getenv("ANALYTICS_SNAPSHOT_DAYS", default=0))
+# Seconds between two checks for newly ingested feeds
+ANALYTICS_SNAPSHOT_TTL = int(os.getenv("ANALYTICS_SNAPSHOT_TTL", default=60))
+# Seconds the browser reuses the JSON data of an analytics chart without asking
+ANALYTICS_CHART_MAX_AGE = int(os.getenv("ANALYTICS_CHART_MAX_AGE", default=60))
+# Most points of the sentiment over time chart: daily, else weekly, else monthly buckets
+ANALYTICS_MAX_POINTS = int(os.getenv("ANALYTICS_MAX_POINTS", default=120))
+
+# Trending terms: the days of the current period, the number of earlier periods
+# of the baseline, and the fewest feeds of a term in the current period
+TRENDING_DAYS = int(os.getenv("TRENDING_DAYS", default=7))
+TRENDING_BASELINE_PERIODS = int(os.getenv("TRENDING_BASELINE_PERIODS", default=4))
+TRENDING_MIN_COUNT = int(os.getenv("TRENDING_MIN_COUNT", default=5))
+# Word pairs of a day seen in fewer feeds are pruned once the day is this old
+TERM_PAIR_MIN_SUPPORT = int(os.getenv("TERM_PAIR_MIN_SUPPORT", default=2))
+TERM_PAIR_PRUNE_AFTER_DAYS = int(os.getenv("TERM_PAIR_PRUNE_AFTER_DAYS", default=2))
+
+# Feeds older than this many days are moved to feeds_archive by jobs.archive_feeds.
+# The analytics snapshot copies feeds alone, the ranges reaching the archive skip it.
+ARCHIVE_RETENTION_DAYS = int(os.getenv("ARCHIVE_RETENTION_DAYS", default=90))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", default=5000))
+# Seconds between two checks of the archive boundary by the web workers
+ARCHIVE_BOUNDARY_TTL = int(os.getenv("ARCHIVE_BOUNDARY_TTL", default=60))
+
+# Near-duplicate stories: minimum estimated title similarity, look-back window,
+# and the similarity above which the scores of the matched feed are reused
+STORY_SIMILARITY = float(os.getenv("STORY_SIMILARITY", default=0.5))
+STORY_WINDOW_DAYS = int(os.getenv("STORY_WINDOW_DAYS", default=3))
+STORY_REUSE_SIMILARITY = float(os.getenv("STORY_REUSE_SIMILARITY", default=0.9))
+
+# Opt-in request profiling: per-phase timings, slow query log and sampling profiler
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", default="0") == "1"
+# Queries slower than this (ms) are logged with their parameters and EXPLAIN plan
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", default=200))
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", default="1") == "1"
+# Endpoint (e.g. "charts.index") whose requests are sampled into folded stacks
+SAMPLING_PROFILER_ENDPOINT = os.getenv("SAMPLING_PROFILER_ENDPOINT", default="")
+SAMPLING_PROFILER_INTERVAL_MS = float(
+    os.getenv("SAMPLING_PROFILER_INTERVAL_MS", default=5)
+)
+PROFILES_DIR = os.path.join(ROOT_DIR, "profiles")
+
+# Seconds between two checks of the sources table for added or renamed sources
+SOURCES_REFRESH_TTL = int(os.getenv("SOURCES_REFRESH_TTL", default=60))
+# Seconds a word missing from the vocabulary is answered as unknown without a query
+VOCABULARY_MISS_TTL = int(os.getenv("VOCABULARY_MISS_TTL", default=60))
@@ -0,0 +1,25 @@
+# Production serving: gunicorn -c gunicorn.conf.py
+#
+# The app is created and warmed up once in the master (templates, vocabulary,
+# sources, analytics snapshot), then forked; every worker opens its own connections.
+
+# Not "import config": gunicorn would read it as its own config setting
+from config import HOST, PORT, WEB_THREADS, WEB_WORKERS
+from libs.warmup import warm_up_pool
+
+wsgi_app = "run:create_app(warmup=True)"
+preload_app = True
+
+bind = f"{HOST}:{PORT}"
+workers = WEB_WORKERS
+threads = WEB_THREADS
+worker_class = "gthread"
+timeout = 60
+
+
+def post_fork(server, worker):
+    try:
+        warm_up_pool(worker.app.wsgi())
+    except Exception as error:
+        # The pool fills up on demand then, the worker can still serve
+        server.log.warning(f"Connection pool warmup failed: {error}")
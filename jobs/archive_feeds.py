@@ -0,0 +1,115 @@
+import argparse
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models.feeds_archive import FeedsArchive
+from config import (
+    ARCHIVE_BATCH_SIZE,
+    ARCHIVE_BOUNDARY_TTL,
+    ARCHIVE_RETENTION_DAYS,
+    pow_db_config_str,
+)
+from libs.database import initialize_database, session_scope
+
+COLUMNS = ", ".join(column.name for column in FeedsArchive.__table__.columns)
+
+# Moves a batch of the oldest feeds in one statement: a feed is always in exactly
+# one of the tables. Appended in feed_date order, for the BRIN index of the archive.
+MOVE_BATCH_QUERY = f"""
+    WITH moved AS (
+        DELETE FROM feeds
+        WHERE id IN (
+            SELECT id
+            FROM feeds
+            WHERE feed_date < :before
+            ORDER BY feed_date, id
+            LIMIT :batch_size
+        )
+        RETURNING {COLUMNS}
+    )
+    INSERT INTO feeds_archive ({COLUMNS})
+    SELECT {COLUMNS} FROM moved ORDER BY feed_date, id
+"""
+
+MOVE_BOUNDARY_QUERY = """
+    UPDATE feeds_archive_state
+    SET archived_before = GREATEST(archived_before, CAST(:before AS date))
+    WHERE archived_before IS DISTINCT FROM GREATEST(archived_before, CAST(:before AS date))
+    RETURNING archived_before
+"""
+
+
+def move_boundary(session: Session, before: date) -> bool:
+    """
+    Moves the archive boundary forward to a day, never back.
+
+    Args:
+        session (Session): The SQLAlchemy session.
+        before (date): The feeds before this day are to be archived.
+
+    Returns:
+        bool: True if the boundary moved.
+    """
+    return (
+        session.execute(text(MOVE_BOUNDARY_QUERY), {"before": before}).first()
+        is not None
+    )
+
+
+def archive_batch(session: Session, before: date, batch_size: int) -> int:
+    """
+    Moves the oldest feeds before a day from feeds to feeds_archive.
+
+    Args:
+        session (Session): The SQLAlchemy session.
+        before (date): The feeds before this day are archived.
+        batch_size (int): The most feeds to move.
+
+    Returns:
+        int: The number of moved feeds.
+    """
+    result = session.execute(
+        text(MOVE_BATCH_QUERY), {"before": before, "batch_size": batch_size}
+    )
+    return result.rowcount
+
+
+def main(argv=None) -> None:
+    arg_parser = argparse.ArgumentParser(
+        description="Move the feeds older than the retention window to the archive."
+    )
+    arg_parser.add_argument(
+        "--retention-days", type=int, default=ARCHIVE_RETENTION_DAYS
+    )
+    arg_parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    arguments = arg_parser.parse_args(argv)
+
+    initialize_database(pow_db_config_str)
+    before = date.today() - timedelta(days=arguments.retention_days)
+
+    with session_scope() as session:
+        moved_boundary = move_boundary(session, before)
+
+    if moved_boundary:
+        # The web workers read the boundary at most ARCHIVE_BOUNDARY_TTL seconds
+        # late; until they all have the new one, no feed may leave feeds
+        print(f"Archive boundary moved to {before}, waiting {ARCHIVE_BOUNDARY_TTL}s")
+        time.sleep(ARCHIVE_BOUNDARY_TTL)
+
+    archived = 0
+    while True:
+        # One transaction per batch, the locks and the WAL of a batch stay small
+        with session_scope() as session:
+            batch = archive_batch(session, before, arguments.batch_size)
+        if not batch:
+            break
+        archived += batch
+        print(f"\r{archived} feeds archived", end="", flush=True)
+    print(f"\n{archived} feeds before {before} archived")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,52 +1,136 @@
-from datetime import datetime
+import argparse
+import time
+from typing import Iterator, List, Tuple
 
-from sqlalchemy import text, update
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
 
-from config import pow_db_config
-from libs.db.db_client import SQLDBClient
-from libs.db.db_mapping import SQLDBMapping
-from libs.functions import remove_photo_video
+from config import pow_db_config_str
+from jobs.cleaners.rules import (
+    CleanerRule,
+    PythonTitleRule,
+    RegexTitleRule,
+    WordPruneRule,
+)
+from libs.text_normalizer import clean_title
 
-db_client = SQLDBClient(db_config=pow_db_config)
+DEFAULT_CHUNK_SIZE = 10000
 
-TITLES_WITH_FOTO_VIDEO = """
-select id, title, words, source_id from feeds where title like '%- videó%' or title like '%- fotó%';
-"""
+RULES: List[CleanerRule] = [
+    PythonTitleRule(
+        name="photo_video_title",
+        description="Remove the '- videó', '- fotók', ... suffixes from titles",
+        condition="title ~* '(fotó|videó)' OR title <> btrim(title)",
+        fix=clean_title,
+    ),
+    RegexTitleRule(
+        name="title_whitespace",
+        description="Collapse repeated whitespace in titles",
+        pattern=r"\s{2,}",
+        replacement=" ",
+    ),
+    WordPruneRule(
+        name="photo_video_words",
+        description="Remove photo/video words from the words of the feeds",
+        words=("videó", "videók", "fotó", "fotók", "videókkal", "fotókkal"),
+    ),
+    WordPruneRule(
+        name="numeric_words",
+        description="Remove numbers from the words of the feeds",
+        pattern=r"^[0-9]+([.,:-][0-9]+)*\.?$",
+    ),
+]
 
-db_mapping = SQLDBMapping(db_client=db_client)
-Feeds = db_mapping.db_classes.feeds
 
+def id_chunks(session: Session, chunk_size: int) -> Iterator[Tuple[int, int]]:
+    """
+    Splits the id range of the feeds table into chunks.
 
-def remove_numbers_from_words():
-    pass
+    Args:
+        session (Session): The SQLAlchemy session.
+        chunk_size (int): The number of ids per chunk.
 
+    Yields:
+        Tuple[int, int]: The first and last id of each chunk.
+    """
+    first_id, last_id = session.execute(
+        text("SELECT min(id), max(id) FROM feeds")
+    ).one()
+    if first_id is None:
+        return
 
-def remove_foto_video_text():
-    with db_client.get_db_session() as session:
-        result = session.execute(text(TITLES_WITH_FOTO_VIDEO)).fetchall()
-    updated_ids = []
-    words_pattern = ["videó", "videók", "fotó", "fotók", "videókkal", "fotókkal"]
-    if result:
-        rows = list(result)
-        for row in rows:
-            feed_id = row[0]
-            cleaned_title = remove_photo_video(row[1]).strip()
-            cleaned_words = [item for item in row[2] if item not in words_pattern]
+    for chunk_start in range(first_id, last_id + 1, chunk_size):
+        yield chunk_start, min(chunk_start + chunk_size - 1, last_id)
 
-            stmt = (
-                update(Feeds)
-                .where(Feeds.id == feed_id)
-                .values(
-                    title=cleaned_title, words=cleaned_words, updated=datetime.now()
-                )
-            )
 
-            session.execute(stmt)
-            session.commit()
-            updated_ids.append(feed_id)
+def run_rule(
+    engine: Engine,
+    rule: CleanerRule,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    dry_run: bool = False,
+) -> int:
+    """
+    Applies a rule chunk by chunk, committing after every chunk.
+
+    Args:
+        engine (Engine): The database engine.
+        rule (CleanerRule): The rule to apply.
+        chunk_size (int): The number of ids per UPDATE.
+        dry_run (bool): Only count the candidate feeds.
+
+    Returns:
+        int: The number of candidate feeds (dry run) or updated feeds.
+    """
+    with Session(engine) as session:
+        candidates = rule.count(session)
+        chunks = list(id_chunks(session, chunk_size))
+
+    print(f"{rule.name}: {candidates} candidate feeds ({rule.description})")
+    if dry_run or not candidates:
+        return candidates
+
+    start_time = time.time()
+    updated = 0
+    for chunk_index, (first_id, last_id) in enumerate(chunks, start=1):
+        with Session(engine) as session, session.begin():
+            updated += rule.apply(session, first_id, last_id)
 
-    return updated_ids
+        print(
+            f"\r{rule.name}: chunk {chunk_index}/{len(chunks)}, "
+            f"{updated} feeds updated, {time.time() - start_time:.1f}s",
+            end="",
+            flush=True,
+        )
+    print()
+
+    return updated
+
+
+def main(argv=None) -> None:
+    arg_parser = argparse.ArgumentParser(description="Clean the feeds table.")
+    arg_parser.add_argument(
+        "--rule",
+        action="append",
+        choices=[rule.name for rule in RULES],
+        help="rule to run, can be repeated (default: all rules)",
+    )
+    arg_parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    arg_parser.add_argument(
+        "--dry-run", action="store_true", help="only count the candidate feeds"
+    )
+    arguments = arg_parser.parse_args(argv)
+
+    engine = create_engine(pow_db_config_str)
+    for rule in RULES:
+        if arguments.rule is None or rule.name in arguments.rule:
+            run_rule(
+                engine,
+                rule,
+                chunk_size=arguments.chunk_size,
+                dry_run=arguments.dry_run,
+            )
 
 
-res = remove_foto_video_text()
-print(res)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional, Tuple
+
+from sqlalchemy import Integer, Text, column, func, text, update, values
+from sqlalchemy.orm import Session
+
+from app.models.feeds import Feeds
+
+
+@dataclass(frozen=True)
+class CleanerRule(ABC):
+    """
+    A data fix over the feeds table, declared once and applied set-based.
+
+    Subclasses describe which rows need the fix (candidates()) and how to fix a
+    range of ids in one statement (apply()).
+    """
+
+    name: str
+    description: str = ""
+
+    @abstractmethod
+    def candidates(self) -> str:
+        """SQL condition selecting the feeds the rule changes."""
+
+    def params(self) -> Dict:
+        """Bind parameters of candidates() and of the update."""
+        return {}
+
+    def count(self, session: Session) -> int:
+        """
+        Counts the feeds the rule would change (dry run).
+
+        Args:
+            session (Session): The SQLAlchemy session.
+
+        Returns:
+            int: The number of candidate feeds.
+        """
+        stmt = text(f"SELECT count(*) FROM feeds WHERE {self.candidates()}")
+        return session.execute(stmt, self.params()).scalar()
+
+    @abstractmethod
+    def apply(self, session: Session, first_id: int, last_id: int) -> int:
+        """
+        Fixes the candidate feeds with first_id <= id <= last_id.
+
+        Args:
+            session (Session): The SQLAlchemy session.
+            first_id (int): The first id of the chunk.
+            last_id (int): The last id of the chunk.
+
+        Returns:
+            int: The number of updated feeds.
+        """
+
+
+@dataclass(frozen=True)
+class RegexTitleRule(CleanerRule):
+    """Rewrites titles with a PostgreSQL regexp_replace() in a single UPDATE per chunk."""
+
+    pattern: str = ""
+    replacement: str = ""
+    flags: str = "g"
+
+    def candidates(self) -> str:
+        operator = "~*" if "i" in self.flags else "~"
+        return f"title {operator} :pattern"
+
+    def params(self) -> Dict:
+        return {
+            "pattern": self.pattern,
+            "replacement": self.replacement,
+            "flags": self.flags,
+        }
+
+    def apply(self, session: Session, first_id: int, last_id: int) -> int:
+        stmt = text(
+            f"""
+            UPDATE feeds
+            SET title = btrim(regexp_replace(title, :pattern, :replacement, :flags)),
+                updated = now()
+            WHERE id BETWEEN :first_id AND :last_id AND ({self.candidates()})
+            """
+        )
+        params = {**self.params(), "first_id": first_id, "last_id": last_id}
+        return session.execute(stmt, params).rowcount
+
+
+@dataclass(frozen=True)
+class WordPruneRule(CleanerRule):
+    """
+    Removes the ids of words from feeds.word_ids and from the daily term stats,
+    the words listed explicitly or matching a PostgreSQL regular expression.
+    """
+
+    words: Tuple[str, ...] = ()
+    pattern: Optional[str] = None
+
+    def _word_condition(self, word_column: str) -> str:
+        conditions = []
+        if self.words:
+            conditions.append(f"{word_column} = ANY(:words)")
+        if self.pattern:
+            conditions.append(f"{word_column} ~ :pattern")
+        return " OR ".join(conditions) or "false"
+
+    def candidates(self) -> str:
+        # The vocabulary is matched once, the overlap uses the GIN index of word_ids
+        return (
+            "word_ids && ARRAY(SELECT v.id FROM vocabulary v "
+            f"WHERE {self._word_condition('v.word')})"
+        )
+
+    def params(self) -> Dict:
+        return {"words": list(self.words), "pattern": self.pattern}
+
+    def apply(self, session: Session, first_id: int, last_id: int) -> int:
+        # The daily term stats (migrations/007_term_stats.sql) lose the pruned words
+        # of the chunk in the same statement: every feed is subtracted from the
+        # counts of its pruned words and of the pairs with one, the rows reaching 0
+        # are deleted. The CTEs all read the rows as they were before the statement.
+        stmt = text(
+            f"""
+            WITH pruned AS (
+                SELECT v.id FROM vocabulary v WHERE {self._word_condition('v.word')}
+            ),
+            chunk AS (
+                SELECT id, feed_date, word_ids AS old_ids FROM feeds
+                WHERE id BETWEEN :first_id AND :last_id AND ({self.candidates()})
+            ),
+            updated AS (
+                UPDATE feeds
+                SET word_ids = ARRAY(
+                        SELECT i.id
+                        FROM unnest(feeds.word_ids) WITH ORDINALITY AS i(id, ord)
+                        WHERE i.id NOT IN (SELECT id FROM pruned)
+                        ORDER BY i.ord
+                    ),
+                    updated = now()
+                FROM chunk
+                WHERE feeds.id = chunk.id
+                RETURNING feeds.id
+            ),
+            feed_words AS (
+                SELECT chunk.id AS feed_id, chunk.feed_date AS day, w.word_id,
+                       w.word_id IN (SELECT id FROM pruned) AS pruned
+                FROM chunk, LATERAL (SELECT DISTINCT unnest(chunk.old_ids) AS word_id) AS w
+                WHERE chunk.feed_date IS NOT NULL AND w.word_id IS NOT NULL
+            ),
+            removed_counts AS (
+                SELECT day, word_id, count(*) AS feeds
+                FROM feed_words
+                WHERE pruned
+                GROUP BY day, word_id
+            ),
+            removed_pairs AS (
+                SELECT a.day, a.word_id, b.word_id AS other_id, count(*) AS feeds
+                FROM feed_words a
+                JOIN feed_words b ON b.feed_id = a.feed_id AND a.word_id < b.word_id
+                WHERE a.pruned OR b.pruned
+                GROUP BY a.day, a.word_id, b.word_id
+            ),
+            deleted_counts AS (
+                DELETE FROM term_counts t
+                USING removed_counts r
+                WHERE t.day = r.day AND t.word_id = r.word_id AND t.count <= r.feeds
+            ),
+            updated_counts AS (
+                UPDATE term_counts t
+                SET count = t.count - r.feeds
+                FROM removed_counts r
+                WHERE t.day = r.day AND t.word_id = r.word_id AND t.count > r.feeds
+            ),
+            deleted_pairs AS (
+                DELETE FROM term_pairs t
+                USING removed_pairs r
+                WHERE t.day = r.day AND t.word_id = r.word_id
+                  AND t.other_id = r.other_id AND t.count <= r.feeds
+            ),
+            updated_pairs AS (
+                UPDATE term_pairs t
+                SET count = t.count - r.feeds
+                FROM removed_pairs r
+                WHERE t.day = r.day AND t.word_id = r.word_id
+                  AND t.other_id = r.other_id AND t.count > r.feeds
+            )
+            SELECT count(*) FROM updated
+            """
+        )
+        params = {**self.params(), "first_id": first_id, "last_id": last_id}
+        return session.execute(stmt, params).scalar()
+
+
+@dataclass(frozen=True)
+class PythonTitleRule(CleanerRule):
+    """
+    Rewrites titles with a Python function, for fixes SQL can't express exactly.
+
+    The candidates of a chunk are fixed in Python and written back with one
+    UPDATE ... FROM (VALUES ...) statement.
+    """
+
+    condition: str = "true"
+    fix: Callable[[str], str] = field(default=str.strip)
+    condition_params: Dict = field(default_factory=dict)
+
+    def candidates(self) -> str:
+        return self.condition
+
+    def params(self) -> Dict:
+        return self.condition_params
+
+    def apply(self, session: Session, first_id: int, last_id: int) -> int:
+        stmt = text(
+            f"""
+            SELECT id, title FROM feeds
+            WHERE id BETWEEN :first_id AND :last_id AND ({self.candidates()})
+            """
+        )
+        params = {**self.params(), "first_id": first_id, "last_id": last_id}
+
+        cleaned_titles = []
+        for feed_id, title in session.execute(stmt, params):
+            cleaned_title = self.fix(title)
+            if cleaned_title != title:
+                cleaned_titles.append((feed_id, cleaned_title))
+
+        if not cleaned_titles:
+            return 0
+
+        cleaned = values(
+            column("id", Integer), column("title", Text), name="cleaned"
+        ).data(cleaned_titles)
+        session.execute(
+            update(Feeds)
+            .where(Feeds.id == cleaned.c.id)
+            .values(title=cleaned.c.title, updated=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        return len(cleaned_titles)
@@ -0,0 +1,73 @@
+import argparse
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.models.feeds import Feeds
+from config import STORY_SIMILARITY, STORY_WINDOW_DAYS, pow_db_config_str
+from libs.near_duplicates import find_similar_feed, index_feed, minhash_signature
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def cluster_feeds(session: Session, chunk_size: int) -> int:
+    """
+    Assigns a story to the oldest feeds without one and indexes their titles.
+
+    Args:
+        session (Session): The SQLAlchemy session.
+        chunk_size (int): The number of feeds to cluster.
+
+    Returns:
+        int: The number of clustered feeds.
+    """
+    feeds = (
+        session.query(Feeds.id, Feeds.title, Feeds.published)
+        .filter(Feeds.story_id.is_(None))
+        .order_by(Feeds.published, Feeds.id)
+        .limit(chunk_size)
+        .all()
+    )
+
+    for feed_id, title, published in feeds:
+        signature = minhash_signature(title or "")
+        story_match = find_similar_feed(
+            session,
+            signature,
+            published=published or datetime.now(),
+            min_similarity=STORY_SIMILARITY,
+            window_days=STORY_WINDOW_DAYS,
+        )
+
+        session.query(Feeds).filter(Feeds.id == feed_id).update(
+            {"story_id": story_match.story_id if story_match else feed_id},
+            synchronize_session=False,
+        )
+        index_feed(session, feed_id, signature)
+
+    return len(feeds)
+
+
+def main(argv=None) -> None:
+    arg_parser = argparse.ArgumentParser(
+        description="Cluster the feeds without a story into near-duplicate stories."
+    )
+    arg_parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    arguments = arg_parser.parse_args(argv)
+
+    engine = create_engine(pow_db_config_str)
+    clustered = 0
+    while True:
+        with Session(engine) as session, session.begin():
+            chunk = cluster_feeds(session, arguments.chunk_size)
+
+        if not chunk:
+            break
+        clustered += chunk
+        print(f"\r{clustered} feeds clustered", end="", flush=True)
+    print()
+
+
+if __name__ == "__main__":
+    main()
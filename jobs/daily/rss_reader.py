@@ -1,33 +1,64 @@
+import argparse
+import calendar
 import hashlib
-import time
+import multiprocessing
+import os
+import socket
+import urllib.error
+import urllib.request
+from datetime import datetime, timedelta
 from operator import and_
+from typing import List, Optional
 
 import feedparser
 from dateutil import parser as dateparser
-from nltk import word_tokenize
-from nltk.corpus import stopwords
 
+from app.models.feed_sentiments import FeedSentiments
 from app.models.feeds import Feeds
 from app.models.sources import Sources
-from config import pow_db_config_str
+from config import (
+    FEED_FETCH_TIMEOUT,
+    FEED_LATE_ENTRY_HOURS,
+    INGEST_METRICS_JSONL,
+    INGEST_METRICS_PROM,
+    SENTIMENT_MODEL_ID,
+    STORY_REUSE_SIMILARITY,
+    STORY_SIMILARITY,
+    STORY_WINDOW_DAYS,
+    TOKENIZER,
+    pow_db_config_str,
+)
 from libs.database import initialize_database, session_scope
-from libs.functions import clean_url, remove_photo_video, setup_logging_to_file
-from libs.sentiment_analyzer import get_emotion_prediction, get_sentiment_prediction
-
-# Initialize the database
-initialize_database(pow_db_config_str)
-
-# Load Hungarian stopwords
-stopwords_list = stopwords.words("hungarian")
+from libs.functions import setup_logging_to_file
+from libs.metrics import RunMetrics
+from libs.near_duplicates import (
+    StoryMatch,
+    find_similar_feed,
+    index_feed,
+    minhash_signature,
+)
+from libs.sentiment_analyzer import (
+    get_emotion_prediction,
+    get_sentiment_prediction,
+    load_models,
+)
+from libs.source_schedule import (
+    FeedState,
+    claim_sources,
+    get_feed_state,
+    release_source,
+    save_feed_state,
+    schedule_new_sources,
+)
+from libs.source_stats import add_feed_stats
+from libs.term_stats import count_terms
+from libs.text_normalizer import clean_link, clean_title, extract_words
+from libs.vocabulary import vocabulary
 
 # Set up logging
 error_logger = setup_logging_to_file("error.log")
 info_logger = setup_logging_to_file("info.log")
 
-# Fetch RSS sources from the database
-with session_scope() as session:
-    rss_sources = session.query(Sources.id, Sources.rss).all()
-
 
 def not_in_db(hash: str, source_id: int) -> bool:
     """
@@ -49,7 +80,52 @@ def not_in_db(hash: str, source_id: int) -> bool:
     return cursor_result == 0 or cursor_result is None
 
 
-def process_feed_item(item, rss_source_id: int) -> None:
+def get_predictions(
+    title: str, metrics: RunMetrics, source: str, story_match: StoryMatch = None
+) -> tuple:
+    """
+    Predicts the sentiment and emotion scores of a title, reusing the scores of
+    a near-identical feed of the same story when there is one.
+
+    Args:
+        title (str): The cleaned title.
+        metrics (RunMetrics): The metrics of the current run.
+        source (str): The source label of the metrics.
+        story_match (StoryMatch, optional): The most similar feed of the same story.
+
+    Returns:
+        tuple: The sentiment and the emotion prediction dicts.
+    """
+    if story_match is not None and story_match.similarity >= STORY_REUSE_SIMILARITY:
+        with session_scope() as session:
+            feed = session.get(Feeds, story_match.feed_id)
+            if feed is not None and feed.negative is not None:
+                metrics.increment("predictions_reused", source=source)
+                return (
+                    {
+                        "positive": feed.positive,
+                        "negative": feed.negative,
+                        "neutral": feed.neutral,
+                    },
+                    {
+                        "anger": feed.anger,
+                        "fear": feed.fear,
+                        "joy": feed.joy,
+                        "sadness": feed.sadness,
+                        "love": feed.love,
+                        "surprise": feed.surprise,
+                    },
+                )
+
+    with metrics.timer("inference_sentiment", source=source):
+        sentiment_prediction_dict = get_sentiment_prediction(title)
+    with metrics.timer("inference_emotion", source=source):
+        emotion_prediction_dict = get_emotion_prediction(title)
+
+    return sentiment_prediction_dict, emotion_prediction_dict
+
+
+def process_feed_item(item, rss_source_id: int, metrics: RunMetrics) -> bool:
     """
     Processes a single RSS feed item, analyzing its sentiment, emotions,
     and saving it to the database if it doesn't already exist.
@@ -57,79 +133,368 @@ def process_feed_item(item, rss_source_id: int) -> None:
     Args:
         item: The RSS feed item.
         rss_source_id (int): The ID of the RSS source.
+        metrics (RunMetrics): The metrics of the current run.
+
+    Returns:
+        bool: True if the item was new and saved, False otherwise.
     """
-    title = remove_photo_video(item["title"]).strip()
-    link = clean_url(item["link"]).strip()
+    source = str(rss_source_id)
+    metrics.increment("seen", source=source)
+
+    title = clean_title(item["title"])
+    link = clean_link(item["link"])
     hash = hashlib.md5(link.encode("utf-8")).hexdigest()
 
-    if not_in_db(hash=hash, source_id=rss_source_id):
-        words = [
-            word.lower()
-            for word in word_tokenize(title)
-            if word.lower() not in stopwords_list and len(word) > 2
-        ]
+    with metrics.timer("dedupe", source=source):
+        is_new = not_in_db(hash=hash, source_id=rss_source_id)
 
-        published_date = dateparser.parse(item["published"])
-        feed_date = published_date.strftime("%Y-%m-%d")
+    if not is_new:
+        metrics.increment("skipped", source=source)
+        return False
 
-        # Sentiment and emotion predictions
-        sentiment_prediction_dict = get_sentiment_prediction(title)
-        emotion_prediction_dict = get_emotion_prediction(title)
+    with metrics.timer("tokenize", source=source):
+        words = extract_words(title, tokenizer=TOKENIZER)
 
-        # Create a new feed entry
-        new_feed = Feeds(
-            title=title,
-            link=link,
-            source_id=rss_source_id,
-            words=words,
-            published=published_date,
-            feed_date=feed_date,
-            hash=hash,
-            sentiment_prediction=sentiment_prediction_dict,
-            negative=sentiment_prediction_dict["negative"],
-            positive=sentiment_prediction_dict["positive"],
-            neutral=sentiment_prediction_dict["neutral"],
-            emotion_prediction=emotion_prediction_dict,
-            anger=emotion_prediction_dict["anger"],
-            fear=emotion_prediction_dict["fear"],
-            joy=emotion_prediction_dict["joy"],
-            sadness=emotion_prediction_dict["sadness"],
-            love=emotion_prediction_dict["love"],
-            surprise=emotion_prediction_dict["surprise"],
-        )
+    published_date = dateparser.parse(item["published"])
+    feed_date = published_date.strftime("%Y-%m-%d")
 
-        # Save the new feed to the database
+    # Near-duplicate lookup, the same story may already be stored from another source
+    with metrics.timer("story_lookup", source=source):
+        signature = minhash_signature(title)
         with session_scope() as session:
+            story_match = find_similar_feed(
+                session,
+                signature,
+                published=published_date.replace(tzinfo=None),
+                min_similarity=STORY_SIMILARITY,
+                window_days=STORY_WINDOW_DAYS,
+            )
+
+    # Sentiment and emotion predictions
+    sentiment_prediction_dict, emotion_prediction_dict = get_predictions(
+        title, metrics, source, story_match
+    )
+
+    # Create a new feed entry
+    new_feed = Feeds(
+        title=title,
+        link=link,
+        source_id=rss_source_id,
+        published=published_date,
+        feed_date=feed_date,
+        hash=hash,
+        negative=sentiment_prediction_dict["negative"],
+        positive=sentiment_prediction_dict["positive"],
+        neutral=sentiment_prediction_dict["neutral"],
+        anger=emotion_prediction_dict["anger"],
+        fear=emotion_prediction_dict["fear"],
+        joy=emotion_prediction_dict["joy"],
+        sadness=emotion_prediction_dict["sadness"],
+        love=emotion_prediction_dict["love"],
+        surprise=emotion_prediction_dict["surprise"],
+    )
+
+    # Save the new feed to the database, interning its words and
+    # indexing its title in the same transaction
+    with metrics.timer("db_write", source=source):
+        with session_scope() as session:
+            new_feed.word_ids = vocabulary.get_ids(session, words, create=True)
             session.add(new_feed)
+            session.flush()
+
+            new_feed.story_id = story_match.story_id if story_match else new_feed.id
+            index_feed(session, new_feed.id, signature)
+            count_terms(session, published_date.date(), new_feed.word_ids)
+            add_feed_stats(
+                session, rss_source_id, published_date.date(), sentiment_prediction_dict
+            )
+            # The scores of the ingest model, the other models: jobs.score_feeds
+            session.add(
+                FeedSentiments(
+                    feed_id=new_feed.id,
+                    model_id=SENTIMENT_MODEL_ID,
+                    negative=new_feed.negative,
+                    positive=new_feed.positive,
+                    neutral=new_feed.neutral,
+                )
+            )
             session.commit()
 
+    metrics.increment("new", source=source)
+    return True
+
+
+def fetch_feed(
+    rss_source_link: str, state: FeedState
+) -> Optional[urllib.request.addinfourl]:
+    """
+    Requests the RSS feed of a source, conditional on the etag and last modified
+    date of the previous poll.
+
+    Args:
+        rss_source_link (str): The URL of the RSS feed.
+        state (FeedState): The state of the previous poll.
+
+    Returns:
+        The response, None if the feed did not change (HTTP 304).
+
+    Raises:
+        OSError: The feed could not be read.
+    """
+    headers = {"User-Agent": feedparser.USER_AGENT}
+    if state.etag:
+        headers["If-None-Match"] = state.etag
+    if state.last_modified:
+        headers["If-Modified-Since"] = state.last_modified
+
+    request = urllib.request.Request(rss_source_link, headers=headers)
+    try:
+        return urllib.request.urlopen(request, timeout=FEED_FETCH_TIMEOUT)
+    except urllib.error.HTTPError as error:
+        if error.code == 304:
+            return None
+        raise
+
+
+def entry_published(item) -> Optional[datetime]:
+    """
+    Args:
+        item: The RSS feed item.
+
+    Returns:
+        datetime or None: The UTC publish date parsed by feedparser, if any.
+    """
+    published_parsed = item.get("published_parsed")
+    if not published_parsed:
+        return None
+    return datetime.utcfromtimestamp(calendar.timegm(published_parsed))
+
 
-def run_job():
+def process_source(
+    rss_source_id: int, rss_source_link: str, metrics: RunMetrics
+) -> Optional[int]:
     """
-    Runs the RSS feed processing job. Fetches RSS feeds from sources,
-    processes each entry, and logs the execution time.
+    Reads the RSS feed of a source and processes its new items.
+
+    The work is proportional to the new items: an unchanged feed (HTTP 304 or
+    the same content hash) is not parsed, and the entries of the previous poll
+    (same link hash) or published well before its newest entry are skipped
+    before any cleaning, hashing or database lookup. An entry that fails is
+    logged, counted (errors) and skipped.
+
+    Args:
+        rss_source_id (int): The ID of the RSS source.
+        rss_source_link (str): The URL of the RSS feed.
+        metrics (RunMetrics): The metrics of the current run.
+
+    Returns:
+        int or None: The number of new items, None if the feed could not be read.
     """
-    start_time = time.time()
+    source = str(rss_source_id)
+
+    with session_scope() as session:
+        state = get_feed_state(session, rss_source_id)
+
+    with metrics.timer("fetch", source=source):
+        try:
+            response = fetch_feed(rss_source_link, state)
+            if response is not None:
+                with response:
+                    content = response.read()
+                    etag = response.headers.get("ETag")
+                    last_modified = response.headers.get("Last-Modified")
+        except (OSError, ValueError) as error:
+            error_logger.error(f"Error reading RSS: {rss_source_link}, {error}")
+            metrics.increment("fetch_errors", source=source)
+            return None
+
+    if response is None:
+        metrics.increment("unchanged", source=source)
+        return 0
+
+    content_hash = hashlib.md5(content).hexdigest()
+    if content_hash == state.content_hash:
+        metrics.increment("unchanged", source=source)
+        return 0
+
+    with metrics.timer("parse", source=source):
+        rss_feed = feedparser.parse(content)
+
+    # Entries published this long before the newest one of the previous poll
+    # were seen then, even if their link changed since
+    seen_before = (
+        state.latest_published - timedelta(hours=FEED_LATE_ENTRY_HOURS)
+        if state.latest_published
+        else None
+    )
+    latest_published = state.latest_published
+    link_hashes = set()
+    new_items = 0
 
-    for rss_source in rss_sources:
-        rss_source_id, rss_source_link = rss_source
-        rss_feed = feedparser.parse(rss_source_link)
+    for item in rss_feed["entries"]:
+        link_hash = hashlib.md5(item.get("link", "").encode("utf-8")).hexdigest()
+        link_hashes.add(link_hash)
+        published = entry_published(item)
 
-        if "status" not in rss_feed:
-            error_logger.error(f"Error reading RSS: {rss_source_link}")
+        if link_hash in state.link_hashes or (
+            seen_before and published and published < seen_before
+        ):
+            metrics.increment("seen_before", source=source)
             continue
 
-        if rss_feed["status"] != 200:
+        # A bad entry is skipped, not retried: failing the source would keep its
+        # state, and every later poll would fail on the same entry again
+        try:
+            new_items += process_feed_item(item, rss_source_id, metrics)
+        except Exception as error:
             error_logger.error(
-                f'Error reading RSS: {rss_source_link}, status: {rss_feed["status"]}'
+                f"Error processing an entry of {rss_source_link}: {error!r}"
             )
-            continue
+            metrics.increment("errors", source=source)
+        if published and (latest_published is None or published > latest_published):
+            latest_published = published
+
+    # Saved once every entry is processed, a failed run reads the feed again
+    with session_scope() as session:
+        save_feed_state(
+            session,
+            rss_source_id,
+            FeedState(
+                content_hash=content_hash,
+                etag=etag,
+                last_modified=last_modified,
+                latest_published=latest_published,
+                link_hashes=frozenset(link_hashes),
+            ),
+        )
+
+    return new_items
+
 
-        for item in rss_feed["entries"]:
-            process_feed_item(item, rss_source_id)
+def finish_run(metrics: RunMetrics) -> None:
+    metrics.finish()
+    metrics.write_json_line(INGEST_METRICS_JSONL)
+    metrics.write_prometheus(INGEST_METRICS_PROM)
+    info_logger.info(f"Script run completed in: {metrics.duration} seconds")
+
+
+def run_job(source_ids: List[int]):
+    """
+    Reads some sources right away, outside of the schedule and without leases,
+    e.g. to check a new source by hand. The regular runs use run_worker().
+
+    Args:
+        source_ids (List[int]): The ids of the sources to read.
+    """
+    metrics = RunMetrics("ingest")
+    metrics.set_gauge("model_load_seconds", round(load_models(), 3))
 
-    end_time = time.time()
-    info_logger.info(f"Script run completed in: {end_time - start_time} seconds")
+    # Fetch RSS sources from the database, the state of their feeds is kept
+    # in their schedule
+    with session_scope() as session:
+        schedule_new_sources(session)
+        rss_sources = (
+            session.query(Sources.id, Sources.rss)
+            .filter(Sources.id.in_(source_ids))
+            .all()
+        )
+
+    for rss_source_id, rss_source_link in rss_sources:
+        process_source(rss_source_id, rss_source_link, metrics)
+
+    finish_run(metrics)
+
+
+def run_worker(
+    worker: Optional[str] = None,
+    shard: Optional[int] = None,
+    shards: Optional[int] = None,
+) -> None:
+    """
+    Polls the due sources of the schedule until none is left. The sources are
+    leased, so any number of workers (and overlapping runs) can run at once.
+
+    Args:
+        worker (str, optional): The name of the worker (default is host:pid).
+        shard (int, optional): Only poll the sources with source_id % shards == shard.
+        shards (int, optional): The number of shards (default is no sharding).
+    """
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    metrics = RunMetrics("ingest")
+    metrics.set_gauge("model_load_seconds", round(load_models(), 3))
+
+    with session_scope() as session:
+        schedule_new_sources(session)
+
+    while True:
+        with session_scope() as session:
+            leased = claim_sources(session, worker, shard=shard, shards=shards)
+        if not leased:
+            break
+
+        for rss_source_id, rss_source_link in leased:
+            try:
+                new_items = process_source(rss_source_id, rss_source_link, metrics)
+            except Exception as error:
+                error_logger.error(f"Error processing source {rss_source_id}: {error}")
+                new_items = None
+
+            with session_scope() as session:
+                release_source(session, rss_source_id, worker, new_items)
+
+    finish_run(metrics)
+
+
+def run_worker_process(shard: Optional[int], shards: Optional[int]) -> None:
+    # Every process has its own connections and models
+    initialize_database(pow_db_config_str)
+    run_worker(shard=shard, shards=shards)
+
+
+def main(argv=None) -> None:
+    arg_parser = argparse.ArgumentParser(
+        description="Poll the due sources of the schedule, leased by this run, "
+        "so overlapping runs never read the same source."
+    )
+    arg_parser.add_argument(
+        "--source",
+        type=int,
+        action="append",
+        help="read this source right away, outside of the schedule and without "
+        "a lease; can be repeated",
+    )
+    # The default since the schedule has leases, kept for existing cron lines
+    arg_parser.add_argument("--scheduled", action="store_true", help=argparse.SUPPRESS)
+    arg_parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="worker processes (default: 1)",
+    )
+    arg_parser.add_argument(
+        "--shard",
+        type=int,
+        help="only the sources with id %% shards == shard",
+    )
+    arg_parser.add_argument("--shards", type=int, help="number of shards")
+    arguments = arg_parser.parse_args(argv)
+
+    if arguments.source:
+        initialize_database(pow_db_config_str)
+        run_job(source_ids=arguments.source)
+        return
+
+    processes = [
+        multiprocessing.Process(
+            target=run_worker_process, args=(arguments.shard, arguments.shards)
+        )
+        for _ in range(arguments.workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
 
 
-run_job()
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,57 @@
-import json
+import argparse
+
+from sqlalchemy import literal, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
 
 from app.models.feed_sentiments import FeedSentiments
 from app.models.feeds import Feeds
-from config import pow_db_config_str
+from config import SENTIMENT_MODEL_ID, pow_db_config_str
 from libs.database import initialize_database, session_scope
 
-initialize_database(pow_db_config_str)
-
-with session_scope() as session:
-    feeds = session.query(
-        Feeds.id,
-        Feeds.sentiment_prediction,
-        Feeds.negative,
-        Feeds.positive,
-        Feeds.neutral,
-    ).all()
-
-    for feed in feeds:
-        new_obj = FeedSentiments(
-            feed_id=feed[0],
-            model_id=1,
-            prediction=json.dumps(feed[1]),
-            negative=feed[2],
-            positive=feed[3],
-            neutral=feed[4],
+
+def move_sentiments(session: Session, model_id: int = SENTIMENT_MODEL_ID) -> int:
+    """
+    Copies the sentiment scores of the feeds into feed_sentiments rows, in one
+    statement. The feeds that already have scores of the model are skipped, the
+    caller commits.
+
+    Args:
+        session (Session): The SQLAlchemy session.
+        model_id (int): The model the scores were predicted with.
+
+    Returns:
+        int: The number of inserted rows.
+    """
+    statement = (
+        insert(FeedSentiments)
+        .from_select(
+            ["feed_id", "model_id", "negative", "positive", "neutral"],
+            select(
+                Feeds.id,
+                literal(model_id),
+                Feeds.negative,
+                Feeds.positive,
+                Feeds.neutral,
+            ),
         )
-        session.add(new_obj)
-        try:
-            session.commit()
-            print(f"New feed inserted successfully. {feed[0]}")
-        except Exception as e:
-            session.rollback()  # Rollback the session in case of an error
-            print(f"Error occurred: {e}")
-        finally:
-            session.close()  # Close the session
+        .on_conflict_do_nothing(index_elements=["model_id", "feed_id"])
+    )
+    return session.execute(statement).rowcount
+
+
+def main(argv=None) -> None:
+    arg_parser = argparse.ArgumentParser(
+        description="Copy the sentiment scores of the feeds into feed_sentiments."
+    )
+    arg_parser.add_argument("--model-id", type=int, default=SENTIMENT_MODEL_ID)
+    arguments = arg_parser.parse_args(argv)
+
+    initialize_database(pow_db_config_str)
+    with session_scope() as session:
+        inserted = move_sentiments(session, model_id=arguments.model_id)
+    print(f"{inserted} feed sentiments inserted")
+
+
+if __name__ == "__main__":
+    main()
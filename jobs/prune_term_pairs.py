@@ -0,0 +1,34 @@
+import argparse
+from datetime import date
+
+from config import TERM_PAIR_MIN_SUPPORT, TERM_PAIR_PRUNE_AFTER_DAYS, pow_db_config_str
+from libs.database import initialize_database, session_scope
+from libs.term_stats import prune_pairs
+
+
+def main(argv=None) -> None:
+    arg_parser = argparse.ArgumentParser(
+        description="Delete the rare word pairs of the settled days."
+    )
+    arg_parser.add_argument("--min-support", type=int, default=TERM_PAIR_MIN_SUPPORT)
+    arg_parser.add_argument(
+        "--after-days",
+        type=int,
+        default=TERM_PAIR_PRUNE_AFTER_DAYS,
+        help="the days still ingested, never pruned",
+    )
+    arguments = arg_parser.parse_args(argv)
+
+    initialize_database(pow_db_config_str)
+    with session_scope() as session:
+        deleted = prune_pairs(
+            session,
+            date.today(),
+            min_support=arguments.min_support,
+            after_days=arguments.after_days,
+        )
+    print(f"{deleted} word pairs deleted")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+import argparse
+from collections import defaultdict
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.feed_sentiments import FeedSentiments
+from config import SCORING_BATCH_SIZE, SENTIMENT_MODEL_ID, pow_db_config_str
+from libs.database import initialize_database, session_scope
+from libs.scoring import ScoringModel, load_active_models, score_titles, token_cache
+
+# The next feeds after a feed id, with the models that did not score them yet
+# (all the models when rescoring)
+MISSING_SCORES_QUERY = """
+    SELECT feeds.id, feeds.title, array_agg(models.id ORDER BY models.id) AS model_ids
+    FROM feeds
+    CROSS JOIN unnest(CAST(:model_ids AS integer[])) AS models (id)
+    WHERE feeds.id > :after_id
+      AND coalesce(feeds.title, '') <> ''
+      AND (
+          CAST(:rescore AS boolean)
+          OR NOT EXISTS (
+              SELECT 1
+              FROM feed_sentiments
+              WHERE feed_sentiments.model_id = models.id
+                AND feed_sentiments.feed_id = feeds.id
+          )
+      )
+    GROUP BY feeds.id, feeds.title
+    ORDER BY feeds.id
+    LIMIT :batch_size
+"""
+
+# The feeds columns hold the scores of the ingest model, every chart and
+# source_day_stats read them. A rescore of that model copies its new scores to
+# the columns, and moves the statistics of the days of the feeds by the
+# difference: the old scores subtracted, the new ones added. The CTEs read the
+# feeds as they were before the statement. Ties of the dominant sentiment go to
+# negative, then to positive, as in migrations/009_source_day_stats.sql.
+PRIMARY_SCORES_QUERY = """
+    WITH new_scores AS (
+        SELECT feed_id, negative, neutral, positive
+        FROM feed_sentiments
+        WHERE model_id = :model_id AND feed_id = ANY(:feed_ids)
+    ),
+    old_scores AS (
+        SELECT feeds.id, feeds.feed_date, feeds.source_id,
+               feeds.negative, feeds.neutral, feeds.positive
+        FROM feeds
+        JOIN new_scores ON new_scores.feed_id = feeds.id
+    ),
+    updated AS (
+        UPDATE feeds
+        SET negative = new_scores.negative,
+            neutral = new_scores.neutral,
+            positive = new_scores.positive
+        FROM new_scores
+        WHERE feeds.id = new_scores.feed_id
+    ),
+    changes AS (
+        SELECT feed_date, source_id, -1 AS sign, negative, neutral, positive
+        FROM old_scores
+        WHERE negative IS NOT NULL
+        UNION ALL
+        SELECT old_scores.feed_date, old_scores.source_id, 1,
+               new_scores.negative, new_scores.neutral, new_scores.positive
+        FROM old_scores
+        JOIN new_scores ON new_scores.feed_id = old_scores.id
+    ),
+    scored AS (
+        SELECT
+            feed_date, source_id, sign, negative, neutral, positive,
+            CASE
+                WHEN GREATEST(negative, positive, neutral) = negative THEN 'negative'
+                WHEN GREATEST(negative, positive, neutral) = positive THEN 'positive'
+                ELSE 'neutral'
+            END AS sentiment
+        FROM changes
+        WHERE feed_date IS NOT NULL AND source_id IS NOT NULL
+    )
+    INSERT INTO source_day_stats
+    SELECT
+        feed_date, source_id, sum(sign),
+        coalesce(sum(sign) FILTER (WHERE sentiment = 'negative'), 0),
+        coalesce(sum(sign) FILTER (WHERE sentiment = 'neutral'), 0),
+        coalesce(sum(sign) FILTER (WHERE sentiment = 'positive'), 0),
+        sum(sign * negative), sum(sign * negative * negative),
+        sum(sign * neutral), sum(sign * neutral * neutral),
+        sum(sign * positive), sum(sign * positive * positive)
+    FROM scored
+    GROUP BY feed_date, source_id
+    ON CONFLICT (day, source_id) DO UPDATE SET
+        feeds = source_day_stats.feeds + excluded.feeds,
+        negative_feeds = source_day_stats.negative_feeds + excluded.negative_feeds,
+        neutral_feeds = source_day_stats.neutral_feeds + excluded.neutral_feeds,
+        positive_feeds = source_day_stats.positive_feeds + excluded.positive_feeds,
+        negative_sum = source_day_stats.negative_sum + excluded.negative_sum,
+        negative_sum_sq = source_day_stats.negative_sum_sq + excluded.negative_sum_sq,
+        neutral_sum = source_day_stats.neutral_sum + excluded.neutral_sum,
+        neutral_sum_sq = source_day_stats.neutral_sum_sq + excluded.neutral_sum_sq,
+        positive_sum = source_day_stats.positive_sum + excluded.positive_sum,
+        positive_sum_sq = source_day_stats.positive_sum_sq + excluded.positive_sum_sq
+"""
+
+
+def score_batch(
+    session: Session,
+    models: List[ScoringModel],
+    after_id: int,
+    batch_size: int,
+    rescore: bool = False,
+) -> tuple:
+    """
+    Scores the next batch of feeds with the models missing for them, and writes
+    the scores in one bulk insert.
+
+    Args:
+        session (Session): The SQLAlchemy session.
+        models (List[ScoringModel]): The models to score with.
+        after_id (int): The batch starts after this feed id.
+        batch_size (int): The number of feeds of the batch.
+        rescore (bool): Replace the existing scores of the models too. The new
+            scores of the ingest model (SENTIMENT_MODEL_ID) also replace those of
+            the feeds columns and source_day_stats, in the same transaction.
+
+    Returns:
+        tuple: The last feed id of the batch (None when there are no more feeds)
+            and the number of written feed_sentiments rows.
+    """
+    feeds = session.execute(
+        text(MISSING_SCORES_QUERY),
+        {
+            "model_ids": [model.id for model in models],
+            "after_id": after_id,
+            "batch_size": batch_size,
+            "rescore": rescore,
+        },
+    ).all()
+    if not feeds:
+        return None, 0
+
+    needed = defaultdict(list)
+    for index, feed in enumerate(feeds):
+        for model_id in feed.model_ids:
+            needed[model_id].append(index)
+
+    scores = score_titles(
+        models, [feed.title for feed in feeds], needed, cache=token_cache
+    )
+
+    rows = [
+        {
+            "feed_id": feeds[index].id,
+            "model_id": model_id,
+            **feed_scores,
+        }
+        for model_id, indices in needed.items()
+        for index, feed_scores in zip(indices, scores[model_id])
+    ]
+    statement = insert(FeedSentiments)
+    if rescore:
+        statement = statement.on_conflict_do_update(
+            index_elements=["model_id", "feed_id"],
+            set_={
+                "negative": statement.excluded.negative,
+                "positive": statement.excluded.positive,
+                "neutral": statement.excluded.neutral,
+                "updated": statement.excluded.updated,
+            },
+        )
+    else:
+        statement = statement.on_conflict_do_nothing(
+            index_elements=["model_id", "feed_id"]
+        )
+    session.execute(statement, rows)
+
+    if rescore and SENTIMENT_MODEL_ID in needed:
+        session.execute(
+            text(PRIMARY_SCORES_QUERY),
+            {
+                "model_id": SENTIMENT_MODEL_ID,
+                "feed_ids": [feeds[index].id for index in needed[SENTIMENT_MODEL_ID]],
+            },
+        )
+    return feeds[-1].id, len(rows)
+
+
+def main(argv=None) -> None:
+    arg_parser = argparse.ArgumentParser(
+        description="Score the feeds with every active sentiment model."
+    )
+    arg_parser.add_argument(
+        "--model",
+        type=int,
+        action="append",
+        help="id of a model to score with, can be repeated (default: all active models)",
+    )
+    arg_parser.add_argument("--batch-size", type=int, default=SCORING_BATCH_SIZE)
+    arg_parser.add_argument(
+        "--rescore",
+        action="store_true",
+        help="replace the existing scores of the models too; those of the ingest "
+        "model also replace the scores of the charts",
+    )
+    arg_parser.add_argument(
+        "--token-cache",
+        help="JSON file of the tokenized titles, reused and updated by every run",
+    )
+    arguments = arg_parser.parse_args(argv)
+
+    if arguments.token_cache:
+        token_cache.load(arguments.token_cache)
+
+    initialize_database(pow_db_config_str)
+    with session_scope() as session:
+        models = load_active_models(session, arguments.model)
+    if not models:
+        print("No active models")
+        return
+
+    after_id, written = 0, 0
+    while after_id is not None:
+        # One transaction per batch, an interrupted run keeps the scored batches
+        with session_scope() as session:
+            after_id, batch_written = score_batch(
+                session, models, after_id, arguments.batch_size, arguments.rescore
+            )
+        written += batch_written
+        print(f"\r{written} scores written", end="", flush=True)
+    print(f"\nTokenized titles: {token_cache.hits} cached, {token_cache.misses} new")
+
+    if arguments.token_cache:
+        token_cache.save(arguments.token_cache)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,49 +1,62 @@
 from contextlib import contextmanager
+from typing import Optional, Union
 
+from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy.ext.automap import automap_base
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session, sessionmaker
 
 # Initialize SQLAlchemy instance
 db = SQLAlchemy()
 
-# Initialize base class for ORM mapping
-Base = automap_base()
+# Engine of the jobs, which run without a Flask app
+_standalone_engine: Optional[Engine] = None
 
 
-def initialize_database(app):
+def initialize_database(app: Union[Flask, str]):
     """
-    Initializes the database by binding SQLAlchemy to the provided Flask app and
-    reflecting the existing database tables.
+    Initializes the database for the Flask app, or for a job without an app.
+
+    The tables are declared explicitly by the models in app/models, nothing is
+    reflected, so no connection is made until the first query.
 
     Args:
-        app (Flask): The Flask application instance.
+        app (Flask or str): The Flask application instance, or the database
+            URL of a job.
     """
+    global _standalone_engine
+
+    if isinstance(app, str):
+        _standalone_engine = create_engine(app)
+        return
+
     # Bind SQLAlchemy to the provided Flask app
     db.init_app(app)
 
-    # Reflect database tables within the application context
-    with app.app_context():
-        db.reflect()  # Reflect existing database into SQLAlchemy
-        Base.prepare(db.engine, reflect=True)  # Prepare the ORM base class
+
+def get_engine() -> Engine:
+    """
+    Returns the engine of the job, or of the current Flask app.
+
+    Returns:
+        Engine: The SQLAlchemy engine.
+    """
+    return _standalone_engine if _standalone_engine is not None else db.engine
 
 
 def get_session() -> Session:
     """
-    Creates and returns a new SQLAlchemy session.
+    Creates and returns a new SQLAlchemy session, for reads.
+
+    Use it as a context manager ("with get_session() as session:"), which closes
+    the session and returns its connection to the pool. Nothing is committed,
+    use session_scope() for writes.
 
     Returns:
         Session: A new SQLAlchemy session bound to the engine.
     """
-    # Create a sessionmaker bound to the SQLAlchemy engine
-    session_factory = sessionmaker(bind=db.engine)
-
-    # Return a new session
-    try:
-        return session_factory()
-    finally:
-        # Ensure all sessions created by this sessionmaker are closed
-        session_factory.close_all()
+    return sessionmaker(bind=get_engine())()
 
 
 @contextmanager
@@ -58,7 +71,7 @@ def session_scope() -> Session:
         Session: The SQLAlchemy session to be used within the context.
     """
     # Create a new session using the sessionmaker
-    session = sessionmaker(bind=db.engine)()
+    session = sessionmaker(bind=get_engine())()
     try:
         yield session  # Provide the session to the context block
         session.commit()  # Commit the transaction if no exceptions occur
@@ -0,0 +1,122 @@
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+import numpy as np
+
+import config
+
+# Bucket sizes of the time series, the date_trunc() field of each, finest first
+BUCKETS = ("day", "week", "month")
+# generate_series() steps of the buckets
+BUCKET_STEPS = {"day": "1 day", "week": "1 week", "month": "1 month"}
+BUCKET_LABEL_FORMATS = {"day": "%Y-%m-%d", "week": "%Y-%m-%d", "month": "%Y-%m"}
+
+
+def parse_filter_date(value: str) -> Optional[datetime]:
+    """
+    Parses a date filter value ("YYYY-MM-DD" or "YYYY-MM-DD HH:MM:SS").
+
+    Args:
+        value (str): The filter value.
+
+    Returns:
+        datetime or None: The parsed value, or None if it is empty or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def truncate(day: date, bucket: str) -> date:
+    """
+    The first day of the bucket of a day, like date_trunc() (weeks start on Monday).
+
+    Args:
+        day (date): The day.
+        bucket (str): "day", "week" or "month".
+
+    Returns:
+        date: The first day of the bucket.
+    """
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(day: date, bucket: str) -> date:
+    """
+    Args:
+        day (date): The first day of a bucket.
+        bucket (str): "day", "week" or "month".
+
+    Returns:
+        date: The first day of the following bucket.
+    """
+    if bucket == "month":
+        return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+    return day + timedelta(days=7 if bucket == "week" else 1)
+
+
+def bucket_axis(start: date, end: date, bucket: str) -> List[date]:
+    """
+    The buckets between two days, the same ones generate_series() returns.
+
+    Args:
+        start (date): The first day of the range.
+        end (date): The last day of the range.
+        bucket (str): "day", "week" or "month".
+
+    Returns:
+        List[date]: The first days of the buckets, in order.
+    """
+    axis = []
+    day = truncate(start, bucket)
+    while day <= end:
+        axis.append(day)
+        day = next_bucket(day, bucket)
+    return axis
+
+
+def choose_bucket(start: date, end: date) -> str:
+    """
+    The finest bucket that keeps the series within ANALYTICS_MAX_POINTS points,
+    months for any longer range.
+
+    Args:
+        start (date): The first day of the range.
+        end (date): The last day of the range.
+
+    Returns:
+        str: "day", "week" or "month".
+    """
+    days = (end - start).days + 1
+    if days <= config.ANALYTICS_MAX_POINTS:
+        return "day"
+    if days / 7 <= config.ANALYTICS_MAX_POINTS:
+        return "week"
+    return "month"
+
+
+def truncate_days(days: np.ndarray, bucket: str) -> np.ndarray:
+    """
+    Vectorized truncate() of a datetime64[D] array.
+
+    Args:
+        days (np.ndarray): The days.
+        bucket (str): "day", "week" or "month".
+
+    Returns:
+        np.ndarray: The first days of their buckets, as datetime64[D].
+    """
+    if bucket == "week":
+        # 1970-01-01 was a Thursday, three days after a Monday
+        offsets = (days.astype(np.int64) + 3) % 7
+        return days - offsets.astype("timedelta64[D]")
+    if bucket == "month":
+        return days.astype("datetime64[M]").astype("datetime64[D]")
+    return days
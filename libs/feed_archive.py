@@ -0,0 +1,101 @@
+"""
+Routing of the feed queries across the archive boundary: the queries starting
+before feeds_archive_state.archived_before read feeds and feeds_archive, the
+others feeds alone (migrations/008_feeds_archive.sql).
+"""
+
+import threading
+import time
+from datetime import date
+from typing import Optional, Tuple
+
+from sqlalchemy import select, text, true, union_all
+from sqlalchemy.orm import aliased
+
+import config
+from app.models.feed_db_filters import FeedDBFilters
+from app.models.feeds import Feeds
+from app.models.feeds_archive import FeedsArchive
+from libs.database import session_scope
+from libs.date_buckets import parse_filter_date
+
+ARCHIVED_BEFORE_QUERY = "SELECT archived_before FROM feeds_archive_state"
+
+
+class ArchiveBoundary:
+    """
+    In-process copy of the archive boundary, read again at most once per
+    ARCHIVE_BOUNDARY_TTL seconds. jobs.archive_feeds moves the feeds only once
+    every worker has seen its new boundary.
+    """
+
+    def __init__(self):
+        self._archived_before: Optional[date] = None
+        self._checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        with session_scope() as session:
+            self._archived_before = session.execute(
+                text(ARCHIVED_BEFORE_QUERY)
+            ).scalar()
+        self._checked_at = time.monotonic()
+
+    @property
+    def archived_before(self) -> Optional[date]:
+        """The feeds before this day are in feeds_archive, None if nothing is archived."""
+        if self._checked_at is None:
+            with self._lock:
+                if self._checked_at is None:
+                    self.load()
+        elif time.monotonic() - self._checked_at >= config.ARCHIVE_BOUNDARY_TTL:
+            # One thread reads it again, the others keep the current one
+            if self._lock.acquire(blocking=False):
+                try:
+                    self.load()
+                finally:
+                    self._lock.release()
+
+        return self._archived_before
+
+    def spans(self, start_date: Optional[str]) -> bool:
+        """
+        Args:
+            start_date (str, optional): The start date of a filter, empty for none.
+
+        Returns:
+            bool: True if the feeds from the start date include archived ones.
+        """
+        archived_before = self.archived_before
+        if archived_before is None:
+            return False
+
+        start = parse_filter_date(start_date) if start_date else None
+        return start is None or start.date() < archived_before
+
+
+# Shared instance, one per process
+archive_boundary = ArchiveBoundary()
+
+
+def filtered_feeds(filters: FeedDBFilters) -> Tuple[type, object]:
+    """
+    The feeds of the filters, from feeds alone or from both tables when the
+    filters start before the archive boundary.
+
+    Args:
+        filters (FeedDBFilters): The request filters.
+
+    Returns:
+        Tuple[type, object]: The entity to query (Feeds, or Feeds over the union
+            of both tables) and the condition to filter it with.
+    """
+    if not archive_boundary.spans(filters.start_date):
+        return Feeds, filters.conditions
+
+    # The filters go inside each branch, so each table uses its own indexes
+    feeds = union_all(
+        select(Feeds).where(filters.generate_conditions(Feeds)),
+        select(FeedsArchive).where(filters.generate_conditions(FeedsArchive)),
+    ).subquery("feeds")
+    return aliased(Feeds, feeds), true()
@@ -0,0 +1,378 @@
+import re
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func
+
+import config
+from app.models.feed_db_filters import FeedDBFilters
+from app.models.feeds import Feeds
+from libs.database import session_scope
+from libs.date_buckets import parse_filter_date, truncate_days
+from libs.feed_archive import archive_boundary
+from libs.vocabulary import vocabulary
+
+# Column order of the sentiment count matrix, same as the chart series order
+SENTIMENT_NAMES = ("negative", "neutral", "positive")
+SERIES_NAMES = ("Negative", "Neutral", "Positive")
+
+_snapshot = None
+_snapshot_checked_at = 0.0
+_snapshot_lock = threading.Lock()
+
+
+def _like_to_regex(pattern: str) -> re.Pattern:
+    """
+    Translates a PostgreSQL LIKE pattern into a case-insensitive regular expression.
+
+    Args:
+        pattern (str): The LIKE pattern, using '%', '_' and '\\' as escape character.
+
+    Returns:
+        re.Pattern: The compiled expression, to be used with fullmatch().
+    """
+    parts = []
+    chars = iter(pattern)
+    for char in chars:
+        if char == "\\":
+            parts.append(re.escape(next(chars, "")))
+        elif char == "%":
+            parts.append(".*")
+        elif char == "_":
+            parts.append(".")
+        else:
+            parts.append(re.escape(char))
+    return re.compile("".join(parts), re.IGNORECASE | re.DOTALL)
+
+
+class FeedSnapshot:
+    """
+    Read-only, columnar copy of the most recent feeds, used to answer the
+    analytics queries with vectorized NumPy group-bys instead of going back to the database.
+
+    Every row is stored once in flat arrays; the vocabulary ids of the words
+    are kept in CSR form (word_ids + word_rows).
+    """
+
+    def __init__(self, rows: list, start_date: date, last_feed_id: Optional[int]):
+        """
+        Builds the column arrays from the loaded rows.
+
+        Args:
+            rows (list): (source_id, published, feed_date, title, word_ids, negative, positive, neutral) rows.
+            start_date (date): The first feed_date covered by the snapshot.
+            last_feed_id (int, optional): The highest feed id at load time, used as the snapshot version.
+        """
+        self.start_date = start_date
+        self.last_feed_id = last_feed_id
+        self.loaded_at = datetime.now()
+        self.size = len(rows)
+
+        columns = list(zip(*rows)) if rows else [()] * 8
+        (
+            source_ids,
+            published,
+            feed_dates,
+            titles,
+            word_ids,
+            negative,
+            positive,
+            neutral,
+        ) = columns
+
+        self.source_ids = np.array(
+            [-1 if source_id is None else source_id for source_id in source_ids],
+            dtype=np.int32,
+        )
+        self.published = np.array(published, dtype="datetime64[s]")
+        self.feed_dates = np.array(feed_dates, dtype="datetime64[D]")
+        self.titles = np.array([title or "" for title in titles], dtype=object)
+        self.lower_titles = [title.lower() for title in self.titles]
+
+        scores = np.array([negative, neutral, positive], dtype=np.float64)
+        greatest = np.fmax(np.fmax(scores[0], scores[1]), scores[2])
+        # Same precedence as the SQL CASE: negative, then positive, else neutral
+        self.sentiments = np.where(
+            scores[0] == greatest, 0, np.where(scores[2] == greatest, 2, 1)
+        ).astype(np.int8)
+
+        flat_word_ids: List[int] = []
+        row_lengths = np.zeros(self.size, dtype=np.int64)
+        for row_index, row_word_ids in enumerate(word_ids):
+            row_word_ids = row_word_ids or []
+            flat_word_ids.extend(row_word_ids)
+            row_lengths[row_index] = len(row_word_ids)
+
+        self.word_ids = np.array(flat_word_ids, dtype=np.int32)
+        self.word_rows = np.repeat(np.arange(self.size, dtype=np.int64), row_lengths)
+
+    def covers(self, filters: FeedDBFilters) -> bool:
+        """
+        Checks whether the date range of the filters falls inside the snapshot window.
+
+        The snapshot is a copy of the feeds table: a range starting before the
+        archive boundary includes archived feeds, and is read from the database.
+
+        Args:
+            filters (FeedDBFilters): The request filters.
+
+        Returns:
+            bool: True if the snapshot can answer the query, False otherwise.
+        """
+        start = parse_filter_date(filters.start_date)
+        return (
+            start is not None
+            and start.date() >= self.start_date
+            and not archive_boundary.spans(filters.start_date)
+            and not filters.story_id
+            and filters.model_id in (None, config.SENTIMENT_MODEL_ID)
+        )
+
+    def _title_mask(self, free_text: str) -> np.ndarray:
+        if not any(char in free_text for char in "%_\\"):
+            needle = free_text.lower()
+            matches = (needle in title for title in self.lower_titles)
+        else:
+            regex = _like_to_regex(f"%{free_text}%")
+            matches = (regex.fullmatch(title) is not None for title in self.titles)
+        return np.fromiter(matches, dtype=bool, count=self.size)
+
+    def _words_mask(self, word_ids: Optional[List[int]]) -> np.ndarray:
+        if word_ids is None:
+            return np.zeros(self.size, dtype=bool)
+
+        mask = np.ones(self.size, dtype=bool)
+        for word_id in set(word_ids):
+            has_word = np.zeros(self.size, dtype=bool)
+            has_word[self.word_rows[self.word_ids == word_id]] = True
+            mask &= has_word
+        return mask
+
+    def _grouped_mask(self, filters: FeedDBFilters) -> np.ndarray:
+        """Row mask equivalent to the WHERE clause of get_sentiment_grouped()."""
+        mask = np.ones(self.size, dtype=bool)
+
+        if start := parse_filter_date(filters.start_date):
+            mask &= self.published >= np.datetime64(start)
+        if end := parse_filter_date(filters.end_date):
+            mask &= self.published <= np.datetime64(end)
+        if filters.free_text:
+            mask &= self._title_mask(filters.free_text)
+        if filters.words:
+            mask &= self._words_mask(filters.word_ids)
+
+        return mask
+
+    def _conditions_mask(self, filters: FeedDBFilters) -> np.ndarray:
+        """Row mask equivalent to FeedDBFilters.conditions."""
+        mask = np.ones(self.size, dtype=bool)
+
+        if start := parse_filter_date(filters.start_date):
+            mask &= self.feed_dates >= np.datetime64(start.date())
+        if end := parse_filter_date(filters.end_date):
+            mask &= self.feed_dates <= np.datetime64(end.date())
+        if filters.words:
+            mask &= self._words_mask(filters.word_ids)
+        if filters.sources:
+            sources = np.array(
+                [int(source) for source in filters.sources], dtype=np.int32
+            )
+            mask &= np.isin(self.source_ids, sources)
+        if filters.free_text:
+            mask &= self._title_mask(filters.free_text)
+
+        return mask
+
+    def _count_by(
+        self, filters: FeedDBFilters, group_by: str, bucket: str = "day"
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        if group_by == "source_id":
+            keys = self.source_ids
+        else:
+            keys = truncate_days(self.feed_dates, bucket)
+        mask = self._grouped_mask(filters)
+
+        unique_keys, key_index = np.unique(keys[mask], return_inverse=True)
+        counts = np.bincount(
+            key_index * 3 + self.sentiments[mask], minlength=len(unique_keys) * 3
+        ).reshape(-1, 3)
+
+        return unique_keys, counts
+
+    def sentiment_grouped(
+        self, filters: FeedDBFilters, group_by: str = "source_id"
+    ) -> list:
+        """
+        Counts feeds per key and dominant sentiment, the same rows get_sentiment_grouped() returns.
+
+        Args:
+            filters (FeedDBFilters): The request filters.
+            group_by (str): "source_id" or "feed_date".
+
+        Returns:
+            list: (key, negative, neutral, positive) count tuples ordered by key.
+        """
+        keys, counts = self._count_by(filters, group_by)
+        return [(key, *counts[i].tolist()) for i, key in enumerate(keys.tolist())]
+
+    def sentiment_series(
+        self, filters: FeedDBFilters, group_by: str = "source_id"
+    ) -> Tuple[list, Dict[str, List[int]]]:
+        """
+        Builds the chart series directly from the dense count matrix.
+
+        Args:
+            filters (FeedDBFilters): The request filters.
+            group_by (str): "source_id" or "feed_date".
+
+        Returns:
+            tuple: The sorted keys and a {"Negative", "Neutral", "Positive"} dict of aligned count lists.
+        """
+        keys, counts = self._count_by(filters, group_by)
+        series = {name: counts[:, i].tolist() for i, name in enumerate(SERIES_NAMES)}
+        return keys.tolist(), series
+
+    def sentiment_over_time(
+        self, filters: FeedDBFilters, axis: List[date], bucket: str
+    ) -> Dict[str, List[int]]:
+        """
+        Counts feeds per time bucket and dominant sentiment, like get_sentiment_over_time().
+
+        Args:
+            filters (FeedDBFilters): The request filters.
+            axis (List[date]): The first days of the buckets, see bucket_axis().
+            bucket (str): "day", "week" or "month".
+
+        Returns:
+            Dict[str, List[int]]: The count lists of the series, aligned with the axis.
+        """
+        keys, counts = self._count_by(filters, "feed_date", bucket)
+        axis_days = np.array(axis, dtype="datetime64[D]")
+
+        positions = np.searchsorted(axis_days, keys)
+        inside = positions < len(axis_days)
+        inside[inside] &= axis_days[positions[inside]] == keys[inside]
+
+        dense = np.zeros((len(axis_days), 3), dtype=np.int64)
+        dense[positions[inside]] = counts[inside]
+        return {name: dense[:, i].tolist() for i, name in enumerate(SERIES_NAMES)}
+
+    def most_common_words(
+        self,
+        filters: FeedDBFilters,
+        most_common: int = 20,
+        ignored_words: Optional[List[str]] = None,
+    ) -> List[Tuple[str, int]]:
+        """
+        Counts the words of the filtered feeds, like get_most_common_words().
+
+        Args:
+            filters (FeedDBFilters): The request filters.
+            most_common (int): The number of words to return.
+            ignored_words (List[str], optional): Words left out of the ranking.
+
+        Returns:
+            List[Tuple[str, int]]: (word, count) pairs, most common first.
+        """
+        mask = self._conditions_mask(filters)
+        counts = np.bincount(self.word_ids[mask[self.word_rows]])
+
+        with session_scope() as session:
+            ignored_ids = vocabulary.get_ids(session, ignored_words or [])
+            counts[[i for i in ignored_ids if i is not None and i < len(counts)]] = 0
+
+            top = [
+                i for i in np.argsort(-counts, kind="stable")[:most_common] if counts[i]
+            ]
+            words = vocabulary.get_words(session, [int(i) for i in top])
+
+        return [(word, int(counts[i])) for word, i in zip(words, top)]
+
+
+def load_feed_snapshot(days: int) -> FeedSnapshot:
+    """
+    Loads the feeds of the last given days into a new snapshot.
+
+    Args:
+        days (int): The size of the snapshot window in days.
+
+    Returns:
+        FeedSnapshot: The loaded snapshot.
+    """
+    start_date = date.today() - timedelta(days=days)
+
+    with session_scope() as session:
+        last_feed_id = session.query(func.max(Feeds.id)).scalar()
+        rows = (
+            session.query(
+                Feeds.source_id,
+                Feeds.published,
+                Feeds.feed_date,
+                Feeds.title,
+                Feeds.word_ids,
+                Feeds.negative,
+                Feeds.positive,
+                Feeds.neutral,
+            )
+            .filter(Feeds.feed_date >= start_date)
+            .all()
+        )
+        # Warm the vocabulary cache so that mapping top words back is a dict lookup
+        vocabulary.get_words(session, list({i for row in rows for i in row[4] or []}))
+
+    return FeedSnapshot(rows, start_date=start_date, last_feed_id=last_feed_id)
+
+
+def refresh_feed_snapshot() -> Optional[FeedSnapshot]:
+    """
+    Reloads the shared snapshot unconditionally, e.g. right after an ingest run.
+
+    Returns:
+        FeedSnapshot or None: The new snapshot, or None if the snapshot is disabled.
+    """
+    global _snapshot, _snapshot_checked_at
+
+    if not config.ANALYTICS_SNAPSHOT_DAYS:
+        return None
+
+    with _snapshot_lock:
+        _snapshot = load_feed_snapshot(config.ANALYTICS_SNAPSHOT_DAYS)
+        _snapshot_checked_at = time.monotonic()
+    return _snapshot
+
+
+def get_feed_snapshot() -> Optional[FeedSnapshot]:
+    """
+    Returns the shared snapshot, reloading it when new feeds were ingested.
+
+    The version check (max feed id) runs at most once per ANALYTICS_SNAPSHOT_TTL
+    seconds. While one request reloads the snapshot, the others keep using the previous one.
+
+    Returns:
+        FeedSnapshot or None: The snapshot, or None if it is disabled or not loaded yet.
+    """
+    global _snapshot, _snapshot_checked_at
+
+    if not config.ANALYTICS_SNAPSHOT_DAYS:
+        return None
+
+    if time.monotonic() - _snapshot_checked_at < config.ANALYTICS_SNAPSHOT_TTL:
+        return _snapshot
+
+    if not _snapshot_lock.acquire(blocking=False):
+        return _snapshot
+
+    try:
+        _snapshot_checked_at = time.monotonic()
+        with session_scope() as session:
+            last_feed_id = session.query(func.max(Feeds.id)).scalar()
+
+        if _snapshot is None or _snapshot.last_feed_id != last_feed_id:
+            _snapshot = load_feed_snapshot(config.ANALYTICS_SNAPSHOT_DAYS)
+    finally:
+        _snapshot_lock.release()
+
+    return _snapshot
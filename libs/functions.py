@@ -1,12 +1,25 @@
 import logging
+import os
 import re
 from typing import List
 
+# Precompiled once, these run for every ingested feed item
+FEED_URL_PATTERN = re.compile(r"/rss|/feed")
+PHOTO_VIDEO_PATTERN = re.compile(
+    r"\s*[-+]\s*(fotó(?:kkal)?|videó(?:kkal)?|fotók|videók)?[!.,;]?\s*$|\s+fotó\s*$",
+    re.IGNORECASE,
+)
+
 
 def setup_logging_to_file(log_file, log_level=logging.DEBUG) -> logging.Logger:
     """
     Sets up logging to a specified file with a given log level.
 
+    Calling it again for the same file returns the same logger without adding
+    another handler (which would write every record twice). The file is only
+    created by the first record, so importing a module that sets up a logger
+    leaves no empty log files behind.
+
     Args:
         log_file (str): The path to the log file.
         log_level (int): The logging level (default is logging.DEBUG).
@@ -19,11 +32,19 @@ def setup_logging_to_file(log_file, log_level=logging.DEBUG) -> logging.Logger:
     logger = logging.getLogger(log_file)
     logger.setLevel(log_level)  # Set the log level for the logger
 
+    log_path = os.path.abspath(log_file)
+    for handler in logger.handlers:
+        if (
+            isinstance(handler, logging.FileHandler)
+            and handler.baseFilename == log_path
+        ):
+            return logger
+
     # Create a formatter
     formatter = logging.Formatter("%(asctime)s | %(levelname)s | %(message)s")
 
     # Create a file handler for the log file
-    file_handler = logging.FileHandler(log_file)
+    file_handler = logging.FileHandler(log_file, delay=True)
     file_handler.setLevel(log_level)  # Set the log level for the file handler
     file_handler.setFormatter(formatter)
 
@@ -43,9 +64,7 @@ def clean_url(url: str) -> str:
     Returns:
         str: The cleaned URL.
     """
-    # Define regex pattern to match "/rss" or "/feed"
-    pattern = r"/rss|/feed"
-    return re.sub(pattern, "", url)
+    return FEED_URL_PATTERN.sub("", url)
 
 
 def remove_photo_video(text: str) -> str:
@@ -58,12 +77,7 @@ def remove_photo_video(text: str) -> str:
     Returns:
         str: The text with photo and video references removed.
     """
-
-    pattern = re.compile(
-        r"\s*[-+]\s*(fotó(?:kkal)?|videó(?:kkal)?|fotók|videók)?[!.,;]?\s*$|\s+fotó\s*$",
-        re.IGNORECASE,
-    )
-    return re.sub(pattern, "", text)
+    return PHOTO_VIDEO_PATTERN.sub("", text)
 
 
 def jsonify_query_result(query_result) -> List[dict]:
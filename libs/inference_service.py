@@ -0,0 +1,362 @@
+"""
+Local inference service: keeps the models in one process and scores the texts
+of concurrent requests in micro-batches.
+
+The web workers call it through score_texts(), so they never load the models.
+A batch is run as soon as it has max_batch texts, or max_wait_ms after its
+first request arrived, whichever comes first.
+
+Usage:
+    python -m libs.inference_service [--port 5001] [--max-batch 32] \
+        [--max-wait-ms 10] [--stub [--stub-latency-ms 20 --stub-per-item-ms 1]]
+"""
+
+import argparse
+import json
+import logging
+import threading
+import time
+import urllib.request
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import config
+from libs.functions import setup_logging_to_file
+
+# Upper bounds of the histogram buckets of the batch sizes and queue depths
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class Histogram:
+    """Cumulative histogram in the Prometheus sense (count of values <= bound)."""
+
+    def __init__(self, buckets: Sequence[float] = SIZE_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+
+    def to_prometheus(self, name: str) -> List[str]:
+        lines = [f"# TYPE {name} histogram"]
+        for bound, count in zip(self.buckets, self.counts):
+            lines.append(f'{name}_bucket{{le="{bound}"}} {count}')
+        lines.append(f'{name}_bucket{{le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum {self.sum}")
+        lines.append(f"{name}_count {self.count}")
+        return lines
+
+
+class MicroBatcher:
+    """
+    Coalesces the texts of concurrent requests into batches of one predict call,
+    and hands every request its own results.
+    """
+
+    def __init__(
+        self,
+        predict: Callable[[List[str]], List[dict]],
+        max_batch: int = config.INFERENCE_MAX_BATCH,
+        max_wait_ms: float = config.INFERENCE_MAX_WAIT_MS,
+        error_logger: Optional[logging.Logger] = None,
+    ):
+        """
+        Args:
+            predict (Callable): Scores a list of texts, one result per text.
+            max_batch (int): The most texts of a batch. A larger request is a batch on its own.
+            max_wait_ms (float): The longest a request waits for others to join its batch.
+            error_logger (Optional[logging.Logger]): Logs the failed batches (default:
+                the logger of the module).
+        """
+        self.predict = predict
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.error_logger = error_logger or logging.getLogger(__name__)
+
+        self.batch_sizes = Histogram()
+        self.queue_depths = Histogram()
+        self.batches = 0
+        self.errors = 0
+
+        # The texts, the future and the arrival time (time.monotonic()) of each request
+        self._pending: List[Tuple[List[str], Future, float]] = []
+        self._pending_texts = 0
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(
+            target=self._run, name="micro-batcher", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def queue_depth(self) -> int:
+        """The number of texts waiting for a batch."""
+        return self._pending_texts
+
+    def submit(self, texts: List[str]) -> Future:
+        """
+        Queues the texts of a request.
+
+        Args:
+            texts (List[str]): The texts to score.
+
+        Returns:
+            Future: Resolves to the results of the texts, in order.
+        """
+        future = Future()
+        if not texts:
+            future.set_result([])
+            return future
+
+        with self._condition:
+            if self._stopped:
+                raise RuntimeError("The micro-batcher is stopped")
+            self._pending.append((list(texts), future, time.monotonic()))
+            self._pending_texts += len(texts)
+            self._condition.notify()
+        return future
+
+    def score(self, texts: List[str], timeout: Optional[float] = None) -> List[dict]:
+        return self.submit(texts).result(timeout)
+
+    def stop(self) -> None:
+        """Runs the queued requests, then stops the batching thread."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        self._thread.join()
+
+    def _next_batch(self) -> List[Tuple[List[str], Future, float]]:
+        with self._condition:
+            while not self._pending and not self._stopped:
+                self._condition.wait()
+            if not self._pending:
+                return []
+
+            # The batch is open from the arrival of its first request on, for max_wait
+            # at most: a request queued behind a running batch doesn't wait it twice
+            deadline = self._pending[0][2] + self.max_wait
+            while self._pending_texts < self.max_batch and not self._stopped:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+            self.queue_depths.observe(self._pending_texts)
+
+            batch, size = [], 0
+            while self._pending:
+                texts = self._pending[0][0]
+                if batch and size + len(texts) > self.max_batch:
+                    break
+                batch.append(self._pending.pop(0))
+                size += len(texts)
+            self._pending_texts -= size
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+
+            texts = [text for request_texts, _, _ in batch for text in request_texts]
+            self.batches += 1
+            self.batch_sizes.observe(len(texts))
+
+            try:
+                results = self.predict(texts)
+            except Exception as error:
+                self.errors += 1
+                self.error_logger.error(f"Inference failed: {error}")
+                for _, future, _ in batch:
+                    future.set_exception(error)
+                continue
+
+            start = 0
+            for request_texts, future, _ in batch:
+                future.set_result(results[start : start + len(request_texts)])
+                start += len(request_texts)
+
+    def to_prometheus(self, prefix: str = "pow_inference") -> str:
+        """
+        Returns:
+            str: The metrics of the batcher in the Prometheus text exposition format.
+        """
+        lines = [
+            f"# TYPE {prefix}_queue_depth gauge",
+            f"{prefix}_queue_depth {self.queue_depth}",
+            f"# TYPE {prefix}_batches_total counter",
+            f"{prefix}_batches_total {self.batches}",
+            f"# TYPE {prefix}_errors_total counter",
+            f"{prefix}_errors_total {self.errors}",
+        ]
+        lines += self.batch_sizes.to_prometheus(f"{prefix}_batch_size")
+        lines += self.queue_depths.to_prometheus(f"{prefix}_queue_depth_at_batch")
+        return "\n".join(lines) + "\n"
+
+
+def predict_titles(texts: List[str]) -> List[dict]:
+    """
+    Scores texts with the sentiment and the emotion models.
+
+    Args:
+        texts (List[str]): The texts.
+
+    Returns:
+        List[dict]: {"sentiment": {...}, "emotion": {...}} of each text.
+    """
+    from libs import sentiment_analyzer
+
+    sentiments = sentiment_analyzer.predict_sentiments(texts)
+    emotions = sentiment_analyzer.predict_emotions(texts)
+    return [
+        {"sentiment": sentiment, "emotion": emotion}
+        for sentiment, emotion in zip(sentiments, emotions)
+    ]
+
+
+def score_texts(
+    texts: List[str],
+    url: str = config.INFERENCE_SERVICE_URL,
+    timeout: float = config.INFERENCE_TIMEOUT,
+) -> List[dict]:
+    """
+    Scores texts with the inference service.
+
+    Args:
+        texts (List[str]): The texts.
+        url (str): The base URL of the service.
+        timeout (float): Seconds to wait for the results.
+
+    Returns:
+        List[dict]: {"sentiment": {...}, "emotion": {...}} of each text.
+
+    Raises:
+        OSError: The service is not running, did not answer in time or failed.
+    """
+    request = urllib.request.Request(
+        f"{url}/score",
+        data=json.dumps({"texts": texts}).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())["results"]
+
+
+class InferenceRequestHandler(BaseHTTPRequestHandler):
+    """POST /score {"texts": [...]} -> {"results": [...]}, GET /metrics."""
+
+    batcher: MicroBatcher = None
+
+    def _send(self, status: int, body: str, content_type: str) -> None:
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            self._send(200, self.batcher.to_prometheus(), "text/plain; version=0.0.4")
+        else:
+            self._send(404, json.dumps({"error": "not found"}), "application/json")
+
+    def do_POST(self):
+        if self.path != "/score":
+            self._send(404, json.dumps({"error": "not found"}), "application/json")
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            texts = json.loads(self.rfile.read(length))["texts"]
+            if not isinstance(texts, list) or not all(
+                isinstance(text, str) and text for text in texts
+            ):
+                raise ValueError("texts must be a list of non-empty strings")
+        except (KeyError, TypeError, ValueError) as error:
+            self._send(400, json.dumps({"error": str(error)}), "application/json")
+            return
+
+        try:
+            results = self.batcher.score(texts, timeout=config.INFERENCE_TIMEOUT)
+        except Exception as error:
+            self._send(503, json.dumps({"error": str(error)}), "application/json")
+            return
+
+        self._send(200, json.dumps({"results": results}), "application/json")
+
+    def log_message(self, format, *args):
+        # One line per request would flood the output
+        pass
+
+
+def main(argv=None) -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=5001)
+    arg_parser.add_argument("--max-batch", type=int, default=config.INFERENCE_MAX_BATCH)
+    arg_parser.add_argument(
+        "--max-wait-ms", type=float, default=config.INFERENCE_MAX_WAIT_MS
+    )
+    arg_parser.add_argument(
+        "--stub",
+        action="store_true",
+        help="score with the stub model of libs.stub_classifier",
+    )
+    arg_parser.add_argument("--stub-latency-ms", type=float, default=20.0)
+    arg_parser.add_argument("--stub-per-item-ms", type=float, default=1.0)
+    arguments = arg_parser.parse_args(argv)
+
+    if arguments.stub:
+        from libs.stub_classifier import StubClassifier
+
+        classifier = StubClassifier(
+            arguments.stub_latency_ms, arguments.stub_per_item_ms
+        )
+
+        def predict(texts: List[str]) -> List[dict]:
+            return [
+                {"sentiment": sentiment, "emotion": emotion}
+                for sentiment, emotion in zip(
+                    classifier.predict_sentiments(texts),
+                    classifier.predict_emotions(texts),
+                )
+            ]
+
+    else:
+        from libs.sentiment_analyzer import load_models
+
+        load_models()
+        predict = predict_titles
+
+    InferenceRequestHandler.batcher = MicroBatcher(
+        predict,
+        max_batch=arguments.max_batch,
+        max_wait_ms=arguments.max_wait_ms,
+        error_logger=setup_logging_to_file("error.log"),
+    )
+    server = ThreadingHTTPServer(
+        (arguments.host, arguments.port), InferenceRequestHandler
+    )
+    print(f"Inference service on http://{arguments.host}:{arguments.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        InferenceRequestHandler.batcher.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import json
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+
+class StageTiming:
+    """Call count, total and slowest duration of a stage."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "total_seconds": round(self.total, 6),
+            "max_seconds": round(self.max, 6),
+        }
+
+
+class RunMetrics:
+    """
+    Per-run metrics of a job: stage timings and counters, globally and per source.
+
+    A run is written as one JSON line (history) and as a Prometheus text file
+    (last run, for the node_exporter textfile collector).
+    """
+
+    def __init__(self, job: str):
+        """
+        Starts the metrics of a new run.
+
+        Args:
+            job (str): The name of the job, used as metric label.
+        """
+        self.job = job
+        self.started_at = datetime.now()
+        self._start = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.stages: Dict[Tuple[str, Optional[str]], StageTiming] = defaultdict(
+            StageTiming
+        )
+        self.counters: Dict[Tuple[str, Optional[str]], int] = defaultdict(int)
+        self.gauges: Dict[str, float] = {}
+
+    @contextmanager
+    def timer(self, stage: str, source: Optional[str] = None):
+        """
+        Times the enclosed block as one call of a stage.
+
+        Args:
+            stage (str): The stage name, e.g. "fetch" or "db_write".
+            source (str, optional): The source the stage ran for.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, source=source)
+
+    def observe(self, stage: str, seconds: float, source: Optional[str] = None) -> None:
+        self.stages[(stage, source)].observe(seconds)
+        if source is not None:
+            self.stages[(stage, None)].observe(seconds)
+
+    def increment(self, counter: str, value: int = 1, source: Optional[str] = None):
+        self.counters[(counter, source)] += value
+        if source is not None:
+            self.counters[(counter, None)] += value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        self.gauges[name] = value
+
+    def finish(self) -> None:
+        """Stops the run clock."""
+        self.duration = time.perf_counter() - self._start
+
+    def to_dict(self) -> dict:
+        """
+        Returns the metrics as a JSON-serializable dict.
+
+        Returns:
+            dict: The run, with the global stages/counters and a "sources" breakdown.
+        """
+        result = {
+            "job": self.job,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "duration_seconds": round(
+                self.duration or time.perf_counter() - self._start, 6
+            ),
+            "stages": {},
+            "counters": {},
+            "gauges": dict(self.gauges),
+            "sources": defaultdict(lambda: {"stages": {}, "counters": {}}),
+        }
+
+        for (stage, source), timing in sorted(self.stages.items(), key=str):
+            target = result if source is None else result["sources"][source]
+            target["stages"][stage] = timing.to_dict()
+
+        for (counter, source), value in sorted(self.counters.items(), key=str):
+            target = result if source is None else result["sources"][source]
+            target["counters"][counter] = value
+
+        result["sources"] = dict(result["sources"])
+        return result
+
+    def write_json_line(self, path: str) -> None:
+        """
+        Appends the run to a JSON lines file.
+
+        Args:
+            path (str): The path of the file.
+        """
+        with open(path, "a", encoding="utf-8") as metrics_file:
+            metrics_file.write(json.dumps(self.to_dict(), ensure_ascii=False) + "\n")
+
+    def to_prometheus(self, prefix: str = "pow") -> str:
+        """
+        Formats the run in the Prometheus text exposition format.
+
+        Args:
+            prefix (str): The metric name prefix.
+
+        Returns:
+            str: The metrics text.
+        """
+        name = f"{prefix}_{self.job}"
+        lines = [
+            f"# TYPE {name}_last_run_timestamp_seconds gauge",
+            f"{name}_last_run_timestamp_seconds {self.started_at.timestamp():.0f}",
+            f"# TYPE {name}_run_duration_seconds gauge",
+            f"{name}_run_duration_seconds {self.to_dict()['duration_seconds']}",
+        ]
+
+        def labels(**values) -> str:
+            pairs = [f'{key}="{value}"' for key, value in values.items() if value]
+            return "{" + ",".join(pairs) + "}"
+
+        for metric, attribute in (
+            ("stage_calls", "count"),
+            ("stage_seconds", "total"),
+            ("stage_max_seconds", "max"),
+        ):
+            lines.append(f"# TYPE {name}_{metric} gauge")
+            for (stage, source), timing in sorted(self.stages.items(), key=str):
+                value = getattr(timing, attribute)
+                lines.append(
+                    f"{name}_{metric}{labels(stage=stage, source=source)} {value}"
+                )
+
+        lines.append(f"# TYPE {name}_items gauge")
+        for (counter, source), value in sorted(self.counters.items(), key=str):
+            lines.append(f"{name}_items{labels(kind=counter, source=source)} {value}")
+
+        for gauge, value in sorted(self.gauges.items()):
+            lines.append(f"# TYPE {name}_{gauge} gauge")
+            lines.append(f"{name}_{gauge} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """
+        Writes the run to a Prometheus text file, replacing it atomically.
+
+        Args:
+            path (str): The path of the .prom file.
+        """
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as metrics_file:
+            metrics_file.write(self.to_prometheus())
+        os.replace(temporary_path, path)
@@ -0,0 +1,199 @@
+import hashlib
+import re
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.feed_lsh_buckets import FeedLshBuckets
+
+SHINGLE_SIZE = 5
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+LSH_ROWS = MINHASH_PERMUTATIONS // LSH_BANDS
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+# Fixed seed: the signatures are persisted, they must not change between processes
+_random_state = np.random.RandomState(seed=1)
+_PERMUTATION_A = _random_state.randint(
+    1, (1 << 61) - 1, size=MINHASH_PERMUTATIONS, dtype=np.uint64
+)
+_PERMUTATION_B = _random_state.randint(
+    0, (1 << 61) - 1, size=MINHASH_PERMUTATIONS, dtype=np.uint64
+)
+
+NON_WORD_PATTERN = re.compile(r"[\W_]+")
+
+CANDIDATES_QUERY = """
+    SELECT DISTINCT f.id, f.story_id, f.title
+    FROM feed_lsh_buckets b
+    JOIN unnest(CAST(:bands AS smallint[]), CAST(:buckets AS bigint[])) AS q(band, bucket)
+        ON b.band = q.band AND b.bucket = q.bucket
+    JOIN feeds f ON f.id = b.feed_id
+    WHERE f.published >= :since AND f.title IS NOT NULL
+"""
+
+
+@dataclass
+class StoryMatch:
+    feed_id: int
+    story_id: int
+    similarity: float
+
+
+def normalize_title(title: str) -> str:
+    """
+    Lowercases a title and reduces its punctuation and whitespace to single spaces.
+
+    Args:
+        title (str): The title.
+
+    Returns:
+        str: The normalized title.
+    """
+    return NON_WORD_PATTERN.sub(" ", title.lower()).strip()
+
+
+def shingles(title: str, size: int = SHINGLE_SIZE) -> Set[str]:
+    """
+    Splits a title into overlapping character shingles.
+
+    Character shingles are robust to the suffixes of Hungarian words, so reworded
+    and reinflected titles still share most of them.
+
+    Args:
+        title (str): The title.
+        size (int): The shingle length.
+
+    Returns:
+        Set[str]: The shingles of the normalized title.
+    """
+    normalized = normalize_title(title)
+    if len(normalized) <= size:
+        return {normalized}
+    return {normalized[i : i + size] for i in range(len(normalized) - size + 1)}
+
+
+def minhash_signature(title: str) -> np.ndarray:
+    """
+    Computes the MinHash signature of a title.
+
+    Args:
+        title (str): The title.
+
+    Returns:
+        np.ndarray: MINHASH_PERMUTATIONS uint64 values.
+    """
+    hashes = np.fromiter(
+        (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles(title)),
+        dtype=np.uint64,
+    )
+    # (a * x + b) mod p for every permutation at once; uint64 overflow is intended
+    permuted = (
+        np.outer(hashes, _PERMUTATION_A) + _PERMUTATION_B
+    ) % _MERSENNE_PRIME & _MAX_HASH
+    return permuted.min(axis=0)
+
+
+def similarity(signature_a: np.ndarray, signature_b: np.ndarray) -> float:
+    """
+    Estimates the Jaccard similarity of two titles from their signatures.
+
+    Args:
+        signature_a (np.ndarray): The first signature.
+        signature_b (np.ndarray): The second signature.
+
+    Returns:
+        float: The estimated similarity, between 0 and 1.
+    """
+    return float(np.mean(signature_a == signature_b))
+
+
+def lsh_buckets(signature: np.ndarray) -> List[Tuple[int, int]]:
+    """
+    Hashes every band of a signature into a bucket.
+
+    Args:
+        signature (np.ndarray): The MinHash signature.
+
+    Returns:
+        List[Tuple[int, int]]: (band, bucket) pairs, the buckets as signed 64-bit ints.
+    """
+    buckets = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * LSH_ROWS : (band + 1) * LSH_ROWS]
+        digest = hashlib.blake2b(rows.tobytes(), digest_size=8).digest()
+        buckets.append((band, int.from_bytes(digest, "big", signed=True)))
+    return buckets
+
+
+def find_similar_feed(
+    session: Session,
+    signature: np.ndarray,
+    published: datetime,
+    min_similarity: float,
+    window_days: int,
+) -> Optional[StoryMatch]:
+    """
+    Finds the most similar clustered feed published around the same time.
+
+    Only the feeds sharing at least one LSH bucket are compared, so the lookup
+    does not depend on the size of the feeds table.
+
+    Args:
+        session (Session): The SQLAlchemy session.
+        signature (np.ndarray): The MinHash signature of the new title.
+        published (datetime): The publication time of the new feed.
+        min_similarity (float): The minimum estimated similarity of a match.
+        window_days (int): How many days back to look for the same story.
+
+    Returns:
+        StoryMatch or None: The best match, or None if the title is a new story.
+    """
+    bands, buckets = zip(*lsh_buckets(signature))
+    candidates = session.execute(
+        text(CANDIDATES_QUERY),
+        {
+            "bands": list(bands),
+            "buckets": list(buckets),
+            "since": published - timedelta(days=window_days),
+        },
+    ).all()
+
+    best_match = None
+    for feed_id, story_id, title in candidates:
+        score = similarity(signature, minhash_signature(title))
+        if score >= min_similarity and (
+            best_match is None or score > best_match.similarity
+        ):
+            best_match = StoryMatch(feed_id, story_id or feed_id, score)
+
+    return best_match
+
+
+def index_feed(session: Session, feed_id: int, signature: np.ndarray) -> None:
+    """
+    Adds the LSH buckets of a feed to the index.
+
+    Args:
+        session (Session): The SQLAlchemy session.
+        feed_id (int): The id of the feed.
+        signature (np.ndarray): The MinHash signature of its title.
+    """
+    session.execute(
+        insert(FeedLshBuckets)
+        .values(
+            [
+                {"band": band, "bucket": bucket, "feed_id": feed_id}
+                for band, bucket in lsh_buckets(signature)
+            ]
+        )
+        .on_conflict_do_nothing()
+    )
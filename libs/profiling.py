@@ -0,0 +1,212 @@
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Optional
+
+from flask import (
+    Flask,
+    before_render_template,
+    g,
+    has_request_context,
+    request,
+    template_rendered,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+import config
+from libs.functions import setup_logging_to_file
+
+# Set by initialize_profiling(), profiling.log is only created when profiling is on
+profiling_logger: Optional[logging.Logger] = None
+
+
+class StackSampler:
+    """
+    Samples the call stack of one thread at a fixed interval.
+
+    The samples are written in the folded format ("outer;inner count" per line)
+    read by flamegraph.pl, speedscope and inferno.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        """
+        Args:
+            thread_id (int): The ident of the sampled thread.
+            interval (float): Seconds between two samples.
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                filename = os.path.basename(code.co_filename)
+                stack.append(f"{code.co_name} ({filename}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def write_folded(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as profile_file:
+            for stack, count in self.samples.most_common():
+                profile_file.write(f"{stack} {count}\n")
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+
+    if has_request_context() and "profile" in g:
+        g.profile["sql"] += elapsed
+        g.profile["queries"] += 1
+
+    if elapsed * 1000 < config.SLOW_QUERY_MS:
+        return
+
+    message = f"slow query {elapsed * 1000:.1f} ms: {statement} | params: {parameters}"
+    if (
+        config.SLOW_QUERY_EXPLAIN
+        and not executemany
+        and statement.lstrip().upper().startswith("SELECT")
+    ):
+        try:
+            message = f"{message}\n{_explain(cursor.connection, statement, parameters)}"
+        except Exception as error:
+            # The query itself succeeded, the request must not fail because of its plan
+            message = f"{message}\nEXPLAIN failed: {error}"
+    profiling_logger.warning(message)
+
+
+def _explain(connection, statement: str, parameters) -> str:
+    """
+    Explains a query on the DBAPI connection that ran it, so the EXPLAIN does not
+    re-enter the cursor listeners.
+
+    In a transaction the EXPLAIN runs in a savepoint: a failing statement would
+    otherwise abort the transaction of the request.
+
+    Returns:
+        str: The query plan.
+    """
+    savepoint = not getattr(connection, "autocommit", False)
+    explain_cursor = connection.cursor()
+    try:
+        if savepoint:
+            explain_cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            explain_cursor.execute(f"EXPLAIN {statement}", parameters)
+            plan = "\n".join(row[0] for row in explain_cursor.fetchall())
+        except Exception:
+            if savepoint:
+                explain_cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            raise
+        if savepoint:
+            explain_cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        return plan
+    finally:
+        explain_cursor.close()
+
+
+def _before_render_template(sender, template, context, **extra):
+    if "profile" in g:
+        g.profile["render_start"] = time.perf_counter()
+
+
+def _template_rendered(sender, template, context, **extra):
+    if "profile" in g and "render_start" in g.profile:
+        g.profile["render"] += time.perf_counter() - g.profile.pop("render_start")
+
+
+def initialize_profiling(app: Flask) -> None:
+    """
+    Adds per-request phase timings (SQL, template rendering, Python), a slow
+    query log with EXPLAIN plans, and an optional sampling profiler to the app.
+
+    The timings are logged to profiling.log and returned in a Server-Timing
+    header. Requests of config.SAMPLING_PROFILER_ENDPOINT are sampled and their
+    stacks written to config.PROFILES_DIR.
+
+    Args:
+        app (Flask): The Flask application instance.
+    """
+    global profiling_logger
+    profiling_logger = setup_logging_to_file("profiling.log")
+
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    before_render_template.connect(_before_render_template, app)
+    template_rendered.connect(_template_rendered, app)
+
+    @app.before_request
+    def start_profile():
+        g.profile = {
+            "start": time.perf_counter(),
+            "sql": 0.0,
+            "queries": 0,
+            "render": 0.0,
+        }
+        if request.endpoint and request.endpoint == config.SAMPLING_PROFILER_ENDPOINT:
+            g.sampler = StackSampler(
+                threading.get_ident(), config.SAMPLING_PROFILER_INTERVAL_MS / 1000
+            )
+            g.sampler.start()
+
+    @app.after_request
+    def finish_profile(response):
+        if "profile" not in g:
+            return response
+
+        profile = g.profile
+        total = time.perf_counter() - profile["start"]
+        python = total - profile["sql"] - profile["render"]
+
+        response.headers["Server-Timing"] = ", ".join(
+            [
+                f"sql;dur={profile['sql'] * 1000:.1f}",
+                f"render;dur={profile['render'] * 1000:.1f}",
+                f"python;dur={python * 1000:.1f}",
+                f"total;dur={total * 1000:.1f}",
+            ]
+        )
+        profiling_logger.info(
+            f"{request.method} {request.full_path} {response.status_code} | "
+            f"total: {total * 1000:.1f} ms, sql: {profile['sql'] * 1000:.1f} ms "
+            f"({profile['queries']} queries), render: {profile['render'] * 1000:.1f} ms, "
+            f"python: {python * 1000:.1f} ms"
+        )
+        return response
+
+    @app.teardown_request
+    def stop_sampler(error=None):
+        # Also runs after an unhandled exception, unlike after_request
+        sampler = g.pop("sampler", None)
+        if sampler is None:
+            return
+
+        sampler.stop()
+        os.makedirs(config.PROFILES_DIR, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        sampler.write_folded(
+            os.path.join(config.PROFILES_DIR, f"{request.endpoint}-{timestamp}.folded")
+        )
@@ -0,0 +1,314 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+import config
+from app.models.sentiment_models import SentimentModels
+
+SENTIMENTS = ("negative", "positive", "neutral")
+
+# Shared by the models using the same tokenizer, loaded on first use
+_tokenizers: Dict[str, object] = {}
+
+
+def get_tokenizer(name: str):
+    """
+    Loads a tokenizer once per process.
+
+    Args:
+        name (str): The name or path of the tokenizer.
+
+    Returns:
+        PreTrainedTokenizerBase: The tokenizer.
+    """
+    if name not in _tokenizers:
+        from transformers import AutoTokenizer
+
+        _tokenizers[name] = AutoTokenizer.from_pretrained(name)
+    return _tokenizers[name]
+
+
+class TokenCache:
+    """
+    LRU cache of tokenized titles, keyed by the tokenizer and the md5 of the
+    title. Rescoring a title already seen only pads its cached token ids into
+    the batch tensors.
+    """
+
+    def __init__(self, max_entries: int):
+        """
+        Args:
+            max_entries (int): The number of titles kept, the least recently used go first.
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(tokenizer_key: Tuple[str, int], title: str) -> tuple:
+        return (*tokenizer_key, hashlib.md5(title.encode("utf-8")).hexdigest())
+
+    def encode(
+        self,
+        tokenizer_key: Tuple[str, int],
+        titles: List[str],
+        tokenize: Callable[[List[str]], dict],
+    ) -> List[dict]:
+        """
+        Returns the token ids of the titles, tokenizing only the ones not cached.
+
+        Args:
+            tokenizer_key (Tuple[str, int]): The tokenizer and its max length.
+            titles (List[str]): The titles.
+            tokenize (Callable): Tokenizes a list of titles without padding.
+
+        Returns:
+            List[dict]: The features (input_ids, attention_mask, ...) of each title.
+        """
+        keys = [self.key(tokenizer_key, title) for title in titles]
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    found[key] = self._entries[key]
+
+        missing = list(
+            {key: title for key, title in zip(keys, titles) if key not in found}.items()
+        )
+        with self._lock:
+            self.hits += len(titles) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            encoded = tokenize([title for _, title in missing])
+            for row, (key, _) in enumerate(missing):
+                found[key] = {name: encoded[name][row] for name in encoded.keys()}
+
+            with self._lock:
+                for key, _ in missing:
+                    self._entries[key] = found[key]
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+        return [found[key] for key in keys]
+
+    def save(self, path: str) -> None:
+        """
+        Writes the entries as JSON, least recently used first.
+
+        Args:
+            path (str): The path of the cache file.
+        """
+        with self._lock:
+            entries = [
+                [*key, {name: list(ids) for name, ids in features.items()}]
+                for key, features in self._entries.items()
+            ]
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(entries, file, separators=(",", ":"))
+
+    def load(self, path: str) -> None:
+        """
+        Loads the entries saved by a previous run, if there are any. The file
+        only holds token ids, so loading it runs no code.
+
+        Args:
+            path (str): The path of the cache file.
+        """
+        if not os.path.exists(path):
+            return
+        with open(path, encoding="utf-8") as file:
+            entries = json.load(file)
+        with self._lock:
+            for tokenizer, max_length, digest, features in entries:
+                self._entries[(tokenizer, max_length, digest)] = features
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+# Shared instance, one per process
+token_cache = TokenCache(config.TOKEN_CACHE_SIZE)
+
+
+class ScoringModel:
+    """
+    A sentiment model of the registry, called directly with tokenized batches
+    (no pipeline), so the models using the same tokenizer share the encodings.
+    """
+
+    def __init__(
+        self,
+        model_id: int,
+        model: str,
+        labels: Dict[str, str],
+        tokenizer: Optional[str] = None,
+        max_length: int = 128,
+        outputs: Sequence[str] = SENTIMENTS,
+    ):
+        """
+        Args:
+            model_id (int): The id of the model in sentiment_models.
+            model (str): The name or path of the model.
+            labels (Dict[str, str]): Output label of the model -> score name.
+            tokenizer (str, optional): The name or path of the tokenizer (default is the model).
+            max_length (int): The longest tokenized title, the rest is truncated.
+            outputs (Sequence[str]): The names of the scores, negative, positive and neutral
+                for the sentiment models.
+        """
+        self.id = model_id
+        self.model_name = model
+        self.labels = labels
+        self.tokenizer_name = tokenizer or model
+        self.max_length = max_length
+        self.outputs = outputs
+        self._model = None
+        self._columns: List[Optional[str]] = []
+
+    @classmethod
+    def from_row(cls, row: SentimentModels) -> "ScoringModel":
+        return cls(
+            model_id=row.id,
+            model=row.model,
+            labels=row.labels,
+            tokenizer=row.tokenizer,
+            max_length=row.max_length,
+        )
+
+    @property
+    def tokenizer_key(self) -> Tuple[str, int]:
+        """The models with the same key can score the same encodings."""
+        return self.tokenizer_name, self.max_length
+
+    def load(self) -> None:
+        if self._model is not None:
+            return
+
+        from transformers import AutoModelForSequenceClassification
+
+        self._model = AutoModelForSequenceClassification.from_pretrained(
+            self.model_name
+        ).eval()
+        # Score name of each output column, from the label names of the model
+        id2label = self._model.config.id2label
+        self._columns = [self.labels.get(id2label[i]) for i in range(len(id2label))]
+
+    def tokenize(self, titles: List[str], cache: Optional[TokenCache] = None):
+        """
+        Args:
+            titles (List[str]): The titles of a batch.
+            cache (TokenCache, optional): Reuses the token ids of the titles tokenized before.
+
+        Returns:
+            BatchEncoding: The padded tensors of the batch.
+        """
+        tokenizer = get_tokenizer(self.tokenizer_name)
+        if cache is None:
+            return tokenizer(
+                titles,
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="pt",
+            )
+
+        features = cache.encode(
+            self.tokenizer_key,
+            titles,
+            lambda missing: tokenizer(
+                missing, truncation=True, max_length=self.max_length
+            ),
+        )
+        return tokenizer.pad(features, return_tensors="pt")
+
+    def predict(self, encoded) -> List[dict]:
+        """
+        Scores a tokenized batch.
+
+        Args:
+            encoded (Mapping[str, Tensor]): The padded tensors of the batch.
+
+        Returns:
+            List[dict]: The scores of each title.
+        """
+        import torch
+
+        self.load()
+        with torch.inference_mode():
+            probabilities = self._model(**encoded).logits.softmax(dim=-1).tolist()
+        return [self.to_scores(row) for row in probabilities]
+
+    def to_scores(self, probabilities: Sequence[float]) -> dict:
+        scores = dict.fromkeys(self.outputs, 0.0)
+        for name, probability in zip(self._columns, probabilities):
+            if name is not None:
+                scores[name] = probability
+        return scores
+
+
+def load_active_models(
+    session: Session, model_ids: Optional[List[int]] = None
+) -> List[ScoringModel]:
+    """
+    Args:
+        session (Session): The SQLAlchemy session.
+        model_ids (List[int], optional): Only these models (default is every active one).
+
+    Returns:
+        List[ScoringModel]: The active models, ordered by id.
+    """
+    query = session.query(SentimentModels).filter(SentimentModels.active.is_(True))
+    if model_ids:
+        query = query.filter(SentimentModels.id.in_(model_ids))
+    return [ScoringModel.from_row(row) for row in query.order_by(SentimentModels.id)]
+
+
+def score_titles(
+    models: List[ScoringModel],
+    titles: List[str],
+    needed: Dict[int, List[int]],
+    cache: Optional[TokenCache] = None,
+) -> Dict[int, List[dict]]:
+    """
+    Scores a batch of titles with several models. The titles are tokenized once
+    per tokenizer, and every model of the tokenizer scores its rows of the result.
+
+    Args:
+        models (List[ScoringModel]): The models.
+        titles (List[str]): The titles of the batch.
+        needed (Dict[int, List[int]]): Model id -> indices of the titles it scores.
+        cache (TokenCache, optional): Reuses the token ids of the titles tokenized before.
+
+    Returns:
+        Dict[int, List[dict]]: Model id -> scores, in the order of needed[model id].
+    """
+    groups = defaultdict(list)
+    for model in models:
+        if needed.get(model.id):
+            groups[model.tokenizer_key].append(model)
+
+    scores = {}
+    for group in groups.values():
+        rows = sorted({index for model in group for index in needed[model.id]})
+        encoded = group[0].tokenize([titles[index] for index in rows], cache=cache)
+        position = {index: row for row, index in enumerate(rows)}
+
+        for model in group:
+            selected = [position[index] for index in needed[model.id]]
+            if selected == list(range(len(rows))):
+                scores[model.id] = model.predict(encoded)
+            else:
+                subset = {key: tensor[selected] for key, tensor in encoded.items()}
+                scores[model.id] = model.predict(subset)
+
+    return scores
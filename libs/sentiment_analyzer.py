@@ -1,16 +1,85 @@
 # https://github.com/huggingface/transformers/tree/main
 # https://huggingface.co/bhadresh-savani/distilbert-base-uncased-emotion
 
-from transformers import AutoTokenizer, AutoModelForSequenceClassification, pipeline
+import time
+from typing import List, Optional
 
-# Initialize tokenizer and model for sentiment analysis
-sentiment_tokenizer = AutoTokenizer.from_pretrained("poltextlab/HunEmBERT3")
-sentiment_model = AutoModelForSequenceClassification.from_pretrained("poltextlab/HunEmBERT3")
-sentiment_classifier = pipeline('sentiment-analysis', model=sentiment_model, tokenizer=sentiment_tokenizer, top_k=None)
+from config import SENTIMENT_MODEL_ID
+from libs.scoring import ScoringModel, TokenCache
 
-# Initialize model for emotion classification
-emotion_classifier = pipeline("text-classification", model='bhadresh-savani/distilbert-base-uncased-emotion',
-                              top_k=None)
+SENTIMENT_MODEL = "poltextlab/HunEmBERT3"
+SENTIMENT_LABELS = {"LABEL_0": "neutral", "LABEL_1": "positive", "LABEL_2": "negative"}
+
+EMOTION_MODEL = "bhadresh-savani/distilbert-base-uncased-emotion"
+EMOTIONS = ("anger", "fear", "joy", "sadness", "love", "surprise")
+
+# Loaded on first use (load_models()), so importing this module stays cheap.
+# The models are called directly (tokenizer + model), without the pipelines.
+sentiment_model = ScoringModel(SENTIMENT_MODEL_ID, SENTIMENT_MODEL, SENTIMENT_LABELS)
+emotion_model = ScoringModel(
+    0, EMOTION_MODEL, {emotion: emotion for emotion in EMOTIONS}, outputs=EMOTIONS
+)
+
+# Seconds spent loading the models, reported by the ingest metrics
+MODEL_LOAD_SECONDS = 0.0
+_loaded = False
+
+
+def load_models() -> float:
+    """
+    Loads the sentiment and emotion models once per process.
+
+    Returns:
+        float: The seconds the models took to load.
+    """
+    global MODEL_LOAD_SECONDS, _loaded
+
+    if _loaded:
+        return MODEL_LOAD_SECONDS
+
+    load_start = time.perf_counter()
+    for model in (sentiment_model, emotion_model):
+        model.load()
+        model.tokenize(["warmup"])
+
+    MODEL_LOAD_SECONDS = time.perf_counter() - load_start
+    _loaded = True
+    return MODEL_LOAD_SECONDS
+
+
+def predict_sentiments(
+    texts: List[str], cache: Optional[TokenCache] = None
+) -> List[dict]:
+    """
+    Predicts the sentiment scores of a batch of texts in one model call.
+
+    Args:
+        texts (List[str]): The input texts, not empty.
+        cache (TokenCache, optional): Reuses the token ids of the texts tokenized before.
+
+    Returns:
+        List[dict]: The 'positive', 'negative' and 'neutral' scores of each text.
+    """
+    load_models()
+    return sentiment_model.predict(sentiment_model.tokenize(texts, cache=cache))
+
+
+def predict_emotions(
+    texts: List[str], cache: Optional[TokenCache] = None
+) -> List[dict]:
+    """
+    Predicts the emotion scores of a batch of texts in one model call.
+
+    Args:
+        texts (List[str]): The input texts, not empty.
+        cache (TokenCache, optional): Reuses the token ids of the texts tokenized before.
+
+    Returns:
+        List[dict]: The 'anger', 'fear', 'joy', 'sadness', 'love' and 'surprise'
+            scores of each text.
+    """
+    load_models()
+    return emotion_model.predict(emotion_model.tokenize(texts, cache=cache))
 
 
 def get_sentiment_prediction(text: str) -> dict:
@@ -27,21 +96,7 @@ def get_sentiment_prediction(text: str) -> dict:
     if not text:
         return {}
 
-    sentiment_prediction = sentiment_classifier(text)
-    negative, positive, neutral = 0.0, 0.0, 0.0
-    for prediction in sentiment_prediction[0]:
-        match prediction['label']:
-            case 'LABEL_0':
-                neutral = prediction['score']
-            case 'LABEL_1':
-                positive = prediction['score']
-            case 'LABEL_2':
-                negative = prediction['score']
-    return {
-        'positive': positive,
-        'negative': negative,
-        'neutral': neutral
-    }
+    return predict_sentiments([text])[0]
 
 
 def get_emotion_prediction(text: str) -> dict:
@@ -58,29 +113,5 @@ def get_emotion_prediction(text: str) -> dict:
 
     if not text:
         return {}
-    emotion_prediction = emotion_classifier(text)
-
-    anger, fear, joy, sadness, love, surprise = 0.0, 0.0, 0.0, 0.0, 0.0, 0.0
-    for prediction in emotion_prediction[0]:
-        match prediction['label']:
-            case 'anger':
-                anger = prediction['score']
-            case 'fear':
-                fear = prediction['score']
-            case 'joy':
-                joy = prediction['score']
-            case 'sadness':
-                sadness = prediction['score']
-            case 'love':
-                love = prediction['score']
-            case 'surprise':
-                surprise = prediction['score']
-
-    return {
-        'anger': anger,
-        'fear': fear,
-        'joy': joy,
-        'sadness': sadness,
-        'love': love,
-        'surprise': surprise,
-    }
+
+    return predict_emotions([text])[0]
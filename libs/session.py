@@ -206,16 +206,17 @@ class DBSession:
         return value.replace("'", "''") if isinstance(value, str) else value
 
 
-with DBSession(db_config=POW_DB_CONFIG) as session:
-    query = """
-        SELECT id, title, published, search_vector, source_id
-        FROM feeds
-        WHERE search_vector @@ to_tsquery('simple', 'háború & Orbán') and published > '2024-07-01 01:57:00'
-        order by published desc;
-    """
-    result = session.execute_query(query=query).fetchall()
-    # conditions = {"source_id": 4}
-    # columns = ["id", "title"]
-    # result = session.select(table="feeds", columns=columns, conditions=conditions)
-    for row in result:
-        print(row)
+if __name__ == "__main__":
+    with DBSession(db_config=POW_DB_CONFIG) as session:
+        query = """
+            SELECT id, title, published, search_vector, source_id
+            FROM feeds
+            WHERE search_vector @@ to_tsquery('simple', 'háború & Orbán') and published > '2024-07-01 01:57:00'
+            order by published desc;
+        """
+        result = session.execute_query(query=query).fetchall()
+        # conditions = {"source_id": 4}
+        # columns = ["id", "title"]
+        # result = session.select(table="feeds", columns=columns, conditions=conditions)
+        for row in result:
+            print(row)
@@ -0,0 +1,190 @@
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import FrozenSet, List, Optional, Tuple
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+import config
+from app.models.source_schedule import SourceSchedule
+
+# Leases the most overdue sources nobody holds; the locked rows are skipped, so
+# concurrent workers never wait for each other nor get the same source
+CLAIM_QUERY = """
+    UPDATE source_schedule
+    SET leased_by = :worker,
+        leased_until = now() + make_interval(secs => :lease_seconds)
+    FROM sources
+    WHERE sources.id = source_schedule.source_id
+      AND source_schedule.source_id IN (
+          SELECT source_id
+          FROM source_schedule
+          WHERE next_poll_at <= now()
+            AND (leased_until IS NULL OR leased_until < now())
+            AND (CAST(:shards AS integer) IS NULL OR source_id % :shards = :shard)
+          ORDER BY next_poll_at
+          LIMIT :limit
+          FOR UPDATE SKIP LOCKED
+      )
+    RETURNING source_schedule.source_id, sources.rss
+"""
+
+SCHEDULE_NEW_SOURCES_QUERY = """
+    INSERT INTO source_schedule (source_id)
+    SELECT id FROM sources
+    ON CONFLICT (source_id) DO NOTHING
+"""
+
+
+def next_interval(interval: int, new_items: Optional[int], failures: int = 0) -> int:
+    """
+    The poll interval of a source after a poll.
+
+    The interval moves towards the one that finds SCHEDULE_TARGET_NEW_ITEMS new
+    items per poll, by at most a factor of 2 per poll so a burst does not swing
+    it. A poll without new items lengthens it by half, a failed fetch doubles it
+    per consecutive failure.
+
+    Args:
+        interval (int): The current interval in seconds.
+        new_items (int, optional): The new items of the poll, None if the fetch failed.
+        failures (int): The consecutive failed fetches, including this one.
+
+    Returns:
+        int: The next interval in seconds, within the configured bounds.
+    """
+    if new_items is None:
+        interval *= 2 ** min(failures, 5)
+    elif new_items == 0:
+        interval *= 1.5
+    else:
+        interval *= min(max(config.SCHEDULE_TARGET_NEW_ITEMS / new_items, 0.5), 2)
+
+    return int(
+        min(max(interval, config.SCHEDULE_MIN_INTERVAL), config.SCHEDULE_MAX_INTERVAL)
+    )
+
+
+def schedule_new_sources(session: Session) -> None:
+    """
+    Adds the sources without a schedule, due right away.
+
+    Args:
+        session (Session): The SQLAlchemy session.
+    """
+    session.execute(text(SCHEDULE_NEW_SOURCES_QUERY))
+
+
+def claim_sources(
+    session: Session,
+    worker: str,
+    limit: int = config.SCHEDULE_CLAIM_BATCH,
+    shard: Optional[int] = None,
+    shards: Optional[int] = None,
+) -> List[Tuple[int, str]]:
+    """
+    Leases the due sources for a worker. Commit right after, so the other
+    workers see the lease.
+
+    Args:
+        session (Session): The SQLAlchemy session.
+        worker (str): The name of the worker.
+        limit (int): The most sources to lease.
+        shard (int, optional): Only the sources with source_id % shards == shard.
+        shards (int, optional): The number of shards (default is no sharding).
+
+    Returns:
+        List[Tuple[int, str]]: (source id, rss link) of the leased sources.
+    """
+    rows = session.execute(
+        text(CLAIM_QUERY),
+        {
+            "worker": worker,
+            "lease_seconds": config.SCHEDULE_LEASE_SECONDS,
+            "limit": limit,
+            "shard": shard or 0,
+            "shards": shards,
+        },
+    ).all()
+    return [(row.source_id, row.rss) for row in rows]
+
+
+def release_source(
+    session: Session, source_id: int, worker: str, new_items: Optional[int]
+) -> None:
+    """
+    Ends the lease of a polled source and schedules its next poll.
+
+    Args:
+        session (Session): The SQLAlchemy session.
+        source_id (int): The id of the source.
+        worker (str): The name of the worker holding the lease.
+        new_items (int, optional): The new items of the poll, None if the fetch failed.
+    """
+    schedule = session.get(SourceSchedule, source_id, with_for_update=True)
+    if schedule is None or schedule.leased_by != worker:
+        # The lease expired and another worker took the source over
+        return
+
+    schedule.failures = schedule.failures + 1 if new_items is None else 0
+    schedule.poll_interval = next_interval(
+        schedule.poll_interval, new_items, schedule.failures
+    )
+    # The clock of the database, the same the leases are checked against
+    schedule.next_poll_at = func.now() + timedelta(seconds=schedule.poll_interval)
+    schedule.last_polled_at = func.now()
+    schedule.last_new_items = new_items or 0
+    schedule.leased_by = None
+    schedule.leased_until = None
+
+
+@dataclass
+class FeedState:
+    """High-water mark of the feed of a source, as of its previous poll."""
+
+    content_hash: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    latest_published: Optional[datetime] = None
+    link_hashes: FrozenSet[str] = field(default_factory=frozenset)
+
+
+def get_feed_state(session: Session, source_id: int) -> FeedState:
+    """
+    Args:
+        session (Session): The SQLAlchemy session.
+        source_id (int): The id of the source.
+
+    Returns:
+        FeedState: The state of the previous poll, empty if there was none.
+    """
+    schedule = session.get(SourceSchedule, source_id)
+    if schedule is None:
+        return FeedState()
+
+    return FeedState(
+        content_hash=schedule.content_hash,
+        etag=schedule.etag,
+        last_modified=schedule.last_modified,
+        latest_published=schedule.latest_published,
+        link_hashes=frozenset(schedule.link_hashes or []),
+    )
+
+
+def save_feed_state(session: Session, source_id: int, state: FeedState) -> None:
+    """
+    Args:
+        session (Session): The SQLAlchemy session.
+        source_id (int): The id of the source.
+        state (FeedState): The state after the poll.
+    """
+    session.query(SourceSchedule).filter(SourceSchedule.source_id == source_id).update(
+        {
+            "content_hash": state.content_hash,
+            "etag": state.etag,
+            "last_modified": state.last_modified,
+            "latest_published": state.latest_published,
+            "link_hashes": sorted(state.link_hashes),
+        },
+        synchronize_session=False,
+    )
@@ -0,0 +1,199 @@
+"""
+Per-source sentiment statistics of a date window, merged from the daily
+sufficient statistics of source_day_stats (migrations/009_source_day_stats.sql).
+"""
+
+from datetime import date
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.source_day_stats import SourceDayStats
+from libs.feed_snapshot import SENTIMENT_NAMES
+
+# The normal quantile of the 95% confidence intervals
+Z_95 = 1.96
+
+# The columns of a window, in the order of compare_sources() rows
+STATS_COLUMNS = ["feeds"] + [f"{name}_feeds" for name in SENTIMENT_NAMES]
+STATS_COLUMNS += [
+    f"{name}_{stat}" for name in SENTIMENT_NAMES for stat in ("sum", "sum_sq")
+]
+
+WINDOW_STATS_QUERY = f"""
+    SELECT source_id, {", ".join(f"sum({column}) AS {column}" for column in STATS_COLUMNS)}
+    FROM source_day_stats
+    WHERE day >= :start_day AND day <= :end_day
+      AND (CAST(:source_ids AS integer[]) IS NULL OR source_id = ANY(:source_ids))
+    GROUP BY source_id
+    ORDER BY source_id
+"""
+
+
+def dominant_sentiment(scores: Dict[str, float]) -> str:
+    """
+    Args:
+        scores (Dict[str, float]): The negative, neutral and positive scores.
+
+    Returns:
+        str: The highest one; ties go to negative, then to positive, as in the charts.
+    """
+    highest = max(scores["negative"], scores["positive"], scores["neutral"])
+    if highest == scores["negative"]:
+        return "negative"
+    if highest == scores["positive"]:
+        return "positive"
+    return "neutral"
+
+
+def add_feed_stats(
+    session: Session, source_id: int, day: date, scores: Dict[str, float]
+) -> None:
+    """
+    Adds the scores of a new feed to the statistics of its source and day.
+
+    Args:
+        session (Session): The SQLAlchemy session.
+        source_id (int): The id of the source.
+        day (date): The date of the feed.
+        scores (Dict[str, float]): The negative, neutral and positive scores.
+    """
+    sentiment = dominant_sentiment(scores)
+    values = {"day": day, "source_id": source_id, "feeds": 1}
+    for name in SENTIMENT_NAMES:
+        values[f"{name}_feeds"] = int(name == sentiment)
+        values[f"{name}_sum"] = scores[name]
+        values[f"{name}_sum_sq"] = scores[name] ** 2
+
+    statement = insert(SourceDayStats).values(**values)
+    session.execute(
+        statement.on_conflict_do_update(
+            index_elements=["day", "source_id"],
+            set_={
+                column: getattr(SourceDayStats, column)
+                + getattr(statement.excluded, column)
+                for column in STATS_COLUMNS
+            },
+        )
+    )
+
+
+def get_window_stats(
+    session: Session,
+    start_day: date,
+    end_day: date,
+    source_ids: Optional[List[int]] = None,
+) -> list:
+    """
+    Merges the daily statistics of a date window, per source.
+
+    Args:
+        session (Session): The SQLAlchemy session.
+        start_day (date): The first day.
+        end_day (date): The last day.
+        source_ids (List[int], optional): Only these sources (default is all).
+
+    Returns:
+        list: (source_id, *STATS_COLUMNS) rows ordered by source id.
+    """
+    return session.execute(
+        text(WINDOW_STATS_QUERY),
+        {"start_day": start_day, "end_day": end_day, "source_ids": source_ids or None},
+    ).all()
+
+
+def variance_from_sums(
+    sums: np.ndarray, sums_sq: np.ndarray, counts: np.ndarray
+) -> np.ndarray:
+    """
+    The sample variances of groups from their count, sum and sum of squares.
+
+    Args:
+        sums (np.ndarray): The sums of the values.
+        sums_sq (np.ndarray): The sums of the squares of the values.
+        counts (np.ndarray): The numbers of values.
+
+    Returns:
+        np.ndarray: The variances, 0 for the groups of fewer than 2 values.
+    """
+    safe_counts = np.maximum(counts, 1)
+    # Rounding may make it slightly negative for constant values
+    squares = np.maximum(sums_sq - sums**2 / safe_counts, 0)
+    return np.where(counts > 1, squares / np.maximum(counts - 1, 1), 0.0)
+
+
+def compare_sources(rows: list) -> List[dict]:
+    """
+    The sentiment distribution and mean scores of each source, with 95%
+    confidence intervals, and how far each mean is from the other sources.
+
+    Args:
+        rows (list): (source_id, *STATS_COLUMNS) rows, see get_window_stats().
+
+    Returns:
+        List[dict]: Per source: "source_id", "feeds", "shares" (the share of the
+            feeds of each dominant sentiment, Wilson interval) and "scores" (the
+            mean of each score, normal interval, and the Welch z of the mean
+            against the feeds of all the other sources).
+    """
+    if not rows:
+        return []
+
+    data = np.array([row[1:] for row in rows], dtype=float)
+    columns = {column: data[:, index] for index, column in enumerate(STATS_COLUMNS)}
+    feeds = columns["feeds"]
+    total_feeds = feeds.sum()
+
+    results = [
+        {"source_id": int(row[0]), "feeds": int(count), "shares": {}, "scores": {}}
+        for row, count in zip(rows, feeds)
+    ]
+    for name in SENTIMENT_NAMES:
+        # Wilson score interval of the share of the sentiment
+        share = columns[f"{name}_feeds"] / feeds
+        denominator = 1 + Z_95**2 / feeds
+        center = (share + Z_95**2 / (2 * feeds)) / denominator
+        half_width = (
+            Z_95
+            * np.sqrt(share * (1 - share) / feeds + Z_95**2 / (4 * feeds**2))
+            / denominator
+        )
+
+        # Mean and sample variance of the score from its sums
+        sums, sums_sq = columns[f"{name}_sum"], columns[f"{name}_sum_sq"]
+        mean = sums / feeds
+        variance = variance_from_sums(sums, sums_sq, feeds)
+        standard_error = np.sqrt(variance / feeds)
+
+        # The other sources pooled, for the Welch z of the difference
+        other_feeds = total_feeds - feeds
+        other_mean = (sums.sum() - sums) / np.maximum(other_feeds, 1)
+        other_variance = variance_from_sums(
+            sums.sum() - sums, sums_sq.sum() - sums_sq, other_feeds
+        )
+        difference_error = np.sqrt(
+            variance / feeds + other_variance / np.maximum(other_feeds, 1)
+        )
+        z = np.where(
+            (other_feeds > 0) & (difference_error > 0),
+            (mean - other_mean) / np.where(difference_error > 0, difference_error, 1),
+            0.0,
+        )
+
+        for index, result in enumerate(results):
+            result["shares"][name] = {
+                "value": round(float(share[index]), 4),
+                "low": round(float(center[index] - half_width[index]), 4),
+                "high": round(float(center[index] + half_width[index]), 4),
+            }
+            result["scores"][name] = {
+                "mean": round(float(mean[index]), 4),
+                "low": round(float(mean[index] - Z_95 * standard_error[index]), 4),
+                "high": round(float(mean[index] + Z_95 * standard_error[index]), 4),
+                "z_vs_rest": round(float(z[index]), 2),
+            }
+
+    return results
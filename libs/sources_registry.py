@@ -0,0 +1,141 @@
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Iterable, List, Mapping, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+import config
+from app.models.sources import Sources
+from libs.database import session_scope
+
+# Changes whenever a source is added, removed or renamed
+VERSION_QUERY = """
+    SELECT md5(coalesce(string_agg(id || ':' || coalesce(name, ''), ',' ORDER BY id), ''))
+    FROM sources
+"""
+
+
+@dataclass(frozen=True)
+class RegisteredSource:
+    id: int
+    name: str
+    web: Optional[str] = None
+    rss: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class _Registry:
+    version: str
+    sources: Tuple[RegisteredSource, ...]
+    names: Mapping[int, str]
+
+
+class SourcesRegistry:
+    """
+    In-process, read-only copy of the sources table.
+
+    Every request reads the same immutable registry; it is replaced as a whole
+    when the version of the table changes. The version is checked at most once
+    per SOURCES_REFRESH_TTL seconds, so serving pages needs no query.
+    """
+
+    def __init__(self):
+        self._registry: Optional[_Registry] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """The number of loaded sources, 0 before the first load (which it never triggers)."""
+        registry = self._registry
+        return 0 if registry is None else len(registry.sources)
+
+    @staticmethod
+    def _version(session: Session) -> str:
+        return session.execute(text(VERSION_QUERY)).scalar()
+
+    def load(self, session: Session) -> None:
+        """
+        Loads the sources, e.g. before the web workers are forked.
+
+        Args:
+            session (Session): The SQLAlchemy session.
+        """
+        version = self._version(session)
+        sources = tuple(
+            RegisteredSource(row.id, row.name, row.web, row.rss)
+            for row in session.query(
+                Sources.id, Sources.name, Sources.web, Sources.rss
+            ).order_by(Sources.id)
+        )
+        self._registry = _Registry(
+            version=version,
+            sources=sources,
+            names=MappingProxyType({source.id: source.name for source in sources}),
+        )
+        self._checked_at = time.monotonic()
+
+    def refresh(self) -> None:
+        """Reloads the sources right away, e.g. after adding one."""
+        with self._lock, session_scope() as session:
+            self.load(session)
+
+    def _current(self) -> _Registry:
+        if self._registry is None:
+            with self._lock:
+                if self._registry is None:
+                    with session_scope() as session:
+                        self.load(session)
+            return self._registry
+
+        if time.monotonic() - self._checked_at < config.SOURCES_REFRESH_TTL:
+            return self._registry
+
+        # One thread checks the version, the others keep the current registry
+        if self._lock.acquire(blocking=False):
+            try:
+                self._checked_at = time.monotonic()
+                with session_scope() as session:
+                    if self._version(session) != self._registry.version:
+                        self.load(session)
+            finally:
+                self._lock.release()
+
+        return self._registry
+
+    @property
+    def sources(self) -> Tuple[RegisteredSource, ...]:
+        return self._current().sources
+
+    def names(self) -> Mapping[int, str]:
+        """
+        Returns:
+            Mapping[int, str]: The read-only source id -> name mapping.
+        """
+        return self._current().names
+
+    def choices(self) -> List[Tuple[str, str]]:
+        """
+        Returns:
+            List[Tuple[str, str]]: (id, name) pairs for select fields.
+        """
+        return [(str(source.id), source.name) for source in self.sources]
+
+    def categories(self, source_ids: Iterable[int]) -> List[str]:
+        """
+        Maps the source ids of a chart series to their names.
+
+        Args:
+            source_ids (Iterable[int]): The source ids, in the order of the series.
+
+        Returns:
+            List[str]: The names, the id for an unknown source.
+        """
+        names = self.names()
+        return [names.get(int(source_id), str(source_id)) for source_id in source_ids]
+
+
+# Shared instance, one per process
+sources_registry = SourcesRegistry()
@@ -0,0 +1,81 @@
+"""
+Stand-in for libs.sentiment_analyzer with a fixed latency and the same output shape.
+
+The scores are derived from the md5 of the text, so they are deterministic and
+sum to 1 like the softmax outputs of the real models. Used by the inference
+service with --stub, the benchmarks and the tests, none of which load a model.
+"""
+
+import hashlib
+import sys
+import time
+import types
+from typing import List, Sequence
+
+SENTIMENT_LABELS = ("positive", "negative", "neutral")
+EMOTION_LABELS = ("anger", "fear", "joy", "sadness", "love", "surprise")
+
+
+def stub_scores(text: str, labels: Sequence[str]) -> dict:
+    """
+    Deterministic pseudo scores of a text.
+
+    Args:
+        text (str): The text.
+        labels (Sequence[str]): The labels of the scores.
+
+    Returns:
+        dict: label -> score, the scores sum to 1.
+    """
+    digest = hashlib.md5(f"{labels[0]}:{text}".encode("utf-8")).digest()
+    weights = [digest[index] + 1 for index in range(len(labels))]
+    total = sum(weights)
+    return {label: weight / total for label, weight in zip(labels, weights)}
+
+
+class StubClassifier:
+    """A classifier taking latency_ms per call plus per_item_ms per text."""
+
+    def __init__(self, latency_ms: float = 0.0, per_item_ms: float = 0.0):
+        """
+        Args:
+            latency_ms (float): The fixed cost of a call (a batch).
+            per_item_ms (float): The cost of each text of a call.
+        """
+        self.latency_ms = latency_ms
+        self.per_item_ms = per_item_ms
+
+    def _wait(self, items: int) -> None:
+        delay = self.latency_ms + self.per_item_ms * items
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    def predict_sentiments(self, texts: List[str]) -> List[dict]:
+        self._wait(len(texts))
+        return [stub_scores(text, SENTIMENT_LABELS) for text in texts]
+
+    def predict_emotions(self, texts: List[str]) -> List[dict]:
+        self._wait(len(texts))
+        return [stub_scores(text, EMOTION_LABELS) for text in texts]
+
+    def get_sentiment_prediction(self, text: str) -> dict:
+        return self.predict_sentiments([text])[0] if text else {}
+
+    def get_emotion_prediction(self, text: str) -> dict:
+        return self.predict_emotions([text])[0] if text else {}
+
+    def install(self) -> None:
+        """
+        Replaces libs.sentiment_analyzer with this classifier, so the modules
+        importing it afterwards never load the real models.
+        """
+        module = types.ModuleType("libs.sentiment_analyzer")
+        module.MODEL_LOAD_SECONDS = 0.0
+        module.load_models = lambda: module.MODEL_LOAD_SECONDS
+        module.predict_sentiments = lambda texts, cache=None: self.predict_sentiments(
+            texts
+        )
+        module.predict_emotions = lambda texts, cache=None: self.predict_emotions(texts)
+        module.get_sentiment_prediction = self.get_sentiment_prediction
+        module.get_emotion_prediction = self.get_emotion_prediction
+        sys.modules["libs.sentiment_analyzer"] = module
@@ -0,0 +1,325 @@
+"""
+Daily term frequencies and co-occurrences (migrations/007_term_stats.sql):
+updated at ingest, read by the trending and co-occurring terms of the
+analytics page.
+"""
+
+from datetime import date, timedelta
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from sqlalchemy import func, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+import config
+from app.models.term_counts import TermCounts
+from app.models.term_days import TermDays
+from app.models.term_pairs import TermPairs
+
+# Feeds per word and period of the trending window: period 0 is the current one,
+# 1..baseline_periods the ones before it. Only the words of the current period
+# with min_count feeds are read.
+TRENDING_COUNTS_QUERY = """
+    SELECT word_id, (CAST(:end_day AS date) - day) / :days AS period, sum(count) AS feeds
+    FROM term_counts
+    WHERE day > CAST(:end_day AS date) - :days * (:baseline_periods + 1)
+      AND day <= :end_day
+      AND word_id IN (
+          SELECT word_id
+          FROM term_counts
+          WHERE day > CAST(:end_day AS date) - :days AND day <= :end_day
+          GROUP BY word_id
+          HAVING sum(count) >= :min_count
+      )
+    GROUP BY word_id, period
+"""
+
+TRENDING_TOTALS_QUERY = """
+    SELECT (CAST(:end_day AS date) - day) / :days AS period, sum(feeds) AS feeds
+    FROM term_days
+    WHERE day > CAST(:end_day AS date) - :days * (:baseline_periods + 1)
+      AND day <= :end_day
+    GROUP BY period
+"""
+
+# The words of the feeds containing a word, with the number of those feeds
+COOCCURRING_QUERY = """
+    SELECT CASE WHEN word_id = :word_id THEN other_id ELSE word_id END AS other_id,
+           sum(count) AS feeds
+    FROM term_pairs
+    WHERE (word_id = :word_id OR other_id = :word_id)
+      AND day >= :start_day AND day <= :end_day
+    GROUP BY 1
+    ORDER BY feeds DESC
+    LIMIT :limit
+"""
+
+PRUNE_PAIRS_QUERY = """
+    DELETE FROM term_pairs
+    WHERE day < CAST(:before AS date) AND count < :min_support
+"""
+
+
+def count_terms(session: Session, day: date, word_ids: Iterable[int]) -> None:
+    """
+    Adds a feed to the daily term counts and word pairs.
+
+    The rows are upserted in key order, so concurrent ingest workers lock the
+    shared rows in the same order and never deadlock.
+
+    Args:
+        session (Session): The SQLAlchemy session.
+        day (date): The date of the feed.
+        word_ids (Iterable[int]): The vocabulary ids of its words.
+    """
+    word_ids = sorted({word_id for word_id in word_ids if word_id is not None})
+
+    statement = insert(TermDays).values(day=day, feeds=1)
+    session.execute(
+        statement.on_conflict_do_update(
+            index_elements=["day"], set_={"feeds": TermDays.feeds + 1}
+        )
+    )
+    if not word_ids:
+        return
+
+    statement = insert(TermCounts).values(
+        [{"day": day, "word_id": word_id, "count": 1} for word_id in word_ids]
+    )
+    session.execute(
+        statement.on_conflict_do_update(
+            index_elements=["day", "word_id"], set_={"count": TermCounts.count + 1}
+        )
+    )
+
+    if len(word_ids) < 2:
+        return
+
+    statement = insert(TermPairs).values(
+        [
+            {"day": day, "word_id": word_id, "other_id": other_id, "count": 1}
+            for word_id, other_id in combinations(word_ids, 2)
+        ]
+    )
+    session.execute(
+        statement.on_conflict_do_update(
+            index_elements=["day", "word_id", "other_id"],
+            set_={"count": TermPairs.count + 1},
+        )
+    )
+
+
+def prune_pairs(
+    session: Session,
+    today: date,
+    min_support: int = config.TERM_PAIR_MIN_SUPPORT,
+    after_days: int = config.TERM_PAIR_PRUNE_AFTER_DAYS,
+) -> int:
+    """
+    Deletes the word pairs seen in fewer than min_support feeds of a settled day.
+
+    Args:
+        session (Session): The SQLAlchemy session.
+        today (date): The current day.
+        min_support (int): The fewest feeds of a pair to keep it.
+        after_days (int): The days still ingested, never pruned.
+
+    Returns:
+        int: The number of deleted pairs.
+    """
+    result = session.execute(
+        text(PRUNE_PAIRS_QUERY),
+        {"before": today - timedelta(days=after_days), "min_support": min_support},
+    )
+    return result.rowcount
+
+
+def _xlogx(values: np.ndarray) -> np.ndarray:
+    values = np.asarray(values, dtype=float)
+    return values * np.log(np.where(values > 0, values, 1))
+
+
+def trend_scores(counts: np.ndarray, totals: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Scores how much each term rises in the current period against the baseline.
+
+    Args:
+        counts (np.ndarray): Feeds per (term, period), period 0 is the current one.
+        totals (np.ndarray): Feeds per period.
+
+    Returns:
+        Dict[str, np.ndarray]: Per term:
+            "count" and "baseline": its feeds in the current and the baseline periods,
+            "ratio": its current rate over its baseline rate (add-one smoothed),
+            "z": the z-score of its current count against the baseline periods
+                (at least the Poisson deviation of the expected count),
+            "llr": the log-likelihood ratio (G2) of the current and baseline
+                rates being different, negative when the term falls.
+    """
+    counts = np.asarray(counts, dtype=float)
+    totals = np.asarray(totals, dtype=float)
+
+    current, baseline = counts[:, 0], counts[:, 1:]
+    current_total, baseline_totals = totals[0], totals[1:]
+    baseline_sum, baseline_total = baseline.sum(axis=1), baseline_totals.sum()
+
+    # Rates per feed, so periods of different volume compare
+    rates = baseline / np.where(baseline_totals > 0, baseline_totals, 1)
+    expected = rates.mean(axis=1) * current_total
+    deviation = (
+        rates.std(axis=1, ddof=1) * current_total
+        if rates.shape[1] > 1
+        else np.zeros_like(expected)
+    )
+    deviation = np.sqrt(np.maximum(deviation**2, np.maximum(expected, 1)))
+    z = (current - expected) / deviation
+
+    # Dunning's G2 of the 2x2 table (term, other terms) x (current, baseline)
+    llr = 2 * (
+        _xlogx(current)
+        + _xlogx(baseline_sum)
+        + _xlogx(current_total - current)
+        + _xlogx(baseline_total - baseline_sum)
+        - _xlogx(current + baseline_sum)
+        - _xlogx(current_total + baseline_total - current - baseline_sum)
+        - _xlogx(current_total)
+        - _xlogx(baseline_total)
+        + _xlogx(current_total + baseline_total)
+    )
+    ratio = ((current + 1) / (current_total + 1)) / (
+        (baseline_sum + 1) / (baseline_total + 1)
+    )
+    llr = np.where(ratio >= 1, llr, -llr)
+
+    return {
+        "count": current,
+        "baseline": baseline_sum,
+        "ratio": ratio,
+        "z": z,
+        "llr": llr,
+    }
+
+
+def trending_terms(
+    session: Session,
+    end_day: date,
+    days: int = config.TRENDING_DAYS,
+    baseline_periods: int = config.TRENDING_BASELINE_PERIODS,
+    min_count: int = config.TRENDING_MIN_COUNT,
+    method: str = "llr",
+    limit: int = 20,
+    ignored_ids: Optional[List[int]] = None,
+) -> List[dict]:
+    """
+    The terms rising the most in the days up to end_day, against the
+    baseline_periods periods of the same length before them.
+
+    Args:
+        session (Session): The SQLAlchemy session.
+        end_day (date): The last day of the current period.
+        days (int): The days of a period.
+        baseline_periods (int): The number of periods of the baseline.
+        min_count (int): The fewest feeds of a term in the current period.
+        method (str): Rank by "llr" or by "z".
+        limit (int): The number of terms.
+        ignored_ids (List[int], optional): Vocabulary ids left out.
+
+    Returns:
+        List[dict]: word_id, count, baseline, ratio, z and llr of the rising terms.
+    """
+    params = {
+        "end_day": end_day,
+        "days": days,
+        "baseline_periods": baseline_periods,
+        "min_count": min_count,
+    }
+    rows = session.execute(text(TRENDING_COUNTS_QUERY), params).all()
+    if not rows:
+        return []
+
+    totals = np.zeros(baseline_periods + 1)
+    for period, feeds in session.execute(text(TRENDING_TOTALS_QUERY), params).all():
+        totals[period] = feeds
+
+    # (word, period) rows to a words x periods matrix
+    data = np.array([(row.word_id, row.period, row.feeds) for row in rows], dtype=float)
+    word_ids, word_index = np.unique(data[:, 0].astype(int), return_inverse=True)
+    counts = np.zeros((len(word_ids), baseline_periods + 1))
+    counts[word_index, data[:, 1].astype(int)] = data[:, 2]
+
+    scores = trend_scores(counts, totals)
+    keep = (scores["ratio"] > 1) & (scores["z"] > 0)
+    if ignored_ids:
+        keep &= ~np.isin(word_ids, ignored_ids)
+
+    order = np.argsort(-scores[method][keep], kind="stable")[:limit]
+    selected = np.flatnonzero(keep)[order]
+    return [
+        {
+            "word_id": int(word_ids[index]),
+            **{name: round(float(values[index]), 3) for name, values in scores.items()},
+        }
+        for index in selected
+    ]
+
+
+def cooccurring_terms(
+    session: Session, word_id: int, start_day: date, end_day: date, limit: int = 20
+) -> List[dict]:
+    """
+    The words in the most feeds with a word between two days.
+
+    Args:
+        session (Session): The SQLAlchemy session.
+        word_id (int): The vocabulary id of the word.
+        start_day (date): The first day.
+        end_day (date): The last day.
+        limit (int): The number of words.
+
+    Returns:
+        List[dict]: word_id, count (the feeds with both words) and lift (the
+            count over the one expected if the words were independent).
+    """
+    rows = session.execute(
+        text(COOCCURRING_QUERY),
+        {
+            "word_id": word_id,
+            "start_day": start_day,
+            "end_day": end_day,
+            "limit": limit,
+        },
+    ).all()
+    if not rows:
+        return []
+
+    other_ids = np.array([row.other_id for row in rows])
+    pair_counts = np.array([row.feeds for row in rows], dtype=float)
+
+    term_counts = dict(
+        session.query(TermCounts.word_id, func.sum(TermCounts.count))
+        .filter(
+            TermCounts.word_id.in_([word_id, *other_ids.tolist()]),
+            TermCounts.day >= start_day,
+            TermCounts.day <= end_day,
+        )
+        .group_by(TermCounts.word_id)
+        .all()
+    )
+    total = (
+        session.query(func.sum(TermDays.feeds))
+        .filter(TermDays.day >= start_day, TermDays.day <= end_day)
+        .scalar()
+    )
+
+    other_counts = np.array(
+        [term_counts.get(other_id, 0) for other_id in other_ids.tolist()], dtype=float
+    )
+    expected = term_counts.get(word_id, 0) * other_counts / max(total or 0, 1)
+    lift = pair_counts / np.where(expected > 0, expected, 1)
+
+    return [
+        {"word_id": int(other_id), "count": int(count), "lift": round(float(value), 3)}
+        for other_id, count, value in zip(other_ids, pair_counts, lift)
+    ]
@@ -0,0 +1,157 @@
+import re
+from functools import lru_cache
+from typing import FrozenSet, Iterable, List, Optional, Tuple
+
+from libs.functions import clean_url, remove_photo_video
+
+MIN_WORD_LENGTH = 3
+
+TOKENIZER_NLTK = "nltk"
+TOKENIZER_REGEX = "regex"
+
+# Approximates NLTK's word_tokenize on news titles without the punkt models:
+# keeps "3-án", "12:30", "2,5", "Fidesz-KDNP" and "U.S." in one token,
+# splits any other punctuation off and keeps "..." as a token.
+REGEX_TOKEN_PATTERN = re.compile(
+    r"\.\.\.|\w+(?:(?:[-./]|[,:](?=\d))\w+)*(?:\.(?=\s+\S))?|[^\w\s]"
+)
+
+
+@lru_cache(maxsize=None)
+def get_stopwords(language: str = "hungarian") -> FrozenSet[str]:
+    """
+    Loads the NLTK stopwords of a language once per process.
+
+    Args:
+        language (str): The stopwords language (default is "hungarian").
+
+    Returns:
+        FrozenSet[str]: The stopwords, for O(1) membership checks.
+    """
+    from nltk.corpus import stopwords
+
+    return frozenset(stopwords.words(language))
+
+
+def regex_tokenize(text: str) -> List[str]:
+    """
+    Splits a text into tokens with a single precompiled regular expression.
+
+    Args:
+        text (str): The text to tokenize.
+
+    Returns:
+        List[str]: The tokens.
+    """
+    return REGEX_TOKEN_PATTERN.findall(text)
+
+
+def tokenize(text: str, tokenizer: str = TOKENIZER_NLTK) -> List[str]:
+    """
+    Splits a text into tokens.
+
+    Args:
+        text (str): The text to tokenize.
+        tokenizer (str): "nltk" for NLTK's word_tokenize (needs punkt) or "regex" for regex_tokenize().
+
+    Returns:
+        List[str]: The tokens.
+    """
+    if tokenizer == TOKENIZER_REGEX:
+        return regex_tokenize(text)
+
+    if tokenizer == TOKENIZER_NLTK:
+        from nltk import word_tokenize
+
+        return word_tokenize(text)
+
+    raise ValueError(f"Unknown tokenizer: '{tokenizer}'")
+
+
+def clean_title(title: str) -> str:
+    """
+    Removes the photo/video suffixes and the surrounding whitespace from a feed title.
+
+    Args:
+        title (str): The raw title.
+
+    Returns:
+        str: The cleaned title.
+    """
+    return remove_photo_video(title).strip()
+
+
+def clean_link(link: str) -> str:
+    """
+    Removes the feed specific parts and the surrounding whitespace from a feed link.
+
+    Args:
+        link (str): The raw link.
+
+    Returns:
+        str: The cleaned link.
+    """
+    return clean_url(link).strip()
+
+
+def extract_words(
+    title: str,
+    tokenizer: str = TOKENIZER_NLTK,
+    stopwords: Optional[FrozenSet[str]] = None,
+) -> List[str]:
+    """
+    Extracts the lowercase, non-stopword words of a title, interned into feeds.word_ids.
+
+    Args:
+        title (str): The cleaned title.
+        tokenizer (str): "nltk" or "regex", see tokenize().
+        stopwords (FrozenSet[str], optional): The stopwords (default is the Hungarian NLTK list).
+
+    Returns:
+        List[str]: The words in title order.
+    """
+    if stopwords is None:
+        stopwords = get_stopwords()
+
+    words = []
+    for token in tokenize(title, tokenizer=tokenizer):
+        if len(token) >= MIN_WORD_LENGTH:
+            word = token.lower()
+            if word not in stopwords:
+                words.append(word)
+    return words
+
+
+def extract_words_batch(
+    titles: Iterable[str], tokenizer: str = TOKENIZER_NLTK
+) -> List[List[str]]:
+    """
+    Extracts the words of several titles, resolving the stopwords only once.
+
+    Args:
+        titles (Iterable[str]): The cleaned titles.
+        tokenizer (str): "nltk" or "regex", see tokenize().
+
+    Returns:
+        List[List[str]]: The words of each title.
+    """
+    stopwords = get_stopwords()
+    return [extract_words(title, tokenizer, stopwords) for title in titles]
+
+
+def normalize_feed_item(
+    title: str, link: str, tokenizer: str = TOKENIZER_NLTK
+) -> Tuple[str, str, List[str]]:
+    """
+    Cleans the title and link of a feed item and extracts the words of the title.
+
+    Args:
+        title (str): The raw title.
+        link (str): The raw link.
+        tokenizer (str): "nltk" or "regex", see tokenize().
+
+    Returns:
+        Tuple[str, str, List[str]]: The cleaned title, the cleaned link and the words.
+    """
+    cleaned_title = clean_title(title)
+    return cleaned_title, clean_link(link), extract_words(cleaned_title, tokenizer)
@@ -0,0 +1,119 @@
+import time
+from threading import Lock
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+import config
+from app.models.vocabulary import Vocabulary
+
+
+class VocabularyCache:
+    """
+    In-process, two-way cache of the vocabulary table (word <-> id).
+
+    The vocabulary only grows, so cached entries never go stale; unknown words
+    or ids are looked up (or created) in the database on first use. A word that
+    is not in the database is remembered as missing for VOCABULARY_MISS_TTL
+    seconds, until the ingest may have added it.
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._words: Dict[int, str] = {}
+        self._missed_at: Dict[str, float] = {}
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _store(self, rows: Iterable) -> None:
+        with self._lock:
+            for word_id, word in rows:
+                self._ids[word] = word_id
+                self._words[word_id] = word
+                self._missed_at.pop(word, None)
+
+    def _recently_missed(self, word: str, now: float) -> bool:
+        missed_at = self._missed_at.get(word)
+        return missed_at is not None and now - missed_at < config.VOCABULARY_MISS_TTL
+
+    def load(self, session: Session) -> None:
+        """
+        Loads the whole vocabulary, e.g. before the web workers are forked.
+
+        Args:
+            session (Session): The SQLAlchemy session.
+        """
+        self._store(session.query(Vocabulary.id, Vocabulary.word).all())
+
+    def get_ids(
+        self, session: Session, words: List[str], create: bool = False
+    ) -> List[Optional[int]]:
+        """
+        Maps words to their vocabulary ids.
+
+        Args:
+            session (Session): The SQLAlchemy session.
+            words (List[str]): The words to look up.
+            create (bool): Insert the unknown words into the vocabulary (used at ingest).
+
+        Returns:
+            List[Optional[int]]: The ids in the order of the words; None for unknown words if create is False.
+        """
+        now = time.monotonic()
+        missing = list(
+            {
+                word
+                for word in words
+                if word not in self._ids
+                and (create or not self._recently_missed(word, now))
+            }
+        )
+
+        if missing and create:
+            session.execute(
+                insert(Vocabulary)
+                .values([{"word": word} for word in missing])
+                .on_conflict_do_nothing(index_elements=["word"])
+            )
+
+        if missing:
+            self._store(
+                session.query(Vocabulary.id, Vocabulary.word)
+                .filter(Vocabulary.word.in_(missing))
+                .all()
+            )
+            with self._lock:
+                for word in missing:
+                    if word not in self._ids:
+                        self._missed_at[word] = now
+
+        return [self._ids.get(word) for word in words]
+
+    def get_words(self, session: Session, word_ids: List[int]) -> List[Optional[str]]:
+        """
+        Maps vocabulary ids back to words.
+
+        Args:
+            session (Session): The SQLAlchemy session.
+            word_ids (List[int]): The ids to look up.
+
+        Returns:
+            List[Optional[str]]: The words in the order of the ids; None for unknown ids.
+        """
+        missing = list({word_id for word_id in word_ids if word_id not in self._words})
+
+        if missing:
+            self._store(
+                session.query(Vocabulary.id, Vocabulary.word)
+                .filter(Vocabulary.id.in_(missing))
+                .all()
+            )
+
+        return [self._words.get(word_id) for word_id in word_ids]
+
+
+# Shared instance, one per process
+vocabulary = VocabularyCache()
@@ -0,0 +1,76 @@
+import time
+
+from flask import Flask
+from sqlalchemy.exc import SQLAlchemyError
+
+import config
+from libs.database import db, session_scope
+from libs.feed_archive import archive_boundary
+from libs.feed_snapshot import get_feed_snapshot
+from libs.functions import setup_logging_to_file
+from libs.sources_registry import sources_registry
+from libs.vocabulary import vocabulary
+
+error_logger = setup_logging_to_file("error.log")
+info_logger = setup_logging_to_file("info.log")
+
+
+def warm_up(app: Flask) -> None:
+    """
+    Fills the per-process caches of the app before it serves requests: compiles
+    the templates, loads the vocabulary, the sources, the archive boundary and
+    the analytics snapshot.
+
+    Run in the gunicorn master (preload_app), the forked workers share these
+    caches. The database connections it opened are closed at the end, they must
+    not be inherited by the workers.
+
+    Args:
+        app (Flask): The Flask application instance.
+    """
+    start_time = time.perf_counter()
+
+    with app.app_context():
+        templates = [
+            name for name in app.jinja_env.list_templates() if name.endswith(".html")
+        ]
+        for name in templates:
+            app.jinja_env.get_template(name)
+
+        try:
+            with session_scope() as session:
+                vocabulary.load(session)
+                sources_registry.load(session)
+            archive_boundary.load()
+
+            if config.ANALYTICS_SNAPSHOT_DAYS:
+                get_feed_snapshot()
+        except SQLAlchemyError as error:
+            # The caches fill up on demand then, serving must not depend on it
+            error_logger.error(f"Warmup failed: {error}")
+        finally:
+            db.engine.dispose()
+
+        # What the caches hold, without loading them again after a failure
+        info_logger.info(
+            f"Warmup: {len(templates)} templates, {len(vocabulary)} words, "
+            f"{len(sources_registry)} sources "
+            f"in {time.perf_counter() - start_time:.2f} seconds"
+        )
+
+
+def warm_up_pool(app: Flask, connections: int = config.DB_POOL_SIZE) -> None:
+    """
+    Opens connections of the pool, so the first requests of a worker don't pay
+    for the connection setup.
+
+    Args:
+        app (Flask): The Flask application instance.
+        connections (int): The number of connections to open.
+    """
+    with app.app_context():
+        # Held together, otherwise the pool would hand out the same connection
+        opened = [db.engine.connect() for _ in range(connections)]
+        for connection in opened:
+            connection.exec_driver_sql("SELECT 1")
+            connection.close()
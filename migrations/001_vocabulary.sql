@@ -0,0 +1,31 @@
+-- Interned vocabulary for feeds.words
+--
+-- Every distinct token gets a small integer id; feeds.word_ids holds the ids of
+-- feeds.words in the same order. Word filters and top-word aggregation run on
+-- the integer array.
+
+CREATE TABLE IF NOT EXISTS vocabulary (
+    id SERIAL PRIMARY KEY,
+    word TEXT NOT NULL UNIQUE
+);
+
+ALTER TABLE feeds ADD COLUMN IF NOT EXISTS word_ids INTEGER[] NOT NULL DEFAULT '{}';
+
+-- Backfill
+INSERT INTO vocabulary (word)
+SELECT DISTINCT unnest(words) FROM feeds
+ON CONFLICT (word) DO NOTHING;
+
+UPDATE feeds f
+SET word_ids = COALESCE(
+    (
+        SELECT array_agg(v.id ORDER BY t.ord)
+        FROM unnest(f.words) WITH ORDINALITY AS t(word, ord)
+        JOIN vocabulary v ON v.word = t.word
+    ),
+    '{}'
+);
+
+CREATE INDEX IF NOT EXISTS feeds_word_ids_idx ON feeds USING GIN (word_ids);
+
+-- feeds.words and its index are dropped by 010_drop_feed_words.sql
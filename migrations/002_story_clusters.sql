@@ -0,0 +1,19 @@
+-- Near-duplicate story clusters
+--
+-- feeds.story_id groups the feeds telling the same story (across sources); it is
+-- the id of the first feed of the story. feed_lsh_buckets is the LSH index of
+-- the MinHash signatures of the titles: one row per (band, bucket) of each feed.
+
+ALTER TABLE feeds ADD COLUMN IF NOT EXISTS story_id INTEGER;
+CREATE INDEX IF NOT EXISTS feeds_story_id_idx ON feeds (story_id);
+
+CREATE TABLE IF NOT EXISTS feed_lsh_buckets (
+    band SMALLINT NOT NULL,
+    bucket BIGINT NOT NULL,
+    feed_id INTEGER NOT NULL REFERENCES feeds (id) ON DELETE CASCADE,
+    PRIMARY KEY (band, bucket, feed_id)
+);
+
+CREATE INDEX IF NOT EXISTS feed_lsh_buckets_feed_id_idx ON feed_lsh_buckets (feed_id);
+
+-- Backfill: python -m jobs.cluster_stories
@@ -0,0 +1,46 @@
+-- Sentiment model registry
+--
+-- sentiment_models lists the models the feeds are scored with, feed_sentiments
+-- holds one row of scores per (model, feed). labels maps the output labels of a
+-- model to negative / positive / neutral. The scores of the feeds columns are
+-- the ones of SENTIMENT_MODEL_ID (1), the model of the ingest job.
+
+CREATE TABLE IF NOT EXISTS sentiment_models (
+    id SERIAL PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    model TEXT NOT NULL,
+    tokenizer TEXT,
+    labels JSONB NOT NULL,
+    max_length INTEGER NOT NULL DEFAULT 128,
+    active BOOLEAN NOT NULL DEFAULT TRUE,
+    created TIMESTAMP DEFAULT now()
+);
+
+INSERT INTO sentiment_models (id, name, model, labels)
+VALUES (
+    1,
+    'HunEmBERT3',
+    'poltextlab/HunEmBERT3',
+    '{"LABEL_0": "neutral", "LABEL_1": "positive", "LABEL_2": "negative"}'
+)
+ON CONFLICT (id) DO NOTHING;
+
+SELECT setval('sentiment_models_id_seq', (SELECT max(id) FROM sentiment_models));
+
+-- One row per (model, feed): keep the newest of the duplicates
+UPDATE feed_sentiments SET model_id = 1 WHERE model_id IS NULL;
+
+DELETE FROM feed_sentiments older
+USING feed_sentiments newer
+WHERE older.model_id = newer.model_id
+  AND older.feed_id = newer.feed_id
+  AND older.id < newer.id;
+
+ALTER TABLE feed_sentiments ALTER COLUMN model_id SET NOT NULL;
+
+-- Serves the scoring runner (which models are missing for a feed) and the
+-- analytics joins of a selected model without reading the table
+CREATE UNIQUE INDEX IF NOT EXISTS feed_sentiments_model_feed_idx
+    ON feed_sentiments (model_id, feed_id) INCLUDE (negative, positive, neutral);
+
+-- Backfill of the other active models: python -m jobs.score_feeds
@@ -0,0 +1,25 @@
+-- Polling schedule of the sources
+--
+-- The ingest workers lease the due sources with SELECT ... FOR UPDATE SKIP
+-- LOCKED, so overlapping runs never read the same source twice. After a poll
+-- the interval of the source adapts to the number of new items it had, see
+-- libs/source_schedule.py.
+
+CREATE TABLE IF NOT EXISTS source_schedule (
+    source_id INTEGER PRIMARY KEY REFERENCES sources (id) ON DELETE CASCADE,
+    next_poll_at TIMESTAMP NOT NULL DEFAULT now(),
+    poll_interval INTEGER NOT NULL DEFAULT 900,
+    leased_by TEXT,
+    leased_until TIMESTAMP,
+    last_polled_at TIMESTAMP,
+    last_new_items INTEGER NOT NULL DEFAULT 0,
+    failures INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS source_schedule_next_poll_at_idx
+    ON source_schedule (next_poll_at);
+
+-- Backfill, the workers also add the sources created later
+INSERT INTO source_schedule (source_id)
+SELECT id FROM sources
+ON CONFLICT (source_id) DO NOTHING;
@@ -0,0 +1,12 @@
+-- High-water mark of the feed of each source
+--
+-- The ingest job skips a feed that did not change since the previous poll
+-- (HTTP 304 on etag / last_modified, or the same content_hash), and the
+-- entries it already saw: the md5 of their links are in link_hashes, or they
+-- were published well before latest_published.
+
+ALTER TABLE source_schedule ADD COLUMN IF NOT EXISTS content_hash TEXT;
+ALTER TABLE source_schedule ADD COLUMN IF NOT EXISTS etag TEXT;
+ALTER TABLE source_schedule ADD COLUMN IF NOT EXISTS last_modified TEXT;
+ALTER TABLE source_schedule ADD COLUMN IF NOT EXISTS latest_published TIMESTAMP;
+ALTER TABLE source_schedule ADD COLUMN IF NOT EXISTS link_hashes TEXT[] NOT NULL DEFAULT '{}';
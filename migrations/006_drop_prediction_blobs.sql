@@ -0,0 +1,16 @@
+-- Drop the prediction text blobs
+--
+-- feeds.sentiment_prediction, feeds.emotion_prediction and
+-- feed_sentiments.prediction held the scores as JSON text, a copy of the float
+-- columns next to them. The float columns are the compact form: a fixed label
+-- order per table, inline in the row, no TOAST lookups nor JSON parsing. Every
+-- reader already uses them.
+--
+-- DROP COLUMN only hides the columns. Rewrite the tables to give the space
+-- back, outside of a transaction:
+--     VACUUM FULL feeds;
+--     VACUUM FULL feed_sentiments;
+
+ALTER TABLE feeds DROP COLUMN IF EXISTS sentiment_prediction;
+ALTER TABLE feeds DROP COLUMN IF EXISTS emotion_prediction;
+ALTER TABLE feed_sentiments DROP COLUMN IF EXISTS prediction;
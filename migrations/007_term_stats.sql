@@ -0,0 +1,54 @@
+-- Daily term frequencies and co-occurrences
+--
+-- term_counts holds the number of feeds of a day containing a word, term_pairs
+-- the number of feeds containing two words (word_id < other_id), term_days the
+-- number of feeds of a day. The ingest job adds every new feed to them, so the
+-- trending and co-occurring terms of the analytics page never scan the feeds.
+-- Most pairs occur once: jobs.prune_term_pairs deletes the pairs of the settled
+-- days below TERM_PAIR_MIN_SUPPORT.
+
+CREATE TABLE IF NOT EXISTS term_days (
+    day DATE PRIMARY KEY,
+    feeds INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS term_counts (
+    day DATE NOT NULL,
+    word_id INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (day, word_id)
+);
+
+CREATE TABLE IF NOT EXISTS term_pairs (
+    day DATE NOT NULL,
+    word_id INTEGER NOT NULL,
+    other_id INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (day, word_id, other_id)
+);
+
+CREATE INDEX IF NOT EXISTS term_counts_word_id_idx ON term_counts (word_id, day);
+CREATE INDEX IF NOT EXISTS term_pairs_word_id_idx ON term_pairs (word_id, day);
+CREATE INDEX IF NOT EXISTS term_pairs_other_id_idx ON term_pairs (other_id, day);
+
+-- Backfill, the pairs of the settled days pruned right away (the default support, 2)
+INSERT INTO term_days (day, feeds)
+SELECT feed_date, count(*) FROM feeds WHERE feed_date IS NOT NULL GROUP BY feed_date
+ON CONFLICT (day) DO NOTHING;
+
+INSERT INTO term_counts (day, word_id, count)
+SELECT feed_date, word_id, count(*)
+FROM feeds, LATERAL (SELECT DISTINCT unnest(word_ids) AS word_id) AS words
+WHERE feed_date IS NOT NULL
+GROUP BY feed_date, word_id
+ON CONFLICT (day, word_id) DO NOTHING;
+
+INSERT INTO term_pairs (day, word_id, other_id, count)
+SELECT feed_date, a.word_id, b.word_id, count(*)
+FROM feeds,
+    LATERAL (SELECT DISTINCT unnest(word_ids) AS word_id) AS a,
+    LATERAL (SELECT DISTINCT unnest(word_ids) AS word_id) AS b
+WHERE feed_date IS NOT NULL AND a.word_id < b.word_id
+GROUP BY feed_date, a.word_id, b.word_id
+HAVING count(*) >= 2 OR feed_date >= current_date - 2
+ON CONFLICT (day, word_id, other_id) DO NOTHING;
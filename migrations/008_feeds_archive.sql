@@ -0,0 +1,33 @@
+-- Archive of the old feeds
+--
+-- jobs.archive_feeds moves the feeds older than ARCHIVE_RETENTION_DAYS from
+-- feeds to feeds_archive, so the indexes and pages of feeds, the working set
+-- of the dashboard, stay small. The archive rows are never updated: the pages
+-- are packed full (fillfactor 100) and the feeds are appended in feed_date
+-- order, so a BRIN index covers the date filters at a fraction of a B-tree.
+-- feeds_archive_state.archived_before is the boundary the queries route on:
+-- a query starting before it reads both tables.
+--
+-- The daily term counts (term_days, term_counts, term_pairs) and the scores of
+-- feed_sentiments stay as they are; feed_sentiments.feed_id may now point to
+-- an archived feed, so it is no foreign key of feeds any more.
+
+CREATE TABLE IF NOT EXISTS feeds_archive (LIKE feeds INCLUDING DEFAULTS)
+WITH (fillfactor = 100);
+
+ALTER TABLE feeds_archive DROP CONSTRAINT IF EXISTS feeds_archive_pkey;
+ALTER TABLE feeds_archive ADD CONSTRAINT feeds_archive_pkey PRIMARY KEY (id);
+
+CREATE INDEX IF NOT EXISTS feeds_archive_feed_date_idx
+    ON feeds_archive USING BRIN (feed_date);
+CREATE INDEX IF NOT EXISTS feeds_archive_word_ids_idx
+    ON feeds_archive USING GIN (word_ids);
+
+CREATE TABLE IF NOT EXISTS feeds_archive_state (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    archived_before DATE
+);
+
+INSERT INTO feeds_archive_state (id) VALUES (TRUE) ON CONFLICT (id) DO NOTHING;
+
+ALTER TABLE feed_sentiments DROP CONSTRAINT IF EXISTS feed_sentiments_feed_id_fkey;
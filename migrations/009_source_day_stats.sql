@@ -0,0 +1,52 @@
+-- Sentiment statistics per source and day
+--
+-- The sufficient statistics of the scores of the feeds columns: the number of
+-- feeds, the feeds of each dominant sentiment, and the sum and sum of squares
+-- of each score. Summing the rows of a date window gives the distributions,
+-- means and variances of the window in O(days x sources) rows, without reading
+-- the feeds. The ingest job adds every new feed; archiving leaves them as is.
+
+CREATE TABLE IF NOT EXISTS source_day_stats (
+    day DATE NOT NULL,
+    source_id INTEGER NOT NULL,
+    feeds INTEGER NOT NULL,
+    negative_feeds INTEGER NOT NULL,
+    neutral_feeds INTEGER NOT NULL,
+    positive_feeds INTEGER NOT NULL,
+    negative_sum DOUBLE PRECISION NOT NULL,
+    negative_sum_sq DOUBLE PRECISION NOT NULL,
+    neutral_sum DOUBLE PRECISION NOT NULL,
+    neutral_sum_sq DOUBLE PRECISION NOT NULL,
+    positive_sum DOUBLE PRECISION NOT NULL,
+    positive_sum_sq DOUBLE PRECISION NOT NULL,
+    PRIMARY KEY (day, source_id)
+);
+
+-- Backfill, from both the feeds and the archive; ties of the dominant
+-- sentiment go to negative, then to positive, as in the analytics charts
+INSERT INTO source_day_stats
+SELECT
+    feed_date, source_id, count(*),
+    count(*) FILTER (WHERE sentiment = 'negative'),
+    count(*) FILTER (WHERE sentiment = 'neutral'),
+    count(*) FILTER (WHERE sentiment = 'positive'),
+    sum(negative), sum(negative * negative),
+    sum(neutral), sum(neutral * neutral),
+    sum(positive), sum(positive * positive)
+FROM (
+    SELECT
+        feed_date, source_id, negative, neutral, positive,
+        CASE
+            WHEN GREATEST(negative, positive, neutral) = negative THEN 'negative'
+            WHEN GREATEST(negative, positive, neutral) = positive THEN 'positive'
+            ELSE 'neutral'
+        END AS sentiment
+    FROM (
+        SELECT feed_date, source_id, negative, neutral, positive FROM feeds
+        UNION ALL
+        SELECT feed_date, source_id, negative, neutral, positive FROM feeds_archive
+    ) AS all_feeds
+    WHERE feed_date IS NOT NULL AND source_id IS NOT NULL AND negative IS NOT NULL
+) AS scored
+GROUP BY feed_date, source_id
+ON CONFLICT (day, source_id) DO NOTHING;
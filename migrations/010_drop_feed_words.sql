@@ -0,0 +1,16 @@
+-- Drop feeds.words
+--
+-- feeds.word_ids (001_vocabulary.sql) holds the vocabulary ids of the words of
+-- a feed, in title order. The ingest writes only the ids, and the word filters,
+-- the top words, the term stats and the cleaner rules read only the ids, so the
+-- text array and its GIN index are a copy nobody reads. feeds_archive was
+-- created LIKE feeds and has the column too.
+--
+-- DROP COLUMN only hides the columns. Rewrite the tables to give the space
+-- back, outside of a transaction:
+--     VACUUM FULL feeds;
+--     VACUUM FULL feeds_archive;
+
+DROP INDEX IF EXISTS feeds_words_idx;
+ALTER TABLE feeds DROP COLUMN IF EXISTS words;
+ALTER TABLE feeds_archive DROP COLUMN IF EXISTS words;
@@ -0,0 +1,26 @@
+import pytest
+from flask import Flask
+
+from app.models.feed_db_filters import FeedDBFilters
+
+
+def process(query_string: str) -> FeedDBFilters:
+    filters = FeedDBFilters()
+    with Flask(__name__).test_request_context(query_string=query_string) as context:
+        filters.process_args(args=context.request.args)
+    return filters
+
+
+def test_ids_are_parsed():
+    filters = process("story_id=12&model_id=3")
+
+    assert (filters.story_id, filters.model_id) == (12, 3)
+
+
+@pytest.mark.parametrize(
+    "query_string", ["story_id=abc&model_id=1.5", "story_id=&model_id=", "story_id=%20"]
+)
+def test_invalid_ids_are_ignored(query_string):
+    filters = process(query_string)
+
+    assert (filters.story_id, filters.model_id) == (None, None)
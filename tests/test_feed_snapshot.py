@@ -0,0 +1,47 @@
+import time
+from datetime import date
+
+import pytest
+
+import libs.feed_snapshot as feed_snapshot
+from app.models.feed_db_filters import FeedDBFilters
+from libs.feed_archive import ArchiveBoundary
+from libs.feed_snapshot import FeedSnapshot
+
+
+def boundary(archived_before):
+    archive_boundary = ArchiveBoundary()
+    archive_boundary._archived_before = archived_before
+    archive_boundary._checked_at = time.monotonic()
+    return archive_boundary
+
+
+@pytest.fixture
+def snapshot():
+    return FeedSnapshot([], start_date=date(2026, 9, 1), last_feed_id=None)
+
+
+@pytest.mark.parametrize(
+    "start_date, covered",
+    [
+        ("2026-10-01 00:00:00", True),
+        ("2026-09-15", True),
+        ("2026-09-14 00:00:00", False),
+        ("2026-08-01", False),
+        ("not a date", False),
+    ],
+)
+def test_ranges_reaching_the_archive_are_not_covered(
+    snapshot, monkeypatch, start_date, covered
+):
+    monkeypatch.setattr(feed_snapshot, "archive_boundary", boundary(date(2026, 9, 15)))
+
+    assert snapshot.covers(FeedDBFilters(start_date=start_date)) is covered
+
+
+def test_without_an_archive_the_snapshot_window_decides(snapshot, monkeypatch):
+    monkeypatch.setattr(feed_snapshot, "archive_boundary", boundary(None))
+
+    assert snapshot.covers(FeedDBFilters(start_date="2026-09-01"))
+    assert not snapshot.covers(FeedDBFilters(start_date="2026-08-31"))
+    assert not snapshot.covers(FeedDBFilters(start_date="2026-09-01", story_id=3))
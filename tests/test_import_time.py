@@ -0,0 +1,76 @@
+"""
+Import-time budget of the app and job entry points.
+
+Every entry point is imported in a fresh interpreter (python -X importtime),
+from an empty working directory and with the database pointed at a closed
+port: an import must stay under its budget, connect to nothing, load no model
+and write no file. IMPORT_BUDGET_SCALE scales the budgets for slower machines.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+import config
+
+# Cumulative import time budgets in milliseconds
+IMPORT_BUDGETS_MS = {
+    "run": 1500,
+    "jobs.daily.rss_reader": 1500,
+    "jobs.move_sentiments": 1000,
+    "jobs.score_feeds": 1000,
+    "jobs.cluster_stories": 1000,
+    "jobs.prune_term_pairs": 1000,
+    "jobs.archive_feeds": 1000,
+    "jobs.cleaners.clean_data": 1000,
+    "libs.session": 500,
+    "libs.inference_service": 500,
+}
+
+
+def import_time_ms(module: str, cwd: str) -> float:
+    """
+    Imports a module in a new interpreter.
+
+    Args:
+        module (str): The dotted name of the module.
+        cwd (str): The working directory of the interpreter.
+
+    Returns:
+        float: The cumulative import time of the module in milliseconds.
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd,
+        env={
+            **os.environ,
+            "PYTHONPATH": config.ROOT_DIR,
+            "PSQL_HOST": "127.0.0.1",
+            "PSQL_PORT": "1",
+        },
+        capture_output=True,
+        text=True,
+    )
+    assert process.returncode == 0, process.stderr.strip().splitlines()[-1]
+
+    # "import time: self [us] | cumulative | imported package", the module is last
+    for line in reversed(process.stderr.splitlines()):
+        if (
+            line.startswith("import time:")
+            and line.rsplit("|", 1)[-1].strip() == module
+        ):
+            return int(line.split("|")[1]) / 1000
+
+    raise AssertionError(f"No import time reported for {module}")
+
+
+@pytest.mark.parametrize("module, budget_ms", IMPORT_BUDGETS_MS.items())
+def test_import_stays_in_budget_without_side_effects(module, budget_ms, tmp_path):
+    budget_ms *= float(os.getenv("IMPORT_BUDGET_SCALE", default=1))
+
+    elapsed_ms = min(import_time_ms(module, str(tmp_path)) for _ in range(3))
+
+    assert elapsed_ms <= budget_ms
+    assert os.listdir(tmp_path) == []
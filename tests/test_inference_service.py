@@ -0,0 +1,120 @@
+import threading
+import time
+
+import pytest
+
+from libs.inference_service import MicroBatcher
+from libs.stub_classifier import SENTIMENT_LABELS, StubClassifier, stub_scores
+
+
+class RecordingPredict:
+    """Stub model: scores with stub_scores(), records its batches."""
+
+    def __init__(self, fail: bool = False):
+        self.batches = []
+        self.started = []
+        self.fail = fail
+        # Holds the first batch back, so the next requests queue up behind it
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, texts):
+        self.started.append(time.monotonic())
+        self.release.wait()
+        self.batches.append(list(texts))
+        if self.fail:
+            raise RuntimeError("model failed")
+        return [stub_scores(text, SENTIMENT_LABELS) for text in texts]
+
+
+@pytest.fixture
+def predict():
+    return RecordingPredict()
+
+
+def test_queued_requests_share_a_batch_and_get_their_own_results(predict):
+    batcher = MicroBatcher(predict, max_batch=8, max_wait_ms=1000)
+    predict.release.clear()
+    blocker = batcher.submit(["blocker"] * 8)
+
+    futures = [batcher.submit([f"a{index}", f"b{index}"]) for index in range(3)]
+    predict.release.set()
+
+    assert len(blocker.result(5)) == 8
+    for index, future in enumerate(futures):
+        assert future.result(5) == [
+            stub_scores(f"a{index}", SENTIMENT_LABELS),
+            stub_scores(f"b{index}", SENTIMENT_LABELS),
+        ]
+    assert predict.batches[1] == ["a0", "b0", "a1", "b1", "a2", "b2"]
+    batcher.stop()
+
+
+def test_batches_are_cut_at_max_batch_between_requests(predict):
+    batcher = MicroBatcher(predict, max_batch=4, max_wait_ms=1000)
+    predict.release.clear()
+    blocker = batcher.submit(["blocker"] * 4)
+
+    futures = [batcher.submit([f"t{index}"] * 3) for index in range(2)]
+    large = batcher.submit([f"large{index}" for index in range(6)])
+    predict.release.set()
+
+    blocker.result(5)
+    assert [len(future.result(5)) for future in futures] == [3, 3]
+    assert len(large.result(5)) == 6
+    # A request is never split, a larger one than max_batch is a batch on its own
+    assert [len(batch) for batch in predict.batches[1:]] == [3, 3, 6]
+    assert batcher.batch_sizes.count == 4
+    batcher.stop()
+
+
+def test_a_lone_request_runs_after_max_wait(predict):
+    batcher = MicroBatcher(predict, max_batch=32, max_wait_ms=5)
+
+    assert batcher.score(["egyedül"], timeout=5) == [
+        stub_scores("egyedül", SENTIMENT_LABELS)
+    ]
+    assert batcher.score([]) == []
+    batcher.stop()
+
+
+def test_a_request_queued_behind_a_slow_batch_waits_max_wait_at_most(predict):
+    batcher = MicroBatcher(predict, max_batch=8, max_wait_ms=300)
+    predict.release.clear()
+    blocker = batcher.submit(["blocker"] * 8)
+    while not predict.started:
+        time.sleep(0.001)
+
+    arrived = time.monotonic()
+    future = batcher.submit(["queued"])
+    time.sleep(0.2)
+    predict.release.set()
+
+    blocker.result(5)
+    future.result(5)
+    # Its batch starts max_wait after it arrived, not max_wait after the slow batch
+    assert predict.started[1] - arrived < 0.3 + 0.1
+    batcher.stop()
+
+
+def test_a_failing_batch_fails_every_request_of_it(caplog):
+    predict = RecordingPredict(fail=True)
+    batcher = MicroBatcher(predict, max_batch=8, max_wait_ms=1000)
+    futures = [batcher.submit(["x"] * 4), batcher.submit(["y"] * 4)]
+
+    for future in futures:
+        with pytest.raises(RuntimeError, match="model failed"):
+            future.result(5)
+    assert batcher.errors == 1
+    assert "Inference failed: model failed" in caplog.text
+    batcher.stop()
+
+    with pytest.raises(RuntimeError):
+        batcher.submit(["late"])
+
+
+def test_stub_classifier_scores_sum_to_one():
+    classifier = StubClassifier()
+    for scores in classifier.predict_sentiments(["béke", "háború"]):
+        assert sorted(scores) == sorted(SENTIMENT_LABELS)
+        assert sum(scores.values()) == pytest.approx(1)
@@ -0,0 +1,117 @@
+import logging
+import os
+
+import pytest
+from flask import Flask
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+import config
+import libs.profiling as profiling
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, statement, parameters=None):
+        self.connection.statements.append(statement)
+        if statement.startswith("EXPLAIN") and self.connection.explain_error:
+            raise RuntimeError("cannot explain")
+
+    def fetchall(self):
+        return [("Seq Scan on feeds",)]
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """A DBAPI connection in a transaction, recording its statements."""
+
+    def __init__(self, explain_error=False):
+        self.autocommit = False
+        self.explain_error = explain_error
+        self.statements = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+
+@pytest.fixture
+def slow_query_log(monkeypatch):
+    monkeypatch.setattr(config, "SLOW_QUERY_MS", 0)
+    monkeypatch.setattr(config, "SLOW_QUERY_EXPLAIN", True)
+    messages = []
+    logger = logging.getLogger("test_profiling")
+    monkeypatch.setattr(logger, "warning", messages.append)
+    monkeypatch.setattr(profiling, "profiling_logger", logger)
+    return messages
+
+
+def run_query(connection, statement, executemany=False):
+    info = {"query_start_time": [0.0]}
+    conn = type("Conn", (), {"info": info})()
+    profiling._after_cursor_execute(
+        conn, FakeCursor(connection), statement, {}, None, executemany
+    )
+
+
+def test_slow_query_is_logged_with_its_plan(slow_query_log):
+    connection = FakeConnection()
+    run_query(connection, "SELECT * FROM feeds")
+
+    assert "Seq Scan on feeds" in slow_query_log[0]
+    assert connection.statements == [
+        "SAVEPOINT slow_query_explain",
+        "EXPLAIN SELECT * FROM feeds",
+        "RELEASE SAVEPOINT slow_query_explain",
+    ]
+
+
+def test_failing_explain_is_logged_and_rolled_back(slow_query_log):
+    connection = FakeConnection(explain_error=True)
+    run_query(connection, "SELECT * FROM feeds")
+
+    assert "EXPLAIN failed: cannot explain" in slow_query_log[0]
+    assert connection.statements[-1] == "ROLLBACK TO SAVEPOINT slow_query_explain"
+
+
+def test_executemany_is_not_explained(slow_query_log):
+    connection = FakeConnection()
+    run_query(connection, "SELECT 1", executemany=True)
+
+    assert slow_query_log and connection.statements == []
+
+
+def test_sampler_stops_when_the_view_raises(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(config, "SAMPLING_PROFILER_ENDPOINT", "fail")
+    monkeypatch.setattr(config, "PROFILES_DIR", str(tmp_path / "profiles"))
+
+    app = Flask(__name__)
+
+    @app.route("/fail")
+    def fail():
+        raise RuntimeError("view failed")
+
+    # Restored after the test, as the Engine listeners below
+    monkeypatch.setattr(profiling, "profiling_logger", None)
+    profiling.initialize_profiling(app)
+    for name, listener in (
+        ("before_cursor_execute", profiling._before_cursor_execute),
+        ("after_cursor_execute", profiling._after_cursor_execute),
+    ):
+        event.remove(Engine, name, listener)
+
+    samplers = []
+    original_start = profiling.StackSampler.start
+    monkeypatch.setattr(
+        profiling.StackSampler,
+        "start",
+        lambda sampler: samplers.append(sampler) or original_start(sampler),
+    )
+
+    assert app.test_client().get("/fail").status_code == 500
+    assert not samplers[0]._thread.is_alive()
+    assert len(os.listdir(tmp_path / "profiles")) == 1
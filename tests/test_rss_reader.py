@@ -0,0 +1,71 @@
+import hashlib
+import logging
+from contextlib import contextmanager
+
+import pytest
+
+import jobs.daily.rss_reader as rss_reader
+from libs.metrics import RunMetrics
+from libs.source_schedule import FeedState
+
+FEED = """<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel><title>Teszt</title>
+<item><title>Első hír</title><link>https://example.hu/1</link>
+<pubDate>Mon, 19 Oct 2026 08:00:00 +0000</pubDate></item>
+<item><link>https://example.hu/2</link>
+<pubDate>Mon, 19 Oct 2026 09:00:00 +0000</pubDate></item>
+<item><title>Harmadik hír</title><link>https://example.hu/3</link>
+<pubDate>Mon, 19 Oct 2026 10:00:00 +0000</pubDate></item>
+</channel></rss>
+"""
+
+
+class FakeResponse:
+    headers = {"ETag": '"v1"', "Last-Modified": None}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def read(self):
+        return FEED.encode("utf-8")
+
+
+@pytest.fixture
+def saved_states(monkeypatch):
+    states = []
+
+    @contextmanager
+    def session_scope():
+        yield None
+
+    monkeypatch.setattr(rss_reader, "session_scope", session_scope)
+    monkeypatch.setattr(rss_reader, "get_feed_state", lambda session, _: FeedState())
+    monkeypatch.setattr(
+        rss_reader,
+        "save_feed_state",
+        lambda session, source_id, state: states.append(state),
+    )
+    monkeypatch.setattr(rss_reader, "fetch_feed", lambda link, state: FakeResponse())
+    # Every entry with a title is already stored
+    monkeypatch.setattr(rss_reader, "not_in_db", lambda hash, source_id: False)
+    monkeypatch.setattr(rss_reader, "error_logger", logging.getLogger(__name__))
+    return states
+
+
+def test_a_bad_entry_is_skipped_and_the_feed_state_saved(saved_states, caplog):
+    metrics = RunMetrics("ingest")
+
+    assert rss_reader.process_source(1, "https://example.hu/rss", metrics) == 0
+
+    assert metrics.counters[("errors", "1")] == 1
+    assert metrics.counters[("skipped", "1")] == 2
+    assert "https://example.hu/rss" in caplog.text
+
+    state = saved_states[0]
+    assert state.content_hash == hashlib.md5(FEED.encode("utf-8")).hexdigest()
+    assert state.latest_published.hour == 10
+    # The bad entry is not read again by the next poll
+    assert hashlib.md5(b"https://example.hu/2").hexdigest() in state.link_hashes
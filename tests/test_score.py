@@ -0,0 +1,66 @@
+import pytest
+from flask import Flask
+
+import app.blueprints.score as score
+from libs.stub_classifier import EMOTION_LABELS, SENTIMENT_LABELS, stub_scores
+
+
+@pytest.fixture
+def client(monkeypatch):
+    def score_texts(texts):
+        return [
+            {
+                "sentiment": stub_scores(text, SENTIMENT_LABELS),
+                "emotion": stub_scores(text, EMOTION_LABELS),
+            }
+            for text in texts
+        ]
+
+    monkeypatch.setattr(score, "score_texts", score_texts)
+    app = Flask(__name__)
+    app.register_blueprint(score.score_bp)
+    return app.test_client()
+
+
+def test_scores_a_json_text(client):
+    response = client.post("/score/", json={"text": "  Béke van  "})
+
+    assert response.status_code == 200
+    assert response.json["text"] == "Béke van"
+    assert response.json["sentiment"] == stub_scores("Béke van", SENTIMENT_LABELS)
+
+
+def test_scores_a_form_text(client):
+    response = client.post("/score/", data={"text": "Béke van"})
+
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        {"text": ""},
+        {"text": "   "},
+        {"text": 42},
+        {"text": ["Béke"]},
+        {"text": None},
+        {"text": "x" * (score.MAX_TEXT_LENGTH + 1)},
+        ["Béke"],
+        "Béke",
+        42,
+    ],
+)
+def test_invalid_bodies_are_rejected(client, body):
+    response = client.post("/score/", json=body)
+
+    assert response.status_code == 400
+    assert "error" in response.json
+
+
+def test_unavailable_service(client, monkeypatch):
+    def score_texts(texts):
+        raise OSError("connection refused")
+
+    monkeypatch.setattr(score, "score_texts", score_texts)
+
+    assert client.post("/score/", json={"text": "Béke"}).status_code == 503
@@ -0,0 +1,71 @@
+from collections import namedtuple
+
+import pytest
+
+import jobs.score_feeds as score_feeds
+from libs.scoring import ScoringModel
+
+Feed = namedtuple("Feed", "id title model_ids")
+SCORES = {"negative": 0.2, "neutral": 0.5, "positive": 0.3}
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    """Answers the batch query with two feeds, records the other statements."""
+
+    def __init__(self, model_ids):
+        self.feeds = [Feed(1, "Béke", model_ids), Feed(2, "Háború", model_ids)]
+        self.statements = []
+
+    def execute(self, statement, parameters=None):
+        self.statements.append((str(statement), parameters))
+        return FakeResult(self.feeds if len(self.statements) == 1 else [])
+
+
+@pytest.fixture(autouse=True)
+def stub_scoring(monkeypatch):
+    def score_titles(models, titles, needed, cache=None):
+        return {
+            model_id: [SCORES] * len(indices) for model_id, indices in needed.items()
+        }
+
+    monkeypatch.setattr(score_feeds, "score_titles", score_titles)
+    monkeypatch.setattr(score_feeds, "SENTIMENT_MODEL_ID", 1)
+
+
+def models(*model_ids):
+    return [
+        ScoringModel(model_id=model_id, model=f"model{model_id}", labels={})
+        for model_id in model_ids
+    ]
+
+
+def primary_updates(session):
+    return [
+        parameters
+        for statement, parameters in session.statements
+        if statement == score_feeds.PRIMARY_SCORES_QUERY
+    ]
+
+
+def test_rescoring_the_ingest_model_updates_the_feeds_and_their_stats():
+    session = FakeSession([1, 2])
+
+    assert score_feeds.score_batch(session, models(1, 2), 0, 10, rescore=True) == (2, 4)
+    assert primary_updates(session) == [{"model_id": 1, "feed_ids": [1, 2]}]
+
+
+@pytest.mark.parametrize("model_ids, rescore", [([1, 2], False), ([2], True)])
+def test_other_scores_leave_the_feeds_alone(model_ids, rescore):
+    session = FakeSession(model_ids)
+
+    score_feeds.score_batch(session, models(*model_ids), 0, 10, rescore=rescore)
+
+    assert primary_updates(session) == []
@@ -0,0 +1,16 @@
+import glob
+import os
+import re
+
+from benchmarks.synthetic import MIGRATIONS_DIR, SCHEMA_PATH, TABLES
+
+
+def test_every_created_table_is_dropped_before_reseeding():
+    created = set()
+    for path in [SCHEMA_PATH, *glob.glob(os.path.join(MIGRATIONS_DIR, "*.sql"))]:
+        with open(path, encoding="utf-8") as sql_file:
+            created.update(
+                re.findall(r"CREATE TABLE (?:IF NOT EXISTS )?(\w+)", sql_file.read())
+            )
+
+    assert created == set(TABLES)
@@ -0,0 +1,77 @@
+import pytest
+
+from benchmarks.bench_text_normalizer import legacy_normalize_feed_item, load_titles
+from libs.text_normalizer import (
+    TOKENIZER_NLTK,
+    TOKENIZER_REGEX,
+    clean_link,
+    clean_title,
+    extract_words,
+    get_stopwords,
+    normalize_feed_item,
+    regex_tokenize,
+)
+
+LINK = "https://telex.hu/rss/belfold/2024/05/03/cikk"
+
+
+@pytest.fixture(scope="module")
+def stopwords_list() -> list:
+    """The stopwords as the legacy code used them, skips without the NLTK data."""
+    from nltk import word_tokenize
+
+    try:
+        word_tokenize("probe")
+        return sorted(get_stopwords())
+    except LookupError as error:
+        pytest.skip(f"NLTK data is not installed: {error}")
+
+
+def test_nltk_mode_matches_legacy_output(stopwords_list):
+    titles = load_titles()
+
+    legacy = [
+        legacy_normalize_feed_item(title, LINK, stopwords_list) for title in titles
+    ]
+    current = [normalize_feed_item(title, LINK, TOKENIZER_NLTK) for title in titles]
+
+    assert current == legacy
+
+
+@pytest.mark.parametrize(
+    "title, cleaned",
+    [
+        ("Tovább drágul az üzemanyag - fotók", "Tovább drágul az üzemanyag"),
+        ("Baleset az M1-esen + videó!", "Baleset az M1-esen"),
+        ("Esti fotó ", "Esti"),
+        ("Orbán Viktor: nem meglepő...", "Orbán Viktor: nem meglepő..."),
+    ],
+)
+def test_clean_title(title, cleaned):
+    assert clean_title(title) == cleaned
+
+
+def test_clean_link():
+    assert clean_link(f" {LINK} ") == "https://telex.hu/belfold/2024/05/03/cikk"
+
+
+@pytest.mark.parametrize(
+    "text, tokens",
+    [
+        ("12:30-kor lezárták", ["12:30-kor", "lezárták"]),
+        ("a 2,5 százalékos infláció", ["a", "2,5", "százalékos", "infláció"]),
+        ("a Fidesz-KDNP szerint", ["a", "Fidesz-KDNP", "szerint"]),
+        ("nem meglepő...", ["nem", "meglepő", "..."]),
+        ("„idézet”, vége", ["„", "idézet", "”", ",", "vége"]),
+    ],
+)
+def test_regex_tokenize(text, tokens):
+    assert regex_tokenize(text) == tokens
+
+
+def test_extract_words_drops_short_words_and_stopwords():
+    words = extract_words(
+        "Az új lakhatási program IS indul", TOKENIZER_REGEX, frozenset({"program"})
+    )
+
+    assert words == ["lakhatási", "indul"]
@@ -0,0 +1,58 @@
+from libs.scoring import TokenCache
+
+TOKENIZER_KEY = ("huBERT", 128)
+
+
+def fake_tokenize(calls):
+    def tokenize(titles):
+        calls.append(list(titles))
+        return {
+            "input_ids": [[len(title), 2] for title in titles],
+            "attention_mask": [[1, 1] for _ in titles],
+        }
+
+    return tokenize
+
+
+def test_encode_tokenizes_only_the_titles_not_cached():
+    cache, calls = TokenCache(max_entries=10), []
+
+    first = cache.encode(TOKENIZER_KEY, ["béke", "háború"], fake_tokenize(calls))
+    second = cache.encode(TOKENIZER_KEY, ["háború", "új", "új"], fake_tokenize(calls))
+
+    assert calls == [["béke", "háború"], ["új"]]
+    assert first[1] == second[0] == {"input_ids": [6, 2], "attention_mask": [1, 1]}
+    # The second "új" of the batch is tokenized with the first one
+    assert (cache.hits, cache.misses) == (2, 3)
+
+
+def test_least_recently_used_titles_are_evicted():
+    cache, calls = TokenCache(max_entries=2), []
+
+    cache.encode(TOKENIZER_KEY, ["a", "b"], fake_tokenize(calls))
+    cache.encode(TOKENIZER_KEY, ["a", "c"], fake_tokenize(calls))
+    cache.encode(TOKENIZER_KEY, ["a", "b"], fake_tokenize(calls))
+
+    assert calls[-1] == ["b"]
+
+
+def test_saved_entries_load_into_a_new_cache(tmp_path):
+    path = str(tmp_path / "token_cache.json")
+    cache, calls = TokenCache(max_entries=10), []
+    expected = cache.encode(TOKENIZER_KEY, ["béke", "háború"], fake_tokenize(calls))
+    cache.save(path)
+
+    loaded = TokenCache(max_entries=10)
+    loaded.load(path)
+
+    assert loaded.encode(TOKENIZER_KEY, ["béke", "háború"], fake_tokenize(calls)) == (
+        expected
+    )
+    assert len(calls) == 1
+
+
+def test_load_without_a_file_keeps_the_cache_empty(tmp_path):
+    cache = TokenCache(max_entries=10)
+    cache.load(str(tmp_path / "missing.json"))
+
+    assert len(cache) == 0
@@ -0,0 +1,87 @@
+from contextlib import contextmanager
+
+import pytest
+
+import app.models.feed_db_filters as feed_db_filters
+import config
+from app.models.feed_db_filters import FeedDBFilters
+from libs.vocabulary import VocabularyCache
+
+
+class FakeQuery:
+    def __init__(self, session):
+        self.session = session
+
+    def filter(self, *conditions):
+        return self
+
+    def all(self):
+        self.session.queries += 1
+        return [
+            (word_id, word)
+            for word, word_id in self.session.rows.items()
+            if word in self.session.asked
+        ]
+
+
+class FakeSession:
+    """Answers the vocabulary queries from a dict, counting them."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = 0
+        self.asked = set(rows)
+
+    def query(self, *columns):
+        return FakeQuery(self)
+
+
+@pytest.fixture
+def session():
+    return FakeSession({"béke": 1, "háború": 2})
+
+
+def test_get_ids_caches_known_and_missing_words(session):
+    cache = VocabularyCache()
+
+    assert cache.get_ids(session, ["béke", "nincs"]) == [1, None]
+    assert cache.get_ids(session, ["béke", "nincs"]) == [1, None]
+    assert session.queries == 1
+
+
+def test_missing_word_is_looked_up_again_after_the_ttl(session, monkeypatch):
+    cache = VocabularyCache()
+    cache.get_ids(session, ["nincs"])
+
+    session.rows["nincs"] = 3
+    session.asked.add("nincs")
+    assert cache.get_ids(session, ["nincs"]) == [None]
+
+    monkeypatch.setattr(config, "VOCABULARY_MISS_TTL", 0)
+    assert cache.get_ids(session, ["nincs"]) == [3]
+    assert cache.get_words(session, [3]) == ["nincs"]
+    assert session.queries == 2
+
+
+def test_filters_look_up_the_word_ids_once_per_words(session, monkeypatch):
+    cache = VocabularyCache()
+    lookups = []
+
+    @contextmanager
+    def session_scope():
+        lookups.append(1)
+        yield session
+
+    monkeypatch.setattr(feed_db_filters, "session_scope", session_scope)
+    monkeypatch.setattr(feed_db_filters, "vocabulary", cache)
+
+    filters = FeedDBFilters(words=["Béke"])
+    assert filters.word_ids == [1]
+    assert filters.word_ids == [1]
+    assert len(lookups) == 1
+
+    filters.words = ["béke", "nincs"]
+    assert filters.word_ids is None
+    assert filters.word_ids is None
+    assert len(lookups) == 2
+    assert "_word_ids" not in filters.conditions_dict